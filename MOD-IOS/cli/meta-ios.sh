@@ -4,17 +4,20 @@ set -euo pipefail
 ROOT=$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)
 MODULES=$ROOT/modules
 REPORTS=$ROOT/reports
+ENGINE=$ROOT/engine
 
 usage(){
-  echo "Usage: $0 --input <backup_dir> [--module <name>]"
+  echo "Usage: $0 --input <backup_dir> [--module <name>] [--jobs <n>] [--incremental]"
   exit 1
 }
 
-INPUT="" ; MOD=""
+INPUT="" ; MOD="" ; JOBS="" ; INCREMENTAL=""
 while [[ $# -gt 0 ]]; do
   case $1 in
     --input) INPUT=$2; shift 2 ;;
     --module) MOD=$2; shift 2 ;;
+    --jobs) JOBS=$2; shift 2 ;;
+    --incremental) INCREMENTAL=1; shift ;;
     -h|--help) usage ;;
     *) usage ;;
   esac
@@ -29,22 +32,12 @@ mkdir -p "$SESSION"
 :> "$SESSION/audit.log"
 :> "$SESSION/errors.log"
 
-run_module(){
-  local name=$1
-  echo "[$(date)] START $name" | tee -a "$SESSION/audit.log"
-  if ! bash "$MODULES/$name" "$INPUT" "$SESSION" "$BACKID" >>"$SESSION/audit.log" 2>>"$SESSION/errors.log"; then
-    echo "[!] $name failed" | tee -a "$SESSION/audit.log"
-  fi
-  echo "[$(date)] END $name" | tee -a "$SESSION/audit.log"
-}
+ARGS=(--input "$INPUT" --session "$SESSION" --backid "$BACKID")
+[[ -n $MOD ]] && ARGS+=(--module "${MOD%.sh}")
+[[ -n $INCREMENTAL ]] && ARGS+=(--incremental)
+[[ -n $JOBS ]] && ARGS+=(--jobs "$JOBS")
 
-if [[ -n $MOD ]]; then
-  [[ "$MOD" == *.sh ]] || MOD="$MOD.sh"
-  run_module "$MOD"
-else
-  for m in "$MODULES"/*.sh; do
-    run_module "$(basename "$m")"
-  done
-fi
+# Runs modules in dependency order, up to config.yaml `concurrency` at once
+python3 "$ENGINE/scheduler.py" "${ARGS[@]}"
 
 echo "Output at $SESSION"
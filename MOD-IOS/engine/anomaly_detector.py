@@ -1,21 +1,46 @@
 #!/usr/bin/env python3
-import argparse, sqlite3, pandas as pd
+import argparse, plistlib, time
+from datetime import datetime, timezone
 from pathlib import Path
-def detect(session: Path, out: Path):
-    db = session / 'session.sqlite'
-    if not db.exists(): return
-    conn = sqlite3.connect(str(db))
-    df = pd.read_sql("SELECT * FROM fs_timeline", conn)
-    if 'mtime' in df.columns and 'crtime' in df.columns:
-        ann = df[df['mtime'] < df['crtime']]
-        out.mkdir(parents=True, exist_ok=True)
-        ann.to_csv(out / 'time_anomalies.csv', index=False)
+from modules.anomaly_rules import CHUNK_ROWS, build_rules, detect as run_rules, export_csv
+from modules.config import load_config
+from modules.session_db import connect, session_db
+
+def backup_date(input_dir: Path):
+    """'Last Backup Date' from Info.plist as Unix seconds, or None"""
+    try:
+        with open(input_dir / 'Info.plist', 'rb') as fh:
+            value = plistlib.load(fh).get('Last Backup Date')
+    except (OSError, plistlib.InvalidFileException):
+        return None
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    return None
+
+def detect(session: Path, out: Path, reference=None, cfg=None, backid=None):
+    if not session_db(session).exists(): return
+    cfg = (cfg if cfg is not None else load_config()).get('anomaly_rules', {}) or {}
+    rules = build_rules(cfg.get('rules'), reference if reference is not None else time.time())
+    conn = connect(session)
+    counts = run_rules(conn, rules, chunk_rows=int(cfg.get('chunk_rows', CHUNK_ROWS)))
+    out.mkdir(parents=True, exist_ok=True)
+    export_csv(conn, out / (f'{backid}_time_anomalies.csv' if backid else 'time_anomalies.csv'))
     conn.close()
+    for name, n in counts.items():
+        print(f"[*] {name}: {n}")
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--session', required=True)
+    p.add_argument('--backid', help='Backup ID (CSV name prefix)')
+    p.add_argument('--input', help='Backup dir; its Info.plist backup date is the reference for date rules')
+    p.add_argument('--reference', help='Reference date (ISO 8601) instead of the backup date')
     args = p.parse_args()
     session = Path(args.session)
-    detect(session, session / 'anomalies')
+    if args.reference:
+        ref = datetime.fromisoformat(args.reference)
+        reference = (ref if ref.tzinfo else ref.replace(tzinfo=timezone.utc)).timestamp()
+    else:
+        reference = backup_date(Path(args.input)) if args.input else None
+    detect(session, session / 'anomalies', reference, backid=args.backid)
 if __name__ == '__main__':
     main()
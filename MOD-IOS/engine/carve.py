@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+import argparse, sys
+from modules.carving import SHARD_BYTES, TOOLS, carve
+
+def main():
+    p = argparse.ArgumentParser(description='Carve a NUL-separated file list (stdin), deduplicated and sharded')
+    p.add_argument('--tool', required=True, choices=sorted(TOOLS))
+    p.add_argument('--out', required=True, help='Directory for per-shard carver output')
+    p.add_argument('--session', required=True, help='Session dir; features go to session.sqlite')
+    p.add_argument('--workers', type=int, default=None, help='Concurrent carver processes (default: all cores)')
+    p.add_argument('--shard-mb', type=int, default=SHARD_BYTES >> 20, help='Max size of a packed image')
+    args = p.parse_args()
+    paths = [x for x in sys.stdin.buffer.read().decode('utf-8', 'surrogateescape').split('\0') if x]
+    unique, shards, features, failed = carve(args.tool, paths, args.out, args.session,
+                                             args.workers, args.shard_mb << 20)
+    print(f"[*] {args.tool}: {len(paths)} files, {unique} unique, {shards} shards, {features} features")
+    if failed:
+        print(f"[!] {args.tool} failed on: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,27 @@
 # MOD-IOS/engine/dashboard.py
-import os
 import re
-import json
 import time
-import shutil
 import plistlib
 import sqlite3
-import subprocess
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+import pandas as pd
+import pydeck as pdk
 import streamlit as st
 
+from modules.background_tasks import TaskRunner
+from modules.backup_summary import backup_fingerprint, build_summary, load_summary
+from modules.backup_decrypt import decrypt_backup
+from modules.config import get_categories
+from modules.geo import clusters, deepest_zoom, level_sizes, store_ready
+from modules.inventory import build_inventory, load_inventory
+from modules.parse_decode_module import IOSBackupParser
+from modules.plist_view import PlistIndex, is_plist, open_plist, preview, to_python
+from modules.sqlite_browser import (OPERATORS, PAGE_SIZE, count_rows, display_cell, estimate_rows,
+                                    fetch_page, indexed_columns, is_sqlite, list_tables, open_readonly,
+                                    table_columns)
+
 # ---------- Constants ----------
 BASE_DIR = Path("MOD-IOS")
 ENGINE_DIR = BASE_DIR / "engine"
@@ -19,6 +29,10 @@ TARGET_DIR = BASE_DIR / "target_"
 DECRYPT_SUFFIX = "__decrypted"
 
 UUID_RE = re.compile(r"^[A-Fa-f0-9]{25,64}$")  # UDID/UUID-ish folder names vary by length
+POLL_SECONDS = 0.5  # rerun interval while a background task is running
+PLIST_PAGE = 200    # children listed per page in the plist viewer
+SEARCH_LIMIT = 200  # search results shown at once
+MAP_POINTS = 50_000 # clusters drawn at once on the locations map
 
 # ---------- Helpers ----------
 def ensure_dirs() -> None:
@@ -83,85 +97,48 @@ def has_decrypted_dir(backup_dir: Path) -> Path:
     out = backup_dir.parent / f"{backup_dir.name}{DECRYPT_SUFFIX}"
     return out if out.exists() and out.is_dir() else Path()
 
-def decrypt_backup(backup_dir: Path, password: str, out_dir: Path) -> Tuple[bool, str]:
-    """
-    Uses the external CLI 'iphone_backup_decrypt' if available.
-    Returns (ok, message).
-    """
-    cmd = shutil.which("iphone_backup_decrypt")
-    if not cmd:
-        return False, "iphone_backup_decrypt is not installed. Install with: pip install iphone_backup_decrypt"
-
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    # Typical usage:
-    # iphone_backup_decrypt -i <backup_dir> -o <out_dir> -p <password>
-    proc = subprocess.Popen(
-        [cmd, "-i", backup_dir.as_posix(), "-o", out_dir.as_posix(), "-p", password],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1
-    )
-    log_lines = []
-    # Stream logs to UI
-    placeholder = st.empty()
-    with placeholder.container():
-        st.write("Starting decryption…")
-        log_area = st.empty()
-        prog = st.progress(0)
-    step = 0
-    for line in proc.stdout:
-        log_lines.append(line.rstrip())
-        step = min(100, step + 1)
-        with placeholder.container():
-            log_area.code("\n".join(log_lines[-30:]))
-            prog.progress(step)
-    proc.wait()
-    ok = proc.returncode == 0
-    if ok:
-        return True, f"Decryption completed → {out_dir}"
-    else:
-        return False, "Decryption failed. Check password and backup integrity."
-
-def quick_fs_inventory(root: Path, max_items: int = 2000) -> Dict[str, int]:
-    counts = {"files": 0, "dirs": 0, "db": 0, "plist": 0, "images": 0, "media": 0, "wal": 0}
-    ex_db = {".db", ".sqlite", ".sqlite3"}
-    ex_plist = {".plist"}
-    ex_img = {".jpg", ".jpeg", ".png", ".heic", ".gif", ".tiff", ".bmp"}
-    ex_media = {".mp4", ".mov", ".m4a", ".caf", ".aac", ".wav", ".mp3"}
-
-    walked = 0
-    for dirpath, dirnames, filenames in os.walk(root):
-        counts["dirs"] += 1
-        for fn in filenames:
-            walked += 1
-            if walked > max_items:
-                break
-            f = fn.lower()
-            counts["files"] += 1
-            suffix = Path(f).suffix
-            if suffix in ex_db:
-                counts["db"] += 1
-            if suffix in ex_plist:
-                counts["plist"] += 1
-            if suffix in ex_img:
-                counts["images"] += 1
-            if suffix in ex_media:
-                counts["media"] += 1
-            if suffix == ".wal":
-                counts["wal"] += 1
-        if walked > max_items:
-            break
-    return counts
+def quick_fs_inventory(root: Path, progress=None) -> Dict:
+    """Complete inventory of ``root``, classified through Manifest.db (modules/inventory.py)"""
+    return build_inventory(root, progress)
+
+def show_inventory(inventory: Dict) -> None:
+    st.write(f"**{inventory['files']:,} files** · {inventory['bytes'] / 2**30:.2f} GiB · "
+             f"computed {inventory['computed_at']}")
+    cats = sorted(inventory["categories"].items(), key=lambda kv: -kv[1]["bytes"])
+    st.dataframe(pd.DataFrame([(c, v["files"], round(v["bytes"] / 2**20, 1)) for c, v in cats],
+                              columns=["category", "files", "MiB"]), use_container_width=True, hide_index=True)
+    if inventory["manifest_missing"]:
+        st.caption(f"{inventory['manifest_missing']:,} files listed in Manifest.db are not on disk.")
+    if inventory["domains"]:
+        with st.expander("By domain"):
+            doms = sorted(inventory["domains"].items(), key=lambda kv: -kv[1]["bytes"])
+            st.dataframe(pd.DataFrame([(d or "—", v["files"], round(v["bytes"] / 2**20, 1)) for d, v in doms],
+                                      columns=["domain", "files", "MiB"]), use_container_width=True, hide_index=True)
+
+def geo_map(store) -> None:
+    """Pre-aggregated clusters of one zoom level; the level picks the detail, not the point count"""
+    sizes = level_sizes(store)
+    if not sum(sizes.values()):
+        st.caption("No coordinates found in the backup's location databases.")
+        return
+    deepest = deepest_zoom(store, MAP_POINTS) or 0
+    zoom = st.slider("Cluster level", 0, deepest, value=deepest, key="geo_zoom",
+                     help=f"Map zoom the clusters are sized for; levels over {MAP_POINTS:,} clusters are not drawn") \
+        if deepest else 0
+    df = pd.DataFrame(clusters(store, zoom)).astype({"latitude": "float64", "longitude": "float64", "n": "int64"})
+    total = int(df["n"].sum())
+    st.caption(f"{total:,} points in {len(df):,} clusters (level {zoom})")
+    layer = pdk.Layer("ScatterplotLayer", df, get_position="[longitude, latitude]", get_radius="3 + 2 * Math.log2(n)",
+                      radius_units="pixels", get_fill_color=[230, 80, 30, 160], pickable=True)
+    view = pdk.ViewState(latitude=float((df["latitude"] * df["n"]).sum() / total),
+                         longitude=float((df["longitude"] * df["n"]).sum() / total), zoom=1)
+    st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view, tooltip={"text": "{n} points"}))
 
 def read_sqlite_head(db_path: Path, limit: int = 10) -> Dict[str, List[str]]:
     info = {"tables": []}
     try:
-        con = sqlite3.connect(db_path.as_posix())
-        cur = con.cursor()
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
-        info["tables"] = [r[0] for r in cur.fetchall()]
+        con = open_readonly(db_path)
+        info["tables"] = [name for name, kind in list_tables(con) if kind == "table"]
         con.close()
     except Exception:
         pass
@@ -173,6 +150,245 @@ def label_for_path(p: Path) -> str:
     else:
         return f"[FILE] {p.name}"
 
+# ---------- Cached data layer ----------
+# Keys include directory/file mtimes, so entries go stale exactly when the
+# underlying files change and reruns otherwise never touch the disk.
+def _mtime_ns(p: Path) -> int:
+    try:
+        return p.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+@st.cache_data(show_spinner=False)
+def _cached_candidates(target: str, mtime_ns: int) -> Tuple[List[Path], List[Path]]:
+    return find_candidates()
+
+def cached_candidates() -> Tuple[List[Path], List[Path]]:
+    return _cached_candidates(TARGET_DIR.as_posix(), _mtime_ns(TARGET_DIR))
+
+@st.cache_data(show_spinner=False)
+def _cached_manifest_info(path: str, fingerprint: tuple) -> Dict:
+    return read_manifest_info(Path(path))
+
+def cached_manifest_info(backup_dir: Path) -> Dict:
+    return _cached_manifest_info(backup_dir.as_posix(), tuple(backup_fingerprint(backup_dir)))
+
+@st.cache_data(show_spinner=False)
+def _cached_decrypted_dir(path: str, parent_mtime_ns: int) -> Path:
+    return has_decrypted_dir(Path(path))
+
+def cached_decrypted_dir(backup_dir: Path) -> Path:
+    return _cached_decrypted_dir(backup_dir.as_posix(), _mtime_ns(backup_dir.parent))
+
+@st.cache_data(show_spinner=False)
+def _cached_sqlite_head(path: str, mtime_ns: int) -> Dict[str, List[str]]:
+    return read_sqlite_head(Path(path))
+
+def cached_sqlite_head(db_path: Path) -> Dict[str, List[str]]:
+    return _cached_sqlite_head(db_path.as_posix(), _mtime_ns(db_path))
+
+@st.cache_data(show_spinner=False)
+def _cached_sqlite_tables(path: str, mtime_ns: int) -> Dict[str, Dict]:
+    con = open_readonly(Path(path))
+    try:
+        tables = {}
+        for name, kind in list_tables(con):
+            rows, _ = estimate_rows(con, name)
+            tables[name] = {"type": kind, "columns": table_columns(con, name),
+                            "indexed": sorted(indexed_columns(con, name)), "estimate": rows}
+        return tables
+    finally:
+        con.close()
+
+def cached_sqlite_tables(db_path: Path) -> Dict[str, Dict]:
+    """{table: type, columns, indexed columns, row estimate}; no table scans"""
+    return _cached_sqlite_tables(db_path.as_posix(), _mtime_ns(db_path))
+
+@st.cache_data(show_spinner=False)
+def _cached_row_count(path: str, mtime_ns: int, table: str, filters: tuple) -> int:
+    con = open_readonly(Path(path))
+    try:
+        return count_rows(con, table, list(filters))
+    finally:
+        con.close()
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _cached_plist(path: str, mtime_ns: int):
+    return open_plist(Path(path))
+
+def cached_plist(plist_path: Path):
+    """Parsed lazily: binary plists keep only their bytes until nodes are asked for"""
+    return _cached_plist(plist_path.as_posix(), _mtime_ns(plist_path))
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _search_parser(path: str, manifest_mtime_ns: int) -> IOSBackupParser:
+    parser = IOSBackupParser(path)
+    parser.connect()
+    return parser
+
+def search_parser(root: Path) -> IOSBackupParser:
+    """One parser (Manifest.db, search index and geo store connections) per backup, shared across reruns"""
+    return _search_parser(root.as_posix(), _mtime_ns(root / "Manifest.db"))
+
+@st.cache_resource
+def task_runner() -> TaskRunner:
+    """One runner per server process, shared by all sessions and reruns"""
+    return TaskRunner()
+
+def show_task(task, label: str) -> None:
+    if task.running:
+        st.progress(task.progress, text=f"{label}… {task.message}")
+    elif task.status == "error":
+        st.error(f"{label} failed: {task.error.splitlines()[0]}")
+
+def open_sqlite_browser(db_path: Path) -> None:
+    st.session_state["sqlite_db"] = db_path.as_posix()
+
+def sqlite_browser(db_path: Path) -> None:
+    """Paged table viewer; each rerun reads one page straight from SQLite"""
+    try:
+        tables = cached_sqlite_tables(db_path)
+    except sqlite3.Error as e:
+        st.error(f"Cannot open {db_path.name}: {e}")
+        return
+    if not tables:
+        st.caption("No tables.")
+        return
+
+    def table_label(name: str) -> str:
+        est = tables[name]["estimate"]
+        return f"{name} ({tables[name]['type']}, ~{est:,} rows)" if est is not None else f"{name} ({tables[name]['type']})"
+
+    table = st.selectbox("Table", list(tables), format_func=table_label, key="sqlite_table")
+    info = tables[table]
+    columns = info["columns"]
+    f1, f2, f3, f4, f5, f6 = st.columns([1.2, 0.8, 1.2, 1.2, 0.6, 0.6])
+    fcol = f1.selectbox("Filter column", ["(none)"] + columns, key="sqlite_fcol")
+    fop = f2.selectbox("Operator", list(OPERATORS), key="sqlite_fop")
+    fval = f3.text_input("Value", key="sqlite_fval")
+    sort = f4.selectbox("Sort by", ["(row order)"] + columns, key="sqlite_sort",
+                        format_func=lambda c: f"{c} (indexed)" if c in info["indexed"] else c)
+    desc = f5.checkbox("Desc", key="sqlite_desc")
+    size = f6.selectbox("Rows", [50, PAGE_SIZE, 250, 500], index=1, key="sqlite_size")
+    filters = ((fcol, fop, fval),) if fcol != "(none)" and (fval or "null" in fop) else ()
+    sort = None if sort == "(row order)" else sort
+
+    # Cursor stack for this view; any change to table/filter/sort starts over at page 1
+    signature = (db_path.as_posix(), _mtime_ns(db_path), table, filters, sort, desc, size)
+    state = st.session_state.setdefault("sqlite_view", {})
+    if state.get("signature") != signature:
+        state.update(signature=signature, cursors=[None])
+    try:
+        con = open_readonly(db_path)
+        try:
+            cols, rows, next_cursor = fetch_page(con, table, sort=sort, descending=desc, filters=list(filters),
+                                                 cursor=state["cursors"][-1], limit=size)
+        finally:
+            con.close()
+    except (sqlite3.Error, ValueError) as e:
+        st.error(f"Query failed: {e}")
+        return
+
+    page = len(state["cursors"])
+    st.dataframe(pd.DataFrame.from_records([[display_cell(v) for v in r] for r in rows], columns=cols),
+                 use_container_width=True, hide_index=True)
+    n1, n2, n3, n4 = st.columns([0.5, 0.5, 1, 2])
+    if n1.button("◀ Prev", disabled=page == 1, key="sqlite_prev"):
+        state["cursors"].pop()
+        st.rerun()
+    if n2.button("Next ▶", disabled=next_cursor is None, key="sqlite_next"):
+        state["cursors"].append(next_cursor)
+        st.rerun()
+    first = (page - 1) * size
+    n3.caption(f"Page {page} · rows {first + 1:,}–{first + len(rows):,}" if rows else f"Page {page} · no rows")
+    if n4.button("Count matching rows", key="sqlite_count"):
+        state["count"] = (signature, _cached_row_count(db_path.as_posix(), _mtime_ns(db_path), table, filters))
+    if state.get("count", (None,))[0] == signature:
+        n4.caption(f"{state['count'][1]:,} rows match")
+
+def open_plist_viewer(plist_path: Path) -> None:
+    st.session_state["plist_path"] = plist_path.as_posix()
+
+def plist_viewer(plist_path: Path, runner: TaskRunner) -> None:
+    """Drill-down view of one container at a time, a page of children per rerun"""
+    doc = cached_plist(plist_path)
+    if doc is None:
+        st.error("Failed to parse plist (may be encrypted).")
+        return
+    signature = (plist_path.as_posix(), _mtime_ns(plist_path))
+    state = st.session_state.setdefault("plist_view", {})
+    if state.get("signature") != signature:
+        state.update(signature=signature, trail=[("root", doc.root)], page=0)
+
+    # Search runs against an index built once per file in the background
+    index_key = f"plist-index:{signature[0]}:{signature[1]}"
+    query = st.text_input("Search keys and values", key="plist_query")
+    if query:
+        task = runner.get(index_key) or runner.submit(index_key, lambda progress: PlistIndex(doc, progress))
+        show_task(task, "Indexing plist")
+        if task.status == "done":
+            hits = task.result.search(query)
+            if task.result.truncated:
+                st.caption(f"Index stopped at {task.result.count:,} nodes; later nodes are not searched.")
+            st.caption(f"{len(hits)} match{'es' if len(hits) != 1 else ''}" + (" (first 200)" if len(hits) == 200 else ""))
+            if hits:
+                st.dataframe(pd.DataFrame([(h[2], h[4]) for h in hits], columns=["path", "value"]),
+                             use_container_width=True, hide_index=True)
+                target = st.selectbox("Go to", range(len(hits)), format_func=lambda i: hits[i][2] or "(root)",
+                                      key="plist_goto")
+                if st.button("Open location", key="plist_goto_btn"):
+                    ref = hits[target][0] if hits[target][1] is None else hits[target][1]
+                    state["trail"] = [(key or "root", r) for key, r in task.result.lineage(ref)]
+                    state["page"] = 0
+                    st.rerun()
+        elif task.status == "error":
+            runner.discard(index_key)
+
+    trail = state["trail"]
+    ref = trail[-1][1]
+    kind, count = doc.kind(ref)
+    count = count or 0
+    b1, b2, b3 = st.columns([0.5, 0.5, 4])
+    if b1.button("⬆ Up", disabled=len(trail) == 1, key="plist_up"):
+        trail.pop()
+        state["page"] = 0
+        st.rerun()
+    if b2.button("Root", disabled=len(trail) == 1, key="plist_root"):
+        del trail[1:]
+        state["page"] = 0
+        st.rerun()
+    b3.caption(" / ".join(str(label) for label, _ in trail) + f"  ({kind}, {count:,} items)")
+
+    pages = max(1, -(-count // PLIST_PAGE))
+    page = min(state["page"], pages - 1)
+    children = doc.children(ref, page * PLIST_PAGE, (page + 1) * PLIST_PAGE)
+    rows = [(label, *preview(doc, child)) for label, child in children]
+    st.dataframe(pd.DataFrame(rows, columns=["key", "type", "value"]), use_container_width=True, hide_index=True)
+
+    n1, n2, n3 = st.columns([0.5, 0.5, 3])
+    if n1.button("◀ Prev", disabled=page == 0, key="plist_prev"):
+        state["page"] = page - 1
+        st.rerun()
+    if n2.button("Next ▶", disabled=page >= pages - 1, key="plist_next"):
+        state["page"] = page + 1
+        st.rerun()
+    n3.caption(f"Page {page + 1} of {pages}")
+
+    containers = [(label, child) for label, child in children if doc.kind(child)[0] != "scalar"]
+    if containers:
+        o1, o2 = st.columns([3, 1])
+        pick = o1.selectbox("Expand", range(len(containers)), format_func=lambda i: str(containers[i][0]),
+                            key="plist_expand")
+        if o2.button("Open", key="plist_open"):
+            trail.append(containers[pick])
+            state["page"] = 0
+            st.rerun()
+    if st.button("Show this node as JSON", key="plist_json"):
+        try:
+            st.json(to_python(doc, ref))
+        except ValueError as e:
+            st.warning(f"Too large to render at once ({e}); expand a child instead.")
+
 # ---------- UI ----------
 def main():
     ensure_dirs()
@@ -182,11 +398,12 @@ def main():
     with st.sidebar:
         st.markdown("### Settings")
         if st.button("Rescan target_"):
-            st.session_state["_rescan"] = True
+            st.cache_data.clear()
         password = st.text_input("Backup password (for encrypted backups)", type="password")
         st.caption("If the backup is encrypted, the password is required for decryption.")
 
-    backup_dirs, loose_files = find_candidates()
+    runner = task_runner()
+    backup_dirs, loose_files = cached_candidates()
 
     st.markdown("#### Select Backup or File")
     options = []
@@ -205,12 +422,18 @@ def main():
     selected = st.selectbox("Available items in target_", options, index=0)
     sel_path = index_map[options.index(selected)]
 
+    # Looked up once per rerun (cached), reused by every card below
+    is_backup = sel_path.is_dir()
+    meta = cached_manifest_info(sel_path) if is_backup else {}
+    dec_dir = cached_decrypted_dir(sel_path) if is_backup else Path()
+    summary_key = f"summary:{sel_path}"
+    decrypt_key = f"decrypt:{sel_path}"
+
     # ---------- Cards Row ----------
     c1, c2, c3 = st.columns([1.2, 1, 1])
     with c1:
         st.markdown("#### Backup Status")
-        if sel_path.is_dir():
-            meta = read_manifest_info(sel_path)
+        if is_backup:
             enc = meta["encrypted"]
             enc_str = "Unknown"
             if enc is True:
@@ -221,7 +444,17 @@ def main():
             st.write(f"**Encryption:** {enc_str}")
             st.write(f"**Device:** {meta.get('device_name') or '—'}")
             st.write(f"**iOS:** {meta.get('ios_version') or '—'}")
-            dec_dir = has_decrypted_dir(sel_path)
+            # Size/file count: stored summary, or a background walk if stale
+            summary = load_summary(sel_path)
+            if summary is None:
+                task = runner.get(summary_key) or runner.submit(summary_key, build_summary, sel_path)
+                show_task(task, "Measuring backup")
+                if task.status == "done":
+                    summary = task.result
+                if not task.running:
+                    runner.discard(summary_key)  # an error is retried on the next rerun
+            if summary:
+                st.write(f"**Files:** {summary['file_count']:,} ({summary['total_bytes'] / 2**30:.2f} GiB)")
             if dec_dir:
                 st.success(f"Decrypted view exists: {dec_dir.name}")
             else:
@@ -232,62 +465,71 @@ def main():
 
     with c2:
         st.markdown("#### Actions")
-        if sel_path.is_dir():
-            dec_dir = has_decrypted_dir(sel_path)
-            encrypted_flag = read_manifest_info(sel_path).get("encrypted")
-            if encrypted_flag is True and not dec_dir:
-                if st.button("Decrypt backup → target_/UUID__decrypted"):
+        if is_backup:
+            encrypted_flag = meta.get("encrypted")
+            if encrypted_flag is True:
+                # Runs in the background; selected categories decrypt first, the rest can follow later
+                if dec_dir:
+                    st.success("Decrypted mirror exists; further domains are added to it.")
+                categories = get_categories()
+                picked = st.multiselect("Only these categories (none = whole backup)", list(categories),
+                                        key="decrypt_categories")
+                label = "Decrypt more" if dec_dir else "Decrypt backup → target_/UUID__decrypted"
+                if st.button(label, disabled=runner.any_running(decrypt_key)):
                     if not password:
                         st.error("Enter backup password in sidebar.")
                     else:
                         out_dir = sel_path.parent / f"{sel_path.name}{DECRYPT_SUFFIX}"
-                        ok, msg = decrypt_backup(sel_path, password, out_dir)
-                        if ok:
-                            st.success(msg)
-                            st.toast("Decryption finished", icon="✅")
-                        else:
-                            st.error(msg)
+                        keywords = {c: categories[c] for c in picked} or None
+                        runner.discard(decrypt_key)
+                        runner.submit(decrypt_key, decrypt_backup, sel_path, password, out_dir, keywords)
+                task = runner.get(decrypt_key)
+                if task is not None:
+                    show_task(task, "Decrypting")
+                    if task.status == "done":
+                        stats = task.result
+                        st.success(f"Decrypted {stats['files']:,} files ({stats['bytes'] / 2**20:,.1f} MiB); "
+                                   f"{stats['skipped']:,} already present.")
+                        if stats["failed"]:
+                            st.warning(f"{stats['failed']:,} files failed; see decrypt_errors.log in the mirror.")
             elif encrypted_flag is False:
                 st.info("Backup is not encrypted; decryption not required.")
-            elif dec_dir:
-                st.success("Already decrypted.")
         else:
             # Loose file actions
-            if sel_path.suffix.lower() in {".db", ".sqlite", ".sqlite3"}:
-                if st.button("Inspect SQLite (tables)"):
-                    info = read_sqlite_head(sel_path)
-                    st.code(json.dumps(info, indent=2))
-            elif sel_path.suffix.lower() == ".plist":
+            if is_sqlite(sel_path):
+                if st.button("Browse SQLite"):
+                    open_sqlite_browser(sel_path)
+            elif is_plist(sel_path):
                 if st.button("Open Plist"):
-                    d = load_plist_safe(sel_path)
-                    if d is None:
-                        st.error("Failed to parse plist (may be encrypted).")
-                    else:
-                        st.code(json.dumps(d, indent=2))
+                    open_plist_viewer(sel_path)
 
     with c3:
         st.markdown("#### Decode / Inventory")
         # Allow decoding on decrypted or plaintext backups
-        scan_root = None
-        if sel_path.is_dir():
-            dec_dir = has_decrypted_dir(sel_path)
-            scan_root = dec_dir if dec_dir else sel_path
-        else:
-            scan_root = None
+        scan_root = (dec_dir if dec_dir else sel_path) if is_backup else None
 
         if scan_root:
-            if st.button("Quick Inventory (files, db, plist, media)"):
-                with st.spinner("Scanning…"):
-                    counts = quick_fs_inventory(scan_root)
-                    st.json(counts)
+            inventory_key = f"inventory:{scan_root}"
+            # A stored inventory stays valid until the backup changes
+            inventory = load_inventory(scan_root)
+            label = "Rebuild Inventory" if inventory else "Full Inventory (files, db, plist, media)"
+            if st.button(label):
+                runner.discard(inventory_key)
+                runner.submit(inventory_key, quick_fs_inventory, scan_root)
+            task = runner.get(inventory_key)
+            if task is not None:
+                show_task(task, "Scanning")
+                if task.status == "done":
+                    inventory = task.result
+            if inventory:
+                show_inventory(inventory)
         else:
             st.caption("Select a backup folder (or decrypt first) to enable inventory.")
 
     st.markdown("---")
     st.markdown("### Explorer / Details")
 
-    if sel_path.is_dir():
-        dec_dir = has_decrypted_dir(sel_path)
+    if is_backup:
         root = dec_dir if dec_dir else sel_path
 
         cols = st.columns(4)
@@ -298,13 +540,9 @@ def main():
                 if p.exists():
                     if st.button(f"View {name}"):
                         if p.suffix.lower() == ".plist":
-                            data = load_plist_safe(p)
-                            if data is None:
-                                st.error(f"{name} could not be parsed (possibly encrypted).")
-                            else:
-                                st.code(json.dumps(data, indent=2))
-                        elif p.suffix.lower() in {".db", ".sqlite", ".sqlite3"}:
-                            st.write(read_sqlite_head(p))
+                            open_plist_viewer(p)
+                        elif is_sqlite(p):
+                            open_sqlite_browser(p)
                 else:
                     st.caption(f"{name}: —")
 
@@ -315,7 +553,9 @@ def main():
                 choice = st.selectbox("Select DB", [p.name for p in dbs], key="db_select_top")
                 sel_db = root / choice
                 if st.button("List tables", key="list_tables_btn"):
-                    st.json(read_sqlite_head(sel_db))
+                    st.json(cached_sqlite_head(sel_db))
+                if st.button("Browse", key="browse_db_btn"):
+                    open_sqlite_browser(sel_db)
             else:
                 st.caption("No DB files at root.")
 
@@ -326,11 +566,7 @@ def main():
                 choice = st.selectbox("Select Plist", [p.name for p in pl], key="plist_select_top")
                 sel_pl = root / choice
                 if st.button("Open plist", key="open_plist_btn"):
-                    d = load_plist_safe(sel_pl)
-                    if d is None:
-                        st.error("Failed to parse (binary/encrypted?). Try biplist or ensure decrypted.")
-                    else:
-                        st.code(json.dumps(d, indent=2))
+                    open_plist_viewer(sel_pl)
             else:
                 st.caption("No plist files at root.")
 
@@ -350,13 +586,12 @@ def main():
             for rel in common:
                 p = root / rel
                 if p.exists():
-                    if p.suffix.lower() == ".plist":
+                    if is_plist(p):
                         if st.button(f"Open {rel}"):
-                            d = load_plist_safe(p)
-                            st.code(json.dumps(d, indent=2) if d else "Unable to parse.")
-                    elif p.suffix.lower() in {".db", ".sqlite", ".sqlite3"}:
-                        if st.button(f"Tables {rel}"):
-                            st.json(read_sqlite_head(p))
+                            open_plist_viewer(p)
+                    elif is_sqlite(p):
+                        if st.button(f"Browse {rel}"):
+                            open_sqlite_browser(p)
                 else:
                     st.caption(f"{rel}: —")
 
@@ -364,6 +599,89 @@ def main():
         # Single-file view is handled above in actions
         st.info("Select a backup folder for full decode view.")
 
+    sqlite_db = st.session_state.get("sqlite_db")
+    if sqlite_db:
+        st.markdown("---")
+        h1, h2 = st.columns([6, 1])
+        h1.markdown(f"### SQLite Browser • {Path(sqlite_db).name}")
+        if h2.button("Close", key="sqlite_close"):
+            del st.session_state["sqlite_db"]
+            st.rerun()
+        sqlite_browser(Path(sqlite_db))
+
+    plist_path = st.session_state.get("plist_path")
+    if plist_path:
+        st.markdown("---")
+        h1, h2 = st.columns([6, 1])
+        h1.markdown(f"### Plist Viewer • {Path(plist_path).name}")
+        if h2.button("Close", key="plist_close"):
+            del st.session_state["plist_path"]
+            st.rerun()
+        plist_viewer(Path(plist_path), runner)
+
+    if is_backup:
+        st.markdown("---")
+        st.markdown("### Search Backup")
+        search_root = dec_dir if dec_dir else sel_path
+        if meta.get("encrypted") is True and not dec_dir:
+            st.caption("Decrypt the backup first to search it.")
+        elif not (search_root / "Manifest.db").exists():
+            st.caption("No Manifest.db to index.")
+        else:
+            s1, s2 = st.columns([4, 1])
+            query = s1.text_input("Search paths, domains and plist keys/values",
+                                  help="Substrings (3+ characters), word* for prefixes, AND/OR/NOT, "
+                                       "and path:/domain:/key:/value:/text: to pick a column",
+                                  key="search_query")
+            with_strings = s2.checkbox("Include file strings", key="search_strings",
+                                       help="Also index printable strings of non-media files (slower first build)")
+            parser = search_parser(search_root)
+            index_key = f"search-index:{search_root}:{with_strings}"
+            if parser.has_search_index(with_strings):
+                if query:
+                    started = time.perf_counter()
+                    try:
+                        hits = parser.search(query, limit=SEARCH_LIMIT)
+                    except ValueError as e:
+                        st.warning(str(e))
+                    except sqlite3.OperationalError as e:
+                        st.warning(f"Could not parse query: {e}")
+                    else:
+                        st.caption(f"{len(hits)} result{'s' if len(hits) != 1 else ''}"
+                                   f"{' (first ' + str(SEARCH_LIMIT) + ')' if len(hits) == SEARCH_LIMIT else ''}"
+                                   f" in {(time.perf_counter() - started) * 1000:.0f} ms")
+                        st.dataframe(hits, use_container_width=True, hide_index=True)
+            else:
+                # Built once per backup in the background; later searches hit the stored index
+                task = runner.get(index_key) or runner.submit(index_key, parser.build_search_index, with_strings)
+                show_task(task, "Building search index")
+                if not task.running:
+                    runner.discard(index_key)
+                    if task.status == "done":
+                        st.rerun()
+
+    if is_backup:
+        st.markdown("---")
+        st.markdown("### Locations Map")
+        geo_root = dec_dir if dec_dir else sel_path
+        if meta.get("encrypted") is True and not dec_dir:
+            st.caption("Decrypt the backup first to map it.")
+        elif not (geo_root / "Manifest.db").exists():
+            st.caption("No Manifest.db to read location databases from.")
+        else:
+            parser = search_parser(geo_root)
+            if store_ready(parser.geo_store()):
+                geo_map(parser.geo_store())
+            else:
+                # Points and per-zoom clusters are stored once per backup; the map only reads one level
+                geo_key = f"geo-index:{geo_root}"
+                task = runner.get(geo_key) or runner.submit(geo_key, parser.build_geo_index)
+                show_task(task, "Loading location databases")
+                if not task.running:
+                    runner.discard(geo_key)
+                    if task.status == "done":
+                        st.rerun()
+
     st.markdown("---")
     st.markdown("### Module Stubs (cards)")
     cc1, cc2, cc3, cc4 = st.columns(4)
@@ -383,5 +701,12 @@ def main():
         "Loose files (e.g., Manifest.db, Manifest.plist, *wal) are selectable for quick inspection."
     )
 
+    # Keep polling while this backup has work in flight; widgets stay usable between reruns
+    if runner.any_running(summary_key) or runner.any_running(decrypt_key) or (scan_root and runner.any_running(f"inventory:{scan_root}")) \
+            or runner.any_running("plist-index:") or runner.any_running("search-index:") \
+            or runner.any_running("geo-index:"):
+        time.sleep(POLL_SECONDS)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+import argparse, getpass, os, sys
+from pathlib import Path
+from modules.backup_decrypt import WORKERS, DecryptError, decrypt_backup
+from modules.config import get_categories
+
+DECRYPT_SUFFIX = "__decrypted"
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--input', required=True, help='Encrypted backup directory')
+    p.add_argument('--out', help=f'Output directory (default: <input>{DECRYPT_SUFFIX})')
+    p.add_argument('--categories', nargs='*', help='Only decrypt domains of these config categories (e.g. messages locations)')
+    p.add_argument('--workers', type=int, default=WORKERS)
+    args = p.parse_args()
+    src = Path(args.input)
+    out = Path(args.out) if args.out else src.with_name(src.name + DECRYPT_SUFFIX)
+    keywords = None
+    if args.categories:
+        cats = get_categories()
+        unknown = [c for c in args.categories if c not in cats]
+        if unknown:
+            sys.exit(f"Unknown categories: {', '.join(unknown)} (known: {', '.join(cats)})")
+        keywords = {c: cats[c] for c in args.categories}
+    password = os.environ.get('MODIOS_BACKUP_PASSWORD') or getpass.getpass('Backup password: ')
+    progress = lambda done, total, msg: print(f"\r[*] {msg}", end='', file=sys.stderr, flush=True)
+    try:
+        stats = decrypt_backup(src, password, out, keywords, args.workers, progress)
+    except DecryptError as e:
+        sys.exit(f"[!] {e}")
+    print(file=sys.stderr)
+    print(f"[✓] {stats['files']} decrypted ({stats['bytes'] / 2**20:.1f} MiB), "
+          f"{stats['skipped']} already present, {stats['failed']} failed → {out}")
+    if stats['failed']:
+        print(f"[!] See {out / 'decrypt_errors.log'}", file=sys.stderr)
+if __name__ == '__main__':
+    main()
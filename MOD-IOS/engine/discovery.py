@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import argparse
+from collections import Counter
+from pathlib import Path
+from modules.file_discovery import discover, write_discovery
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--input', required=True)
+    p.add_argument('--session', required=True)
+    p.add_argument('--workers', type=int, default=8, help='Threads used to sniff magic bytes')
+    args = p.parse_args()
+    rows = discover(Path(args.input), workers=args.workers)
+    out = write_discovery(rows, Path(args.session))
+    counts = Counter(r[2] for r in rows)
+    print(f"[*] discovery: {len(rows)} files → {out}")
+    for kind, n in counts.most_common():
+        print(f"    {kind}: {n}")
+if __name__ == '__main__':
+    main()
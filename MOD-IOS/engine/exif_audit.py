@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+import argparse, shutil, sys
+from pathlib import Path
+from modules.exif_audit import BATCH_SIZE, WORKERS, extract, write_exif
+from modules.session_db import connect, session_db
+
+def main():
+    p = argparse.ArgumentParser(description='exiftool metadata of listed files into the exif table of session.sqlite')
+    p.add_argument('--list', required=True, help='NUL-separated file of paths (from discovery)')
+    p.add_argument('--session', required=True)
+    p.add_argument('--workers', type=int, default=WORKERS, help='exiftool processes')
+    p.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Files per exiftool call (one directory per call)')
+    args = p.parse_args()
+    executable = shutil.which('exiftool')
+    if executable is None:
+        sys.exit("[!] exiftool not found")
+    paths = [x for x in Path(args.list).read_text().split('\0') if x]
+    conn = connect(Path(args.session))
+    n = write_exif(conn, extract(paths, args.workers, args.batch_size, executable))
+    gps, errors = conn.execute("SELECT COUNT(latitude), COUNT(error) FROM exif").fetchone()
+    conn.close()
+    print(f"[*] exif_audit: {n} files → {session_db(args.session)} (table exif; {gps} with GPS, {errors} errors)")
+if __name__ == '__main__':
+    main()
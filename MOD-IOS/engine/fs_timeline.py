@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+import argparse
+from pathlib import Path
+from modules.fs_timeline import build_timeline
+from modules.session_db import connect, session_db
+
+def main():
+    p = argparse.ArgumentParser(description='Build fs_timeline from Manifest.db MBFile times and stat data')
+    p.add_argument('--input', required=True, help='Backup directory')
+    p.add_argument('--session', required=True)
+    p.add_argument('--no-stat', action='store_true', help='Manifest.db times only, skip the on-disk stat walk')
+    p.add_argument('--workers', type=int, default=None, help='MBFile decode processes (default: all cores)')
+    args = p.parse_args()
+    Path(args.session).mkdir(parents=True, exist_ok=True)
+    conn = connect(Path(args.session))
+    counts = build_timeline(conn, Path(args.input), include_stat=not args.no_stat, workers=args.workers)
+    conn.close()
+    print(f"[*] fs_timeline → {session_db(args.session)}")
+    for source, n in counts.items():
+        print(f"    {source}: {n}")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+import argparse, sqlite3
+from itertools import chain
+from pathlib import Path
+from modules.geo import build_clusters, exif_points, load_points, media_points, sqlite_points, write_map
+from modules.parse_decode_module import IOSBackupParser
+from modules.session_db import connect, session_db
+
+def backup_points(input_dir: Path):
+    """Rows from the backup's location databases (Cache.sqlite, consolidated.db, locations category)"""
+    parser = IOSBackupParser(input_dir)
+    if not parser.connect():
+        return
+    try:
+        databases = list(parser.iter_location_databases())
+    except sqlite3.DatabaseError:
+        return  # encrypted Manifest.db; media GPS still makes a map
+    finally:
+        parser.close()
+    for path, label in databases:
+        yield from sqlite_points(path, label)
+
+def main():
+    p = argparse.ArgumentParser(description='Load GPS points into session.sqlite, cluster them per zoom and write the map')
+    p.add_argument('--input', required=True, help='Backup directory')
+    p.add_argument('--session', required=True)
+    p.add_argument('--html', required=True, help='Map page to write')
+    p.add_argument('--layer', required=True, help='Binary cluster layer to write')
+    args = p.parse_args()
+    session = Path(args.session)
+    conn = connect(session)
+    n = load_points(conn, chain(media_points(conn), exif_points(conn), backup_points(Path(args.input))))
+    build_clusters(conn)
+    zooms = write_map(conn, Path(args.html), Path(args.layer), title=f"GPS map · {session.name}")
+    conn.close()
+    if not zooms:
+        print("INFO: [gps_map] No GPS data found – skipping map.")
+        return
+    print(f"INFO: [gps_map] {n} points in {session_db(session)} (geo_points/geo_clusters), "
+          f"zoom 0-{zooms[-1]} → {args.html}")
+if __name__ == '__main__':
+    main()
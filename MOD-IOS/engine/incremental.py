@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import argparse, sys
+from pathlib import Path
+from modules.config import load_registry
+from modules.file_discovery import load_discovery
+from modules.result_store import ResultStore, iter_files
+
+STORE_DIR = Path(__file__).resolve().parent.parent / 'reports' / '.store'
+
+def work_dir(session: Path) -> Path:
+    d = session / '.incremental'
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+def plan(store: ResultStore, entry: dict, input_dir: Path, session: Path) -> Path:
+    """Restore outputs for unchanged files; write the rest to a NUL-separated worklist"""
+    name = entry['name']
+    out_dir = session / entry['outdir']
+    out_dir.mkdir(parents=True, exist_ok=True)
+    todo = work_dir(session) / f'{name}.todo'
+    hashes = work_dir(session) / f'{name}.hashes'
+    reused = pending = 0
+    # Discovery's classified file list if this session has one; otherwise walk
+    files = load_discovery(session, entry.get('inputs', ['all']))
+    if files is None:
+        files = iter_files(input_dir)
+    with todo.open('w') as tf, hashes.open('w') as hf:
+        for path in files:
+            sha1 = store.content_hash(path)
+            if store.has(name, sha1):
+                store.restore(name, sha1, entry['outputs'], path, out_dir)
+                reused += 1
+            else:
+                tf.write(path + '\0')
+                hf.write(f'{sha1}\t{path}\n')
+                pending += 1
+    store.commit()
+    print(f'[*] {name}: {reused} reused, {pending} to process', file=sys.stderr)
+    return todo
+
+def record(store: ResultStore, entry: dict, session: Path):
+    """Store the outputs produced for every file on the worklist"""
+    name = entry['name']
+    out_dir = session / entry['outdir']
+    hashes = work_dir(session) / f'{name}.hashes'
+    if not hashes.exists():
+        return
+    with hashes.open() as hf:
+        for line in hf:
+            sha1, path = line.rstrip('\n').split('\t', 1)
+            store.record(name, sha1, entry['outputs'], path, out_dir, session=session.name)
+    store.commit()
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('action', choices=['plan', 'record'])
+    p.add_argument('--module', required=True)
+    p.add_argument('--session', required=True)
+    p.add_argument('--input')
+    p.add_argument('--store', default=str(STORE_DIR))
+    args = p.parse_args()
+    entry = load_registry().get(args.module.removesuffix('.sh'))
+    # Only modules that declare per-file outputs can be run incrementally
+    if not entry or 'outputs' not in entry:
+        return
+    store = ResultStore(args.store)
+    session = Path(args.session)
+    if args.action == 'plan':
+        print(plan(store, entry, Path(args.input), session))
+    else:
+        record(store, entry, session)
+    store.close()
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,5 @@
 #!/usr/bin/env python3
-import yaml, sys
-from pathlib import Path
+from modules.config import load_config
 
-cfg = yaml.safe_load(open(Path(__file__).parent.parent / 'config' / 'config.yaml'))
-modules = cfg.get('default', {}).get('modules', [])
-for m in modules:
+for m in load_config().get('modules', []):
     print(m)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+import argparse, os
+from pathlib import Path
+from modules.file_discovery import KIND_GROUPS, discover, load_discovery, write_discovery
+from modules.media_metadata import BATCH_SIZE, extract, write_media
+from modules.session_db import session_db
+
+def media_files(input_dir: Path, session: Path) -> list:
+    """(path, kind) for every image/video/audio file discovery classified"""
+    if load_discovery(session) is None:
+        write_discovery(discover(input_dir), session)
+    kinds = [k for group in ('image', 'video', 'audio') for k in KIND_GROUPS[group]]
+    return [(p, k) for k in kinds for p in load_discovery(session, [k])]
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--input', required=True)
+    p.add_argument('--session', required=True)
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='exiftool processes')
+    p.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Files per exiftool call')
+    p.add_argument('--full', action='store_true', help='Send every file to exiftool (all tags)')
+    p.add_argument('--no-exiftool', action='store_true', help='Native parsers only')
+    args = p.parse_args()
+    session = Path(args.session)
+    files = media_files(Path(args.input), session)
+    rows = extract(files, workers=args.workers, batch_size=args.batch_size,
+                   exiftool=None if args.no_exiftool else 'exiftool', full=args.full)
+    n = write_media(rows, session, args.batch_size)
+    print(f"[*] media_metadata: {n} files → {session_db(session)}")
+if __name__ == '__main__':
+    main()
@@ -1,50 +1,92 @@
 #!/usr/bin/env python3
+import argparse
 import sqlite3
 import pandas as pd
-from collections import defaultdict
 from pathlib import Path
+from modules.session_db import session_db
 
 DB_PATH = Path.home() / "MOD-IOS/DB/meta_analysis.db"
 REPORTS_DIR = Path.home() / "MOD-IOS/REPORTS"
-REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-
-def connect_db():
-    return sqlite3.connect(DB_PATH)
-
-def fetch_metadata(conn):
-    return pd.read_sql_query("SELECT filename, field, value FROM metadata", conn)
-
-def analyze_field_consistency(df):
-    report = []
-    total_files = df['filename'].nunique()
-    presence = df.groupby('field')['filename'].nunique()
-    for field, count in presence.items():
-        if count < total_files:
-            report.append({
-                'field': field,
-                'present_in': count,
-                'missing_from': total_files - count
-            })
-    return pd.DataFrame(report)
-
-def detect_differences(df):
-    diff = defaultdict(set)
-    for _, row in df.iterrows():
-        diff[row['field']].add(row['value'])
-    inconsistent = {k: v for k, v in diff.items() if len(v) > 1}
-    return pd.DataFrame([(k, list(v)) for k, v in inconsistent.items()], columns=["Field", "Values"])
-
-def save_report(df, filename):
-    out_path = REPORTS_DIR / filename
+MAX_VALUES = 20  # distinct values listed per conflicting field
+
+# (field, filename) serves COUNT(DISTINCT filename); (field, value) serves
+# COUNT(DISTINCT value) and the capped value listing
+INDEXES = """
+CREATE INDEX IF NOT EXISTS metadata_field_filename
+    ON metadata (field, filename);
+CREATE INDEX IF NOT EXISTS metadata_field_value ON metadata (field, value);
+"""
+
+
+def connect_db(path=DB_PATH):
+    return sqlite3.connect(path)
+
+
+def ensure_indexes(conn):
+    conn.executescript(INDEXES)
+    conn.execute("ANALYZE metadata")
+    conn.commit()
+
+
+def field_stats(conn):
+    """One aggregate pass: per field, files it appears in, distinct values"""
+    stats = pd.read_sql_query(
+        "SELECT field, COUNT(DISTINCT filename) AS present_in, "
+        "COUNT(DISTINCT value) AS distinct_values "
+        "FROM metadata GROUP BY field", conn)
+    total_files = conn.execute(
+        "SELECT COUNT(DISTINCT filename) FROM metadata").fetchone()[0]
+    return stats, total_files
+
+
+def analyze_field_consistency(stats, total_files):
+    report = stats.loc[stats['present_in'] < total_files,
+                       ['field', 'present_in']].copy()
+    report['missing_from'] = total_files - report['present_in']
+    return report.reset_index(drop=True)
+
+
+def detect_differences(conn, stats, max_values=MAX_VALUES):
+    rows = []
+    conflicting = stats.loc[stats['distinct_values'] > 1,
+                            ['field', 'distinct_values']]
+    for field, n in conflicting.itertuples(index=False):
+        # Index range scan, stops after max_values
+        values = [v for (v,) in conn.execute(
+            "SELECT DISTINCT value FROM metadata WHERE field = ? "
+            "ORDER BY value LIMIT ?", (field, max_values))]
+        rows.append((field, values, n, n > len(values)))
+    return pd.DataFrame(
+        rows, columns=["Field", "Values", "DistinctValues", "Truncated"])
+
+
+def save_report(df, filename, reports_dir=REPORTS_DIR):
+    out_path = Path(reports_dir) / filename
     df.to_csv(out_path, index=False)
     print(f"[✓] Saved: {out_path}")
 
+
 def main():
-    conn = connect_db()
-    df = fetch_metadata(conn)
-    save_report(analyze_field_consistency(df), "inconsistent_field_presence.csv")
-    save_report(detect_differences(df), "conflicting_field_values.csv")
-    print("[✓] Done. Reports in ~/MOD-IOS/REPORTS")
+    p = argparse.ArgumentParser()
+    p.add_argument('--db', default=str(DB_PATH))
+    p.add_argument('--session',
+                   help="Analyse the metadata table of this session's "
+                        "session.sqlite instead of --db")
+    p.add_argument('--out', default=str(REPORTS_DIR))
+    p.add_argument('--max-values', type=int, default=MAX_VALUES,
+                   help='Distinct values listed per field')
+    args = p.parse_args()
+    Path(args.out).mkdir(parents=True, exist_ok=True)
+    conn = connect_db(session_db(args.session) if args.session else args.db)
+    ensure_indexes(conn)
+    stats, total_files = field_stats(conn)
+    save_report(analyze_field_consistency(stats, total_files),
+                "inconsistent_field_presence.csv", args.out)
+    save_report(detect_differences(conn, stats, args.max_values),
+                "conflicting_field_values.csv", args.out)
+    conn.close()
+    print(f"[✓] Done. Reports in {args.out}")
+
 
 if __name__ == "__main__":
     main()
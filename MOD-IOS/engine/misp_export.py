@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import argparse, sys
+from pathlib import Path
+from modules.config import load_config
+from modules.misp_export import MispError, configured, run_export, settings
+from modules.session_db import connect
+
+def main():
+    p = argparse.ArgumentParser(description='Export carved indicators of session.sqlite to MISP in async batches')
+    p.add_argument('--session', required=True)
+    p.add_argument('--backid', help='Backup ID (event info and attribute comment)')
+    p.add_argument('--url', help='MISP base URL (default: misp.url in config.yaml)')
+    p.add_argument('--apikey', help='MISP API key (default: misp.apikey in config.yaml)')
+    p.add_argument('--event-id', help='Add to this event instead of creating one')
+    p.add_argument('--batch-size', type=int, help='Attributes per request')
+    p.add_argument('--concurrency', type=int, help='Pooled connections / requests in flight')
+    p.add_argument('--rate', type=float, help='Requests per second')
+    p.add_argument('--insecure', action='store_true', help='Skip TLS certificate verification')
+    args = p.parse_args()
+    opts = settings(load_config(), url=args.url, apikey=args.apikey, event_id=args.event_id,
+                    batch_size=args.batch_size, concurrency=args.concurrency, rate=args.rate,
+                    verify_ssl=False if args.insecure else None)
+    if not configured(opts):
+        print("[*] misp_export: MISP url/apikey not configured, skipping")
+        return
+    backid = args.backid or Path(args.session).name
+    conn = connect(Path(args.session))
+    try:
+        stats = run_export(conn, opts, f"MOD-iOS {backid}", comment=backid)
+    except MispError as e:
+        sys.exit(f"[!] misp_export: {e}")
+    finally:
+        conn.close()
+    for error in stats['errors']:
+        print(f"[!] misp_export: {error}", file=sys.stderr)
+    print(f"[*] misp_export: {stats['sent']} attributes → event {stats['event_id']} at {opts['url']}"
+          f" ({stats['failed']} failed)")
+    if stats['failed']:
+        sys.exit(1)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Anomaly Rules Module
+Config-declared timestamp rules evaluated over fs_timeline in chunks:
+row rules are vectorised per chunk, and rules that need table-wide context
+(clusters, bursts, gaps) get it from SQL aggregates first, so the table
+is never loaded whole. Timestamps are Unix seconds; 0/NULL means unset.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from .session_db import insert_rows
+
+TIMELINE_TABLE = "fs_timeline"
+ANOMALY_COLUMNS = ("rule", "row_id", "path", "column", "ts", "detail")
+CHUNK_ROWS = 100_000
+
+DEFAULT_RULES = [
+    {"name": "created_after_modified", "type": "inversion", "earlier": "crtime", "later": "mtime"},
+]
+
+
+def _seconds(series):
+    """Float seconds with unset (<= 0) values as NaN"""
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", copy=True)
+    values[values <= 0] = np.nan
+    return values
+
+
+class Rule(ABC):
+    """Base rule: ``columns`` it reads, optional ``prepare`` pass, per-chunk ``flag``"""
+
+    def __init__(self, name, reference=None, **params):
+        self.name = name
+        self.reference = reference
+        self.params = params
+
+    columns = ()
+
+    def prepare(self, conn, table):
+        pass
+
+    @abstractmethod
+    def flag(self, chunk):
+        """Yield (mask, column, ts array, detail) for one chunk"""
+
+
+class FutureRule(Rule):
+    """Timestamps after the reference (backup) date plus a tolerance"""
+
+    @property
+    def columns(self):
+        return tuple(self.params.get("columns", ("mtime", "atime", "ctime", "crtime")))
+
+    def flag(self, chunk):
+        if self.reference is None:
+            return
+        limit = self.reference + float(self.params.get("tolerance", 86400))
+        for col in self.columns:
+            ts = _seconds(chunk[col])
+            yield ts > limit, col, ts, f"{col} after reference date"
+
+
+class InversionRule(Rule):
+    """``later`` earlier than ``earlier`` (e.g. modified before created)"""
+
+    @property
+    def columns(self):
+        return (self.params["earlier"], self.params["later"])
+
+    def flag(self, chunk):
+        earlier, later = self.columns
+        a, b = _seconds(chunk[earlier]), _seconds(chunk[later])
+        slack = float(self.params.get("tolerance", 0))
+        yield b < a - slack, later, b, f"{later} < {earlier}"
+
+
+class ClusterRule(Rule):
+    """Many rows sharing one exact timestamp (mass copy, restore, tool wipe)"""
+
+    @property
+    def columns(self):
+        return (self.params.get("column", "mtime"),)
+
+    def prepare(self, conn, table):
+        col = self.columns[0]
+        self.counts = dict(conn.execute(
+            f'SELECT "{col}", COUNT(*) FROM "{table}" WHERE "{col}" > 0 '
+            f'GROUP BY "{col}" HAVING COUNT(*) >= ?',
+            (int(self.params.get("min_count", 50)),)))
+
+    def flag(self, chunk):
+        col = self.columns[0]
+        ts = _seconds(chunk[col])
+        if not self.counts:
+            return
+        keys = np.fromiter(self.counts, dtype="float64")
+        yield np.isin(ts, keys), col, ts, f"{col} shared by >= {self.params.get('min_count', 50)} rows"
+
+
+class OffHoursRule(Rule):
+    """Bursts of activity inside a nightly window (local hour via ``utc_offset``)"""
+
+    @property
+    def columns(self):
+        return (self.params.get("column", "mtime"),)
+
+    def _window(self):
+        p = self.params
+        return (int(p.get("start_hour", 0)), int(p.get("end_hour", 5)),
+                int(p.get("window", 600)), int(float(p.get("utc_offset", 0)) * 3600))
+
+    def _hour_sql(self, col, offset):
+        return f'((CAST("{col}" AS INTEGER) + {offset}) % 86400) / 3600'
+
+    def prepare(self, conn, table):
+        col = self.columns[0]
+        start, end, window, offset = self._window()
+        hour = self._hour_sql(col, offset)
+        inside = f"{hour} >= {start} AND {hour} < {end}" if start <= end else f"({hour} >= {start} OR {hour} < {end})"
+        self.buckets = [b for (b,) in conn.execute(
+            f'SELECT CAST("{col}" AS INTEGER) / {window} AS b FROM "{table}" '
+            f'WHERE "{col}" > 0 AND {inside} GROUP BY b HAVING COUNT(*) >= ?',
+            (int(self.params.get("min_count", 20)),))]
+
+    def flag(self, chunk):
+        if not self.buckets:
+            return
+        col = self.columns[0]
+        start, end, window, offset = self._window()
+        ts = _seconds(chunk[col])
+        hour = np.floor(((ts + offset) % 86400) / 3600)
+        inside = (hour >= start) & (hour < end) if start <= end else (hour >= start) | (hour < end)
+        bucket = np.floor(ts / window)
+        yield inside & np.isin(bucket, np.asarray(self.buckets, dtype="float64")), col, ts, \
+            f"{col} in off-hours burst ({start:02d}-{end:02d}h)"
+
+
+class GapRule(Rule):
+    """First activity after a silence of ``min_days`` or more before the reference date"""
+
+    @property
+    def columns(self):
+        return (self.params.get("column", "mtime"),)
+
+    def prepare(self, conn, table):
+        col = self.columns[0]
+        min_gap = float(self.params.get("min_days", 30)) * 86400
+        upper = "" if self.reference is None else f' AND "{col}" <= {float(self.reference)}'
+        self.gaps = dict(conn.execute(
+            f'SELECT ts, ts - prev FROM ('
+            f'  SELECT ts, LAG(ts) OVER (ORDER BY ts) AS prev FROM ('
+            f'    SELECT DISTINCT CAST("{col}" AS REAL) AS ts FROM "{table}" WHERE "{col}" > 0{upper}))'
+            f' WHERE ts - prev >= ?', (min_gap,)))
+
+    def flag(self, chunk):
+        if not self.gaps:
+            return
+        col = self.columns[0]
+        ts = _seconds(chunk[col])
+        mask = np.isin(ts, np.fromiter(self.gaps, dtype="float64"))
+        yield mask, col, ts, f"{col} follows a gap of >= {self.params.get('min_days', 30)} days"
+
+
+RULE_TYPES = {
+    "future": FutureRule,
+    "inversion": InversionRule,
+    "cluster": ClusterRule,
+    "off_hours": OffHoursRule,
+    "gap": GapRule,
+}
+
+
+def build_rules(specs, reference=None):
+    """Rule objects from config entries ({name, type, ...params}); raises ValueError on unknown types"""
+    rules = []
+    for spec in specs or DEFAULT_RULES:
+        spec = dict(spec)
+        kind = spec.pop("type")
+        if kind not in RULE_TYPES:
+            raise ValueError(f"Unknown anomaly rule type: {kind}")
+        rules.append(RULE_TYPES[kind](spec.pop("name", kind), reference=reference, **spec))
+    return rules
+
+
+def detect(conn, rules, table=TIMELINE_TABLE, chunk_rows=CHUNK_ROWS):
+    """Evaluate ``rules`` over ``table`` and (re)write the anomalies table; returns {rule: count}"""
+    available = {r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')}
+    usable = [r for r in rules if set(r.columns) <= available]
+    for r in usable:
+        r.prepare(conn, table)
+    columns = sorted({c for r in usable for c in r.columns})
+    path_col = "path" if "path" in available else None
+    select = ", ".join(f'"{c}"' for c in ([path_col] if path_col else []) + columns)
+
+    counts = {r.name: 0 for r in usable}
+    with conn:
+        conn.execute("DELETE FROM anomalies")
+    if usable:
+        reader = conn.cursor()
+        reader.execute(f'SELECT rowid, {select} FROM "{table}"')
+        names = ["row_id"] + ([path_col] if path_col else []) + columns
+        while True:
+            rows = reader.fetchmany(chunk_rows)
+            if not rows:
+                break
+            chunk = pd.DataFrame.from_records(rows, columns=names)
+            row_ids = chunk["row_id"].to_numpy()
+            paths = chunk[path_col].to_numpy(dtype=object) if path_col else None
+            hits = []
+            for rule in usable:
+                for mask, col, ts, detail in rule.flag(chunk):
+                    idx = np.flatnonzero(mask)
+                    if not len(idx):
+                        continue
+                    hits.extend(zip([rule.name] * len(idx), row_ids[idx].tolist(),
+                                    paths[idx].tolist() if paths is not None else [None] * len(idx),
+                                    [col] * len(idx), ts[idx].tolist(), [detail] * len(idx)))
+                    counts[rule.name] += len(idx)
+            if hits:
+                with conn:  # one short write per chunk
+                    insert_rows(conn, "anomalies", ANOMALY_COLUMNS, hits)
+    return counts
+
+
+def export_csv(conn, path, chunk_rows=CHUNK_ROWS):
+    """Write the anomalies table to CSV in chunks"""
+    first = True
+    for chunk in pd.read_sql('SELECT rule, row_id, path, "column", ts, detail FROM anomalies ORDER BY rule, ts',
+                             conn, chunksize=chunk_rows):
+        chunk.to_csv(path, mode="w" if first else "a", header=first, index=False)
+        first = False
+    if first:
+        pd.DataFrame(columns=["rule", "row_id", "path", "column", "ts", "detail"]).to_csv(path, index=False)
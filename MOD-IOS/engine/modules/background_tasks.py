@@ -0,0 +1,77 @@
+"""
+Background Tasks Module
+Small keyed thread-pool runner for long scans started from the dashboard;
+tasks report progress that the UI polls instead of blocking on them
+"""
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """State of one background job; ``update`` is handed to the job as its progress callback"""
+
+    def __init__(self, key):
+        self.key = key
+        self.status = "running"
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+
+    def update(self, done, total=None, message=None):
+        self.progress = min(1.0, done / total) if total else float(done)
+        if message is not None:
+            self.message = message
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+
+class TaskRunner:
+    """Runs at most one task per key at a time on a shared pool"""
+
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="modios-bg")
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Start ``fn(*args, progress=task.update, **kwargs)`` unless ``key`` is already running"""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and task.running:
+                return task
+            task = Task(key)
+            self._tasks[key] = task
+        self._pool.submit(self._run, task, fn, args, kwargs)
+        return task
+
+    @staticmethod
+    def _run(task, fn, args, kwargs):
+        try:
+            task.result = fn(*args, progress=task.update, **kwargs)
+            task.progress = 1.0
+            task.status = "done"
+        except Exception as e:
+            task.error = f"{e}\n{traceback.format_exc()}"
+            task.status = "error"
+        finally:
+            task.finished = time.time()
+
+    def get(self, key):
+        return self._tasks.get(key)
+
+    def discard(self, key):
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and not task.running:
+                del self._tasks[key]
+
+    def any_running(self, prefix=""):
+        return any(t.running for k, t in list(self._tasks.items()) if str(k).startswith(prefix))
@@ -0,0 +1,32 @@
+"""
+Backup Cache Module
+Per-backup working directory keyed by the Manifest.db content hash
+"""
+
+import hashlib
+from pathlib import Path
+
+CACHE_ROOT = Path(__file__).resolve().parent.parent.parent / "cache"
+
+_digests = {}
+
+
+def manifest_digest(manifest_db):
+    """SHA-1 of Manifest.db, memoised on (path, size, mtime)"""
+    manifest_db = Path(manifest_db)
+    st = manifest_db.stat()
+    key = (str(manifest_db.resolve()), st.st_size, st.st_mtime_ns)
+    if key not in _digests:
+        h = hashlib.sha1()
+        with open(manifest_db, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        _digests[key] = h.hexdigest()
+    return _digests[key]
+
+
+def backup_cache_dir(manifest_db, root=None):
+    """Return (and create) the cache directory for a backup's Manifest.db"""
+    path = Path(root or CACHE_ROOT) / manifest_digest(manifest_db)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
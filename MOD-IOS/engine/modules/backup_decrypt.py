@@ -0,0 +1,194 @@
+"""
+Backup Decrypt Module
+In-process decryption of encrypted backups driven by the Manifest.db Files
+table: the keybag is unlocked once, files are decrypted in fixed-size chunks
+on a thread pool (optionally only for selected domains), and progress is
+reported from real file and byte counts. The output mirrors the hashed
+backup layout with a plaintext Manifest.db, so it reads like an
+unencrypted backup.
+"""
+
+import os
+import plistlib
+import shutil
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .domain_classifier import KeywordMatcher
+from .mbfile import MBFileError, decode_mbfile
+
+CHUNK = 1 << 20       # ciphertext read per step; a multiple of the AES block
+WORKERS = 4
+COPIED_FILES = ("Info.plist", "Status.plist")
+BLOCK = 16
+
+
+class DecryptError(RuntimeError):
+    pass
+
+
+def unlock(backup_dir, password, manifest_out):
+    """Unlock the keybag and write the decrypted Manifest.db; returns the keybag
+
+    Key derivation and unwrapping come from iphone_backup_decrypt; file data
+    is decrypted here so it can be streamed and parallelised.
+    """
+    try:
+        from iphone_backup_decrypt import EncryptedBackup
+    except ImportError:
+        raise DecryptError("iphone_backup_decrypt is not installed. Install with: pip install iphone_backup_decrypt")
+    backup = EncryptedBackup(backup_directory=str(backup_dir), passphrase=password)
+    try:
+        backup.test_decryption()
+    except Exception as e:
+        raise DecryptError(f"Could not unlock backup (wrong password?): {e}")
+    Path(manifest_out).parent.mkdir(parents=True, exist_ok=True)
+    backup.save_manifest_file(str(manifest_out))
+    return backup._keybag
+
+
+def _cipher(key):
+    from Crypto.Cipher import AES  # pycryptodome, installed with iphone_backup_decrypt
+    return AES.new(key, AES.MODE_CBC, b"\x00" * BLOCK)
+
+
+def iter_plan(manifest_db, keywords=None):
+    """Yield (fileID, domain, relativePath, record) for files to decrypt
+
+    ``keywords`` ({label: [keyword]}, as in config categories) limits the plan
+    to domains matching any keyword. Streams from Manifest.db, so callers
+    that need totals make a separate pass instead of holding every record.
+    """
+    matcher = KeywordMatcher(keywords) if keywords else None
+    matched = {}
+    conn = sqlite3.connect(f"{Path(manifest_db).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        for fid, domain, rel, blob in conn.execute(
+                "SELECT fileID, domain, relativePath, file FROM Files WHERE flags = 1"):
+            if matcher is not None:
+                hit = matched.get(domain)
+                if hit is None:
+                    hit = matched[domain] = bool(matcher.match(domain))
+                if not hit:
+                    continue
+            try:
+                record = decode_mbfile(blob)
+            except MBFileError:
+                continue
+            yield fid, domain, rel, record
+    finally:
+        conn.close()
+
+
+def measure(manifest_db, keywords=None):
+    """(files, plaintext bytes) the plan covers"""
+    files = size = 0
+    for *_, record in iter_plan(manifest_db, keywords):
+        files += 1
+        size += record.Size or 0
+    return files, size
+
+
+def decrypt_file(keybag, src, dest, record):
+    """Decrypt one backup file to ``dest`` in CHUNK steps; returns plaintext bytes written"""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".part")
+    if not record.EncryptionKey:
+        # Empty files carry no key
+        tmp.write_bytes(b"")
+        os.replace(tmp, dest)
+        return 0
+    key = keybag.unwrapKeyForClass(record.ProtectionClass, record.EncryptionKey[4:])
+    cipher = _cipher(key)
+    remaining = record.Size
+    written = 0
+    with open(src, "rb") as fin, open(tmp, "wb") as fout:
+        chunk = fin.read(CHUNK)
+        while chunk:
+            nxt = fin.read(CHUNK)
+            data = cipher.decrypt(chunk[:len(chunk) - len(chunk) % BLOCK])
+            if remaining is not None:
+                data = data[:remaining]
+                remaining -= len(data)
+            elif not nxt and data:
+                data = data[:-data[-1]] if 0 < data[-1] <= BLOCK else data  # PKCS#7
+            fout.write(data)
+            written += len(data)
+            chunk = nxt
+    os.replace(tmp, dest)
+    return written
+
+
+def _copy_metadata(backup_dir, out_dir):
+    for name in COPIED_FILES:
+        if (backup_dir / name).exists():
+            shutil.copy2(backup_dir / name, out_dir / name)
+    manifest_plist = backup_dir / "Manifest.plist"
+    if manifest_plist.exists():
+        with open(manifest_plist, "rb") as fh:
+            m = plistlib.load(fh)
+        # The mirror holds plaintext; readers should not treat it as encrypted
+        m["IsEncrypted"] = False
+        m.pop("BackupKeyBag", None)
+        m.pop("ManifestKey", None)
+        with open(out_dir / "Manifest.plist", "wb") as fh:
+            plistlib.dump(m, fh, fmt=plistlib.FMT_BINARY)
+
+
+def decrypt_backup(backup_dir, password, out_dir, keywords=None, workers=WORKERS, progress=None):
+    """Decrypt ``backup_dir`` into ``out_dir`` (hashed layout plus plaintext Manifest.db)
+
+    ``keywords`` restricts decryption to matching domains; files already
+    decrypted at their full size are skipped, so a later, wider run only adds
+    what is missing. Returns {files, bytes, skipped, failed, errors}.
+    """
+    backup_dir, out_dir = Path(backup_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    keybag = unlock(backup_dir, password, out_dir / "Manifest.db")
+    _copy_metadata(backup_dir, out_dir)
+    total_files, total_bytes = measure(out_dir / "Manifest.db", keywords)
+    stats = {"files": 0, "bytes": 0, "skipped": 0, "failed": 0, "errors": []}
+    done_bytes = 0
+
+    def job(fid, record):
+        src = backup_dir / fid[:2] / fid
+        dest = out_dir / fid[:2] / fid
+        if dest.exists() and record.Size is not None and dest.stat().st_size == record.Size:
+            return "skipped", record.Size
+        if not src.exists():
+            raise FileNotFoundError(src)
+        return "files", decrypt_file(keybag, src, dest, record)
+
+    # At most workers * 4 files in flight; each holds two CHUNK buffers
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+
+        def settle():
+            nonlocal done_bytes
+            fid, record, fut = pending.popleft()
+            try:
+                outcome, size = fut.result()
+                stats[outcome] += 1
+                if outcome == "files":
+                    stats["bytes"] += size
+            except Exception as e:
+                stats["failed"] += 1
+                stats["errors"].append(f"{fid}: {e}")
+            done_bytes += record.Size or 0
+            if progress:
+                n = stats["files"] + stats["skipped"] + stats["failed"]
+                progress(done_bytes, total_bytes, f"{n:,}/{total_files:,} files · "
+                                                  f"{done_bytes / 2**20:,.0f}/{total_bytes / 2**20:,.0f} MiB")
+
+        for fid, _, _, record in iter_plan(out_dir / "Manifest.db", keywords):
+            pending.append((fid, record, pool.submit(job, fid, record)))
+            if len(pending) >= workers * 4:
+                settle()
+        while pending:
+            settle()
+    if stats["errors"]:
+        (out_dir / "decrypt_errors.log").write_text("\n".join(stats["errors"]) + "\n")
+    return stats
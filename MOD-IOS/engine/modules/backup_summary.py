@@ -0,0 +1,147 @@
+"""
+Backup Summary Module
+Persistent per-backup summary (device info, encryption, file count, size)
+stored under cache/summaries and reused until the backup's top-level
+mtimes change, so callers don't re-read plists or re-walk the backup
+"""
+
+import hashlib
+import json
+import os
+import plistlib
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .backup_cache import CACHE_ROOT
+
+SUMMARY_VERSION = 1
+# Files whose mtimes (with the directory's own) decide whether a summary is stale
+FINGERPRINT_FILES = ("Manifest.db", "Manifest.plist", "Info.plist", "Status.plist")
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def backup_fingerprint(backup_path):
+    """Cheap change detector: mtimes of the backup dir and its top-level plists/db"""
+    backup_path = Path(backup_path)
+    return [_mtime_ns(backup_path)] + [_mtime_ns(backup_path / name) for name in FINGERPRINT_FILES]
+
+
+_write_lock = threading.Lock()
+
+
+def cache_file(backup_path, folder, root=None):
+    """cache/<folder>/<sha1 of the backup path>.json"""
+    key = hashlib.sha1(str(Path(backup_path).resolve()).encode()).hexdigest()
+    return Path(root or CACHE_ROOT) / folder / f"{key}.json"
+
+
+def write_json_atomic(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _write_lock:
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps(data, indent=2))
+        os.replace(tmp, path)
+
+
+def summary_path(backup_path, root=None):
+    return cache_file(backup_path, "summaries", root)
+
+
+def _load_plist(path):
+    try:
+        with open(path, "rb") as fh:
+            return plistlib.load(fh)
+    except Exception:
+        return None
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def plist_info(backup_path):
+    """Device/encryption fields from Info.plist and Manifest.plist"""
+    backup_path = Path(backup_path)
+    info = {"device_name": None, "ios_version": None, "serial_number": None,
+            "backup_date": None, "encrypted": None}
+    m = _load_plist(backup_path / "Manifest.plist")
+    if isinstance(m, dict):
+        enc = m.get("IsEncrypted")
+        if enc is None:
+            enc = True if m.get("BackupKeyBag") else m.get("WasPasscodeSet")
+        info["encrypted"] = bool(enc) if enc is not None else None
+    i = _load_plist(backup_path / "Info.plist")
+    if isinstance(i, dict):
+        info["device_name"] = i.get("Device Name") or i.get("Display Name")
+        info["ios_version"] = i.get("Product Version")
+        info["serial_number"] = i.get("Serial Number")
+        info["backup_date"] = _jsonable(i.get("Last Backup Date"))
+    return info
+
+
+def disk_usage(backup_path, progress=None):
+    """(files, bytes) under ``backup_path`` via scandir; ``progress(done, total)`` per top-level entry"""
+    with os.scandir(backup_path) as it:
+        top = list(it)
+    files = total = 0
+    for n, entry in enumerate(top, 1):
+        stack = [entry]
+        while stack:
+            e = stack.pop()
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    with os.scandir(e.path) as it:
+                        stack.extend(it)
+                elif e.is_file(follow_symlinks=False):
+                    files += 1
+                    total += e.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+        if progress:
+            progress(n, len(top))
+    return files, total
+
+
+def load_summary(backup_path, root=None):
+    """Stored summary if it is still current, else None"""
+    path = summary_path(backup_path, root)
+    try:
+        with open(path) as fh:
+            summary = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if summary.get("version") != SUMMARY_VERSION or summary.get("fingerprint") != backup_fingerprint(backup_path):
+        return None
+    return summary
+
+
+def build_summary(backup_path, progress=None, root=None):
+    """Compute, store and return a backup's summary (walks the whole backup once)"""
+    backup_path = Path(backup_path)
+    fingerprint = backup_fingerprint(backup_path)
+    files, total = disk_usage(backup_path, progress)
+    summary = {
+        "version": SUMMARY_VERSION,
+        "path": str(backup_path),
+        "fingerprint": fingerprint,
+        "computed_at": datetime.now().isoformat(timespec="seconds"),
+        "manifest_exists": (backup_path / "Manifest.db").exists(),
+        "file_count": files,
+        "total_bytes": total,
+        **plist_info(backup_path),
+    }
+    write_json_atomic(summary_path(backup_path, root), summary)
+    return summary
+
+
+def get_summary(backup_path, progress=None, root=None):
+    """Stored summary, rebuilt first if missing or stale"""
+    return load_summary(backup_path, root) or build_summary(backup_path, progress, root)
@@ -0,0 +1,122 @@
+"""
+Blob Decoder Module
+Streams Files.file plist blobs out of Manifest.db and decodes them
+in batches across a process pool, yielding records in query order
+"""
+
+import json
+import os
+import plistlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from .mbfile import EMPTY_RECORD, MBFILE_COLUMNS, MBFileError, decode_mbfile, mbfile_to_dict
+from .timestamps import normalize_timestamps
+
+BATCH_SIZE = 500
+RECORD_FIELDS = ('fileID', 'domain', 'relativePath', 'flags')
+MANIFEST_COLUMNS = RECORD_FIELDS + MBFILE_COLUMNS
+
+
+def safe_serialize(obj):
+    if isinstance(obj, bytes):
+        return obj.hex()
+    if isinstance(obj, (plistlib.UID,)):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return str(obj)
+    if isinstance(obj, dict):
+        return {k: safe_serialize(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [safe_serialize(v) for v in obj]
+    return obj
+
+
+def decode_blob(blob):
+    """Decode one plist blob into a JSON-safe structure (MBFile fast path first)"""
+    try:
+        return mbfile_to_dict(decode_mbfile(blob))
+    except MBFileError:
+        pass
+    try:
+        plist_data = plistlib.loads(blob)
+        plist_data = normalize_timestamps(plist_data)
+        return safe_serialize(plist_data)
+    except Exception as e:
+        return f"Failed to decode: {e}"
+
+
+def decode_batch(rows):
+    """Decode a batch of (fileID, domain, relativePath, flags, file) rows"""
+    decoded = []
+    for *fields, blob in rows:
+        record = dict(zip(RECORD_FIELDS, fields))
+        record['decoded'] = decode_blob(blob)
+        decoded.append(record)
+    return decoded
+
+
+def decode_record_batch(rows):
+    """Decode a batch of Files rows into flat MANIFEST_COLUMNS tuples"""
+    decoded = []
+    for *fields, blob in rows:
+        try:
+            record = decode_mbfile(blob)
+        except MBFileError:
+            record = EMPTY_RECORD
+        decoded.append((*fields, *record))
+    return decoded
+
+
+def iter_batches(conn, query, params=(), batch_size=BATCH_SIZE):
+    """Yield lists of rows from ``query`` using fetchmany"""
+    cur = conn.cursor()
+    cur.execute(query, params)
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+def iter_decoded(conn, query, params=(), batch_size=BATCH_SIZE, workers=None, max_pending=None,
+                 decoder=decode_batch):
+    """
+    Yield decoded records for ``query`` (which must select fileID, domain,
+    relativePath, flags, file) in order. At most ``max_pending`` batches are
+    in flight, so memory stays bounded regardless of result size.
+    ``decoder`` must be a module-level function taking a list of rows.
+    """
+    workers = workers or os.cpu_count() or 1
+    batches = iter_batches(conn, query, params, batch_size)
+    if workers == 1:
+        for rows in batches:
+            yield from decoder(rows)
+        return
+
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for rows in batches:
+            pending.append(pool.submit(decoder, rows))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_records_json(records, path):
+    """Stream records to ``path`` as an indented JSON array; returns the count"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write('[')
+        for record in records:
+            fh.write(',\n' if count else '\n')
+            fh.write(json.dumps(record, indent=2, default=str))
+            count += 1
+        fh.write('\n]\n' if count else ']\n')
+    return count
@@ -0,0 +1,215 @@
+"""
+Carving Module
+Deduplicates carver inputs by content hash, packs small files into a few
+concatenated images with an offset map, runs foremost / bulk_extractor on
+the shards in parallel and merges their findings into one feature table
+"""
+
+import bisect
+import hashlib
+import math
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .session_db import bulk_load, connect, insert_rows, write_chunks
+
+SHARD_BYTES = 256 << 20        # upper bound for one packed image
+SMALL_FILE = 16 << 20          # larger files are carved in place, not packed
+ALIGN = 4096                   # members start on a page/sector boundary
+
+FEATURE_COLUMNS = ("tool", "feature", "value", "context", "sha1", "offset", "shard", "shard_offset")
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dedupe(paths, workers=None):
+    """{sha1: (size, [paths])} for every readable, non-empty file"""
+    by_size = {}
+    for p in dict.fromkeys(paths):
+        try:
+            by_size.setdefault(os.path.getsize(p), []).append(p)
+        except OSError:
+            continue
+    flat = [(size, p) for size, group in by_size.items() if size for p in group]
+    unique = {}
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for (size, path), digest in zip(flat, pool.map(lambda sp: file_sha1(sp[1]), flat)):
+            unique.setdefault(digest, (size, []))[1].append(path)
+    return unique
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def plan_shards(unique, workers, shard_bytes=SHARD_BYTES, small_file=SMALL_FILE):
+    """Split unique blobs into shards: [(name, [(offset, size, sha1, source path)])]
+
+    Small blobs are packed at ALIGN-ed offsets; each large blob is its own shard."""
+    small = sorted((s, d, ps[0]) for d, (s, ps) in unique.items() if s <= small_file)
+    large = [(s, d, ps[0]) for d, (s, ps) in unique.items() if s > small_file]
+    total = sum(_aligned(s) for s, _, _ in small)
+    # Enough shards to keep every worker busy, none bigger than shard_bytes
+    per_shard = min(shard_bytes, max(ALIGN, math.ceil(total / max(1, workers))))
+    shards, members, offset = [], [], 0
+    for size, digest, path in small:
+        if members and offset + _aligned(size) > per_shard:
+            shards.append((f"pack_{len(shards):04d}", members))
+            members, offset = [], 0
+        members.append((offset, size, digest, path))
+        offset += _aligned(size)
+    if members:
+        shards.append((f"pack_{len(shards):04d}", members))
+    for size, digest, path in large:
+        shards.append((f"file_{digest[:12]}", [(0, size, digest, path)]))
+    return shards
+
+
+def write_pack(members, image):
+    """Concatenate members into ``image``, zero-padding each to its next offset"""
+    with open(image, "wb") as out:
+        for offset, size, _, path in members:
+            out.seek(offset)
+            with open(path, "rb") as fh:
+                shutil.copyfileobj(fh, out, 1 << 20)
+        last = members[-1]
+        out.truncate(_aligned(last[0] + last[1]))
+
+
+class OffsetMap:
+    """Resolves a byte offset in a shard to (sha1, offset within that blob)"""
+
+    def __init__(self, shards):
+        self._starts = {}
+        self._members = {}
+        for name, members in shards:
+            self._starts[name] = [m[0] for m in members]
+            self._members[name] = members
+
+    def resolve(self, shard, offset):
+        starts = self._starts.get(shard)
+        if not starts:
+            return None, None
+        i = bisect.bisect_right(starts, offset) - 1
+        if i < 0:
+            return None, None
+        start, size, digest, _ = self._members[shard][i]
+        if offset >= start + size:
+            return None, None          # lands in alignment padding
+        return digest, offset - start
+
+
+_LEADING_INT = re.compile(r"\d+")
+_FOREMOST_LINE = re.compile(r"^\s*\d+:\s+(\S+)\s+(\d+\s*[KMGT]?B)\s+(\d+)")
+
+
+def bulk_extractor_command(image, outdir):
+    return ["bulk_extractor", "-j", "1", "-o", str(outdir), str(image)]
+
+
+def foremost_command(image, outdir):
+    return ["foremost", "-Q", "-i", str(image), "-o", str(outdir)]
+
+
+def bulk_extractor_features(outdir):
+    """Yield (feature, value, context, shard offset) from bulk_extractor feature files"""
+    for f in sorted(Path(outdir).glob("*.txt")):
+        if f.name.endswith("_histogram.txt") or f.name == "report.txt":
+            continue
+        with open(f, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                if line.startswith("#") or "\t" not in line:
+                    continue
+                parts = line.rstrip("\n").split("\t")
+                m = _LEADING_INT.match(parts[0])
+                if not m:
+                    continue
+                # Forensic paths ("1234-GZIP-56") resolve to the containing offset
+                yield f.stem, parts[1], parts[2] if len(parts) > 2 else None, int(m.group())
+
+
+def foremost_features(outdir):
+    """Yield (file type, carved file, size, shard offset) from foremost's audit.txt"""
+    audit = Path(outdir) / "audit.txt"
+    if not audit.exists():
+        return
+    with open(audit, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            m = _FOREMOST_LINE.match(line)
+            if m:
+                name, size, offset = m.groups()
+                ext = name.rsplit(".", 1)[-1]
+                yield ext, f"{ext}/{name}", size, int(offset)
+
+
+TOOLS = {
+    "bulk_extractor": (bulk_extractor_command, bulk_extractor_features),
+    "foremost": (foremost_command, foremost_features),
+}
+
+
+def carve_shard(tool, name, members, work_dir, out_dir):
+    """Pack (if needed) and carve one shard; returns (name, returncode)"""
+    command, _ = TOOLS[tool]
+    if name.startswith("pack_"):
+        image = Path(work_dir) / f"{name}.img"
+        write_pack(members, image)
+    else:
+        image = members[0][3]
+    outdir = Path(out_dir) / name
+    if outdir.exists():
+        shutil.rmtree(outdir)
+    try:
+        rc = subprocess.call(command(image, outdir), stdout=subprocess.DEVNULL)
+    except OSError:
+        rc = 127
+    finally:
+        if name.startswith("pack_"):
+            os.unlink(image)
+    return name, rc
+
+
+def carve(tool, paths, out_dir, session, workers=None, shard_bytes=SHARD_BYTES):
+    """Dedupe, shard, carve and merge; returns (unique blobs, shards, features, failed shards)"""
+    workers = max(1, workers or os.cpu_count() or 1)
+    out_dir = Path(out_dir)
+    work_dir = out_dir / ".images"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    unique = dedupe(paths, workers)
+    shards = plan_shards(unique, workers, shard_bytes)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda s: carve_shard(tool, s[0], s[1], work_dir, out_dir), shards))
+    shutil.rmtree(work_dir, ignore_errors=True)
+    failed = [name for name, rc in results if rc != 0]
+
+    offsets = OffsetMap(shards)
+    _, features = TOOLS[tool]
+
+    def feature_rows():
+        for name, _ in shards:
+            for feature, value, context, shard_offset in features(out_dir / name):
+                digest, offset = offsets.resolve(name, shard_offset)
+                yield tool, feature, value, context, digest, offset, name, shard_offset
+
+    conn = connect(session)
+    with bulk_load(conn, "carved_features"):
+        insert_rows(conn, "carve_sources", ("sha1", "path"),
+                    ((d, p) for d, (_, ps) in unique.items() for p in ps), verb="INSERT OR IGNORE")
+        insert_rows(conn, "carve_map", ("shard", "offset", "length", "sha1"),
+                    ((name, o, s, d) for name, members in shards for o, s, d, _ in members),
+                    verb="INSERT OR REPLACE")
+        conn.execute("DELETE FROM carved_features WHERE tool = ?", (tool,))
+    # Feature files are parsed between commits, not under the write lock
+    count = write_chunks(conn, "carved_features", FEATURE_COLUMNS, feature_rows())
+    conn.close()
+    return len(unique), len(shards), count, failed
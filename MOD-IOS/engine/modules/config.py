@@ -0,0 +1,34 @@
+"""
+Configuration Module
+Loads config/config.yaml and plugin_registry.json for the engine components
+"""
+
+import json
+from pathlib import Path
+
+import yaml
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent.parent / "config" / "config.yaml"
+REGISTRY_PATH = Path(__file__).resolve().parent.parent / "plugin_registry.json"
+
+
+def load_config(path=None):
+    """Return the ``default`` profile from config.yaml"""
+    with open(path or CONFIG_PATH) as fh:
+        cfg = yaml.safe_load(fh) or {}
+    return cfg.get("default", {}) or {}
+
+
+def get_categories(cfg=None):
+    """Return {category: [keyword, ...]} with lower-cased keywords"""
+    if cfg is None:
+        cfg = load_config()
+    categories = cfg.get("categories", {}) or {}
+    return {name: [str(kw).lower() for kw in keywords] for name, keywords in categories.items()}
+
+
+def load_registry(path=None):
+    """Return {module name: registry entry} from plugin_registry.json"""
+    with open(path or REGISTRY_PATH) as fh:
+        entries = json.load(fh).get("modules", [])
+    return {entry["name"]: entry for entry in entries}
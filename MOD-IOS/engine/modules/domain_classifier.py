@@ -0,0 +1,126 @@
+"""
+Domain Classifier Module
+Tags every Manifest.db Files row with the categories its domain matches,
+in a single pass, and stores the tags in an indexed side table
+"""
+
+import hashlib
+import json
+from collections import deque
+
+BATCH_SIZE = 10000
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {schema}.file_categories (
+    category TEXT NOT NULL,
+    fileID   TEXT NOT NULL,
+    PRIMARY KEY (category, fileID)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS {schema}.classifier_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton reporting every label whose keyword occurs in a text"""
+
+    def __init__(self, keywords_by_label):
+        self._goto = [{}]
+        self._fail = [0]
+        outputs = [set()]
+        for label, keywords in keywords_by_label.items():
+            for kw in keywords:
+                if not kw:
+                    continue
+                state = 0
+                for ch in kw.lower():
+                    nxt = self._goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[state][ch] = nxt
+                        self._goto.append({})
+                        self._fail.append(0)
+                        outputs.append(set())
+                    state = nxt
+                outputs[state].add(label)
+
+        # Breadth-first pass for failure links; outputs inherit along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                outputs[nxt] |= outputs[self._fail[nxt]]
+        self._out = [frozenset(o) for o in outputs]
+
+    def match(self, text):
+        """Return the set of labels matched anywhere in ``text`` (case-insensitive)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in (text or "").lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+def categories_signature(categories):
+    """Stable fingerprint of a category/keyword mapping"""
+    payload = json.dumps({k: sorted(v) for k, v in categories.items()}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def build_category_index(conn, categories, schema="main", rebuild=False):
+    """
+    Classify Files(domain) once and store (category, fileID) pairs in
+    ``schema``.file_categories. Skipped when the stored keyword signature
+    already matches. Returns the number of tags written (0 if reused).
+    """
+    conn.executescript(INDEX_SCHEMA.format(schema=schema))
+    signature = categories_signature(categories)
+    row = conn.execute(
+        f"SELECT value FROM {schema}.classifier_meta WHERE key = 'signature'"
+    ).fetchone()
+    if row and row[0] == signature and not rebuild:
+        return 0
+
+    matcher = KeywordMatcher(categories)
+    labels_for = {}
+    written = 0
+    with conn:
+        conn.execute(f"DROP INDEX IF EXISTS {schema}.file_categories_fileID")
+        conn.execute(f"DELETE FROM {schema}.file_categories")
+        # Opened after the DROP: SQLite refuses it while a read is in progress
+        read_cur = conn.cursor()
+        read_cur.execute("SELECT fileID, domain FROM Files")
+        insert = f"INSERT OR IGNORE INTO {schema}.file_categories (category, fileID) VALUES (?, ?)"
+        while True:
+            rows = read_cur.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            tags = []
+            for file_id, domain in rows:
+                labels = labels_for.get(domain)
+                if labels is None:
+                    labels = labels_for[domain] = matcher.match(domain)
+                tags.extend((label, file_id) for label in labels)
+            conn.executemany(insert, tags)
+            written += len(tags)
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {schema}.file_categories_fileID "
+            f"ON file_categories (fileID)"
+        )
+        conn.execute(
+            f"INSERT OR REPLACE INTO {schema}.classifier_meta (key, value) VALUES ('signature', ?)",
+            (signature,),
+        )
+    return written
@@ -0,0 +1,127 @@
+"""
+Exif Audit Module
+exiftool metadata for discovered images and videos, sharded by directory
+across a pool of ``exiftool -stay_open`` processes and streamed into the
+session's exif table: typed, indexed columns for camera, timestamps, GPS,
+software and dimensions, with the full tag set kept as JSON
+"""
+
+import json
+import os
+import re
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .media_metadata import ExifToolPool
+from .session_db import insert_rows
+
+BATCH_SIZE = 200
+WORKERS = 4
+
+# Column order of the exif table (see session_db)
+EXIF_COLUMNS = ("path", "directory", "file_type", "mime_type", "make", "model", "lens", "software",
+                "date_original", "create_date", "modify_date", "time_offset", "latitude", "longitude",
+                "altitude", "width", "height", "orientation", "duration", "tags", "error")
+
+_DATE = re.compile(r"(\d{4}):(\d{2}):(\d{2})[ T](\d{2}:\d{2}:\d{2}(?:\.\d+)?)(Z|[+-]\d{2}:\d{2})?")
+
+
+def shards(paths, batch_size=BATCH_SIZE):
+    """Batches of at most ``batch_size`` paths, each from a single directory"""
+    by_dir = defaultdict(list)
+    for path in paths:
+        by_dir[os.path.dirname(path)].append(path)
+    for directory in sorted(by_dir):
+        files = by_dir[directory]
+        for i in range(0, len(files), batch_size):
+            yield files[i:i + batch_size]
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _text(value):
+    return (str(value).strip() or None) if value is not None else None
+
+
+def _date(value, offset=None):
+    """ISO-8601 from an EXIF/QuickTime date ('2020:01:02 03:04:05[+01:00]'); None for zero dates"""
+    m = _DATE.match(str(value)) if value is not None else None
+    if not m or m.group(1) == "0000":
+        return None
+    y, mo, d, clock, tz = m.groups()
+    return f"{y}-{mo}-{d}T{clock}{tz or offset or ''}"
+
+
+def _signed(value, ref, negative):
+    value = _number(value)
+    if value is not None and value > 0 and ref in negative:
+        return -value
+    return value
+
+
+def exif_row(rec):
+    """One EXIF_COLUMNS tuple from an ``exiftool -j -n`` record"""
+    path = rec.pop("SourceFile", None)
+    offset = _text(rec.get("OffsetTimeOriginal") or rec.get("OffsetTime"))
+    return (path, os.path.dirname(path) if path else None, _text(rec.get("FileType")), _text(rec.get("MIMEType")),
+            _text(rec.get("Make")), _text(rec.get("Model")), _text(rec.get("LensModel")), _text(rec.get("Software")),
+            _date(rec.get("DateTimeOriginal"), offset), _date(rec.get("CreateDate") or rec.get("CreationDate"), offset),
+            _date(rec.get("ModifyDate"), offset), offset,
+            _signed(rec.get("GPSLatitude"), rec.get("GPSLatitudeRef"), ("S",)),
+            _signed(rec.get("GPSLongitude"), rec.get("GPSLongitudeRef"), ("W",)),
+            _signed(rec.get("GPSAltitude"), rec.get("GPSAltitudeRef"), (1, "1")),
+            _number(rec.get("ImageWidth", rec.get("ExifImageWidth"))),
+            _number(rec.get("ImageHeight", rec.get("ExifImageHeight"))),
+            _number(rec.get("Orientation")), _number(rec.get("Duration")),
+            json.dumps(rec, default=str), _text(rec.get("Error")))
+
+
+def _error_row(path, error):
+    return (path, os.path.dirname(path)) + (None,) * (len(EXIF_COLUMNS) - 4) + (None, error)
+
+
+def shard_rows(pool, batch):
+    """EXIF_COLUMNS tuples for one shard; files exiftool did not report get an error row"""
+    try:
+        records = pool.metadata(batch)
+    except (RuntimeError, ValueError, OSError) as e:
+        return [_error_row(p, str(e)) for p in batch]
+    rows = [exif_row(rec) for rec in records]
+    seen = {row[0] for row in rows}
+    rows.extend(_error_row(p, "no output") for p in batch if p not in seen)
+    return rows
+
+
+def extract(paths, workers=WORKERS, batch_size=BATCH_SIZE, executable="exiftool"):
+    """Yield one list of EXIF_COLUMNS tuples per shard of ``paths``
+
+    At most ``workers * 2`` shards are in flight, so the output streams
+    in shard order with bounded memory however many files there are.
+    """
+    pool = ExifToolPool(workers, executable)
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as ex:
+            pending = deque()
+            for batch in shards(paths, batch_size):
+                pending.append(ex.submit(shard_rows, pool, batch))
+                if len(pending) >= pool.size * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        pool.close()
+
+
+def write_exif(conn, batches):
+    """Upsert each shard's rows into the exif table in its own short transaction; returns the row count
+
+    The exiftool pool keeps working between commits, never under the
+    session's write lock.
+    """
+    count = 0
+    for rows in batches:
+        with conn:
+            count += insert_rows(conn, "exif", EXIF_COLUMNS, rows, verb="INSERT OR REPLACE")
+    return count
@@ -0,0 +1,193 @@
+"""
+File Discovery Module
+Walks a backup once, classifies every file by Manifest.db relativePath
+extension or, failing that, by magic bytes, and writes a manifest that
+all modules consume instead of running their own find
+"""
+
+import csv
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DISCOVERY_DIR = "discovery"
+MANIFEST_FILE = "files.tsv"
+MANIFEST_FIELDS = ("path", "size", "kind", "domain", "relativePath")
+SNIFF_BYTES = 32
+
+# Extension (from Manifest.db relativePath or the file name) -> kind
+EXT_KINDS = {
+    ".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".heic": "heic", ".heif": "heic",
+    ".gif": "gif", ".tif": "tiff", ".tiff": "tiff", ".bmp": "bmp",
+    ".mp4": "mp4", ".m4v": "mp4", ".mov": "mov", ".mkv": "mkv",
+    ".m4a": "m4a", ".caf": "caf", ".aac": "aac", ".mp3": "mp3", ".wav": "wav", ".amr": "amr",
+    ".plist": "plist", ".bplist": "plist",
+    ".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite", ".sqlitedb": "sqlite",
+    ".storedata": "sqlite",
+    ".db-wal": "sqlite-wal", ".sqlite-wal": "sqlite-wal",
+    ".pdf": "pdf", ".zip": "zip", ".gz": "gzip",
+}
+
+# Kinds grouped for modules that accept a family of formats
+KIND_GROUPS = {
+    "image": ("jpeg", "png", "heic", "gif", "tiff", "bmp"),
+    "video": ("mp4", "mov", "mkv"),
+    "audio": ("m4a", "caf", "aac", "mp3", "wav", "amr"),
+}
+
+_FTYP_KINDS = {
+    b"qt  ": "mov", b"M4A ": "m4a", b"M4B ": "m4a",
+    b"heic": "heic", b"heix": "heic", b"mif1": "heic", b"msf1": "heic",
+}
+
+
+def sniff(head):
+    """Classify a file from its first bytes; returns a kind or 'other'"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"SQLite format 3\x00"):
+        return "sqlite"
+    if head.startswith(b"bplist"):
+        return "plist"
+    if head[4:8] == b"ftyp":
+        return _FTYP_KINDS.get(head[8:12], "mp4")
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head.startswith((b"II*\x00", b"MM\x00*")):
+        return "tiff"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "mkv"
+    if head.startswith(b"caff"):
+        return "caf"
+    if head.startswith(b"#!AMR"):
+        return "amr"
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head[:4] in (b"\x37\x7f\x06\x82", b"\x37\x7f\x06\x83"):
+        return "sqlite-wal"
+    if head.startswith(b"ID3") or head[:2] in (b"\xff\xfb", b"\xff\xf3"):
+        return "mp3"
+    if head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+        return "wav"
+    stripped = head.lstrip()
+    if stripped.startswith(b"<?xml") or stripped.startswith(b"<!DOCTYPE plist") or stripped.startswith(b"<plist"):
+        return "plist"
+    return "other"
+
+
+def sniff_file(path):
+    try:
+        with open(path, "rb") as fh:
+            return sniff(fh.read(SNIFF_BYTES))
+    except OSError:
+        return "other"
+
+
+def kind_from_name(name):
+    """Kind implied by a file name's extension, or None"""
+    lower = name.lower()
+    for ext in (".db-wal", ".sqlite-wal"):
+        if lower.endswith(ext):
+            return EXT_KINDS[ext]
+    return EXT_KINDS.get(os.path.splitext(lower)[1])
+
+
+def walk(root):
+    """Yield (path, size) for every regular file under ``root`` using scandir"""
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+
+
+def manifest_paths(manifest_db):
+    """{fileID: (domain, relativePath)} for every file row in Manifest.db"""
+    uri = f"{Path(manifest_db).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        return {fid: (domain, rel) for fid, domain, rel in
+                conn.execute("SELECT fileID, domain, relativePath FROM Files WHERE flags = 1")}
+    finally:
+        conn.close()
+
+
+def discover(root, workers=8):
+    """Return a list of manifest rows (see MANIFEST_FIELDS) for ``root``"""
+    root = Path(root)
+    known = {}
+    if (root / "Manifest.db").exists():
+        try:
+            known = manifest_paths(root / "Manifest.db")
+        except sqlite3.Error:
+            known = {}
+
+    rows = []
+    to_sniff = []
+    for path, size in walk(root):
+        name = os.path.basename(path)
+        domain, rel = known.get(name, ("", ""))
+        kind = kind_from_name(rel or name)
+        rows.append([path, size, kind, domain, rel])
+        if kind is None:
+            to_sniff.append(len(rows) - 1)
+
+    # Only files whose name says nothing are opened, in parallel
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, kind in zip(to_sniff, pool.map(sniff_file, (rows[i][0] for i in to_sniff))):
+            rows[i][2] = kind
+    return rows
+
+
+def write_discovery(rows, session):
+    """Write files.tsv plus one NUL-separated <kind>.list per kind/group (and all.list)"""
+    out = Path(session) / DISCOVERY_DIR
+    tmp = out.with_name(out.name + f".tmp{os.getpid()}")
+    tmp.mkdir(parents=True, exist_ok=True)
+    lists = {}
+    with open(tmp / MANIFEST_FILE, "w", newline="") as fh:
+        writer = csv.writer(fh, delimiter="\t")
+        writer.writerow(MANIFEST_FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            lists.setdefault(row[2], []).append(row[0])
+    lists["all"] = [row[0] for row in rows]
+    for group, kinds in KIND_GROUPS.items():
+        lists[group] = [p for k in kinds for p in lists.get(k, [])]
+    for kind, paths in lists.items():
+        with open(tmp / f"{kind}.list", "w") as fh:
+            fh.write("".join(p + "\0" for p in paths))
+    try:
+        os.replace(tmp, out)
+    except OSError:
+        # A concurrent run already published its results; keep those
+        for f in tmp.iterdir():
+            f.unlink()
+        tmp.rmdir()
+    return out
+
+
+def load_discovery(session, kinds=("all",)):
+    """Paths of the given kinds/groups from a session's discovery, or None if absent"""
+    out = Path(session) / DISCOVERY_DIR
+    if not (out / MANIFEST_FILE).exists():
+        return None
+    paths = []
+    for kind in kinds:
+        f = out / f"{kind}.list"
+        if f.exists():
+            paths.extend(p for p in f.read_text().split("\0") if p)
+    return paths
@@ -0,0 +1,92 @@
+"""
+FS Timeline Module
+Builds fs_timeline rows natively: MAC(B) times of every Manifest.db entry
+from its MBFile record (device paths) plus scandir stat data of the files
+on disk, streamed into session.sqlite without a bodyfile/mactime pass
+"""
+
+import os
+import sqlite3
+import stat
+from pathlib import Path
+
+from .blob_decoder import decode_record_batch, iter_decoded
+from .mbfile import MBFILE_COLUMNS
+from .session_db import write_chunks
+from .session_ingest import TIMELINE_COLUMNS
+
+MANIFEST_SOURCE = "manifest"
+STAT_SOURCE = "stat"
+BATCH_SIZE = 2000
+
+_COL = {name: 4 + i for i, name in enumerate(MBFILE_COLUMNS)}  # after fileID, domain, relativePath, flags
+
+
+def _mode(mode):
+    return stat.filemode(mode) if mode else None
+
+
+def _ts(value):
+    return value if value else None
+
+
+def manifest_rows(manifest_db, workers=None, batch_size=BATCH_SIZE):
+    """fs_timeline rows (device path ``domain/relativePath``) from Manifest.db MBFile records
+
+    MBFile carries modification, status-change and birth times; there is no
+    access time, so atime stays NULL.
+    """
+    conn = sqlite3.connect(f"{Path(manifest_db).resolve().as_uri()}?mode=ro", uri=True)
+    query = "SELECT fileID, domain, relativePath, flags, file FROM Files"
+    c = _COL
+    try:
+        for rec in iter_decoded(conn, query, batch_size=batch_size, workers=workers, decoder=decode_record_batch):
+            domain, rel = rec[1], rec[2]
+            path = f"{domain}/{rel}" if rel else domain
+            yield (path, rec[c["InodeNumber"]], _mode(rec[c["Mode"]]), rec[c["UserID"]], rec[c["GroupID"]],
+                   rec[c["Size"]], None, _ts(rec[c["LastModified"]]), _ts(rec[c["LastStatusChange"]]),
+                   _ts(rec[c["Birth"]]), MANIFEST_SOURCE)
+    finally:
+        conn.close()
+
+
+def stat_rows(root):
+    """fs_timeline rows for every file and directory under ``root`` from scandir/stat"""
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append(entry.path)
+                yield (entry.path, st.st_ino, stat.filemode(st.st_mode), st.st_uid, st.st_gid, st.st_size,
+                       st.st_atime, st.st_mtime, st.st_ctime, getattr(st, "st_birthtime", None), STAT_SOURCE)
+
+
+def build_timeline(conn, backup_root, include_stat=True, workers=None):
+    """Replace the manifest/stat rows of fs_timeline; returns {source: rows}
+
+    Rows are decoded and stat'ed between commits (write_chunks), so other
+    modules writing the session meanwhile are not locked out.
+    """
+    backup_root = Path(backup_root)
+    manifest_db = backup_root / "Manifest.db"
+    counts = {}
+    with conn:
+        conn.execute("DELETE FROM fs_timeline WHERE source IN (?, ?)", (MANIFEST_SOURCE, STAT_SOURCE))
+    if manifest_db.exists():
+        try:
+            counts[MANIFEST_SOURCE] = write_chunks(conn, "fs_timeline", TIMELINE_COLUMNS,
+                                                   manifest_rows(manifest_db, workers))
+        except sqlite3.DatabaseError:
+            counts[MANIFEST_SOURCE] = 0  # encrypted Manifest.db; stat data is still useful
+    if include_stat:
+        counts[STAT_SOURCE] = write_chunks(conn, "fs_timeline", TIMELINE_COLUMNS, stat_rows(backup_root))
+    return counts
@@ -0,0 +1,324 @@
+"""
+Geo Module
+Streams coordinates from media metadata, the exif table and location
+databases (Cache.sqlite, consolidated.db, location-category SQLite files)
+into geo_points with a Morton-coded Web Mercator cell per point, rolls them
+up into per-zoom clusters with NumPy run-length merges over the sorted
+cells, and writes the clusters as a compact binary layer plus a
+canvas-rendered Leaflet map that reads it
+"""
+
+import base64
+import json
+import re
+import sqlite3
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from .session_db import CHUNK_ROWS, GEO_SCHEMA, build_indexes, drop_indexes, write_chunks
+from .sqlite_browser import open_readonly, quote_ident, table_columns
+from .timestamps import COCOA_EPOCH, COCOA_MIN, UNIX_MAX, UNIX_MIN
+
+MAX_ZOOM = 18
+CLUSTER_SHIFT = 2                    # 4x4 cluster cells (64 px) per 256 px tile
+CELL_BITS = MAX_ZOOM + CLUSTER_SHIFT
+MAX_LATITUDE = 85.05112878           # Web Mercator limit
+LAYER_LIMIT = 50_000                 # clusters per level in the binary layer
+CLUSTER_RATIO = 0.5                  # stop storing levels once clusters exceed this share of points
+LAYER_MAGIC = b"MODGEO1\n"
+LAYER_DTYPE = np.dtype([("latitude", "<f4"), ("longitude", "<f4"), ("n", "<u4")])
+GEO_VERSION = 1
+GEO_DB = "geo.sqlite"
+
+POINT_COLUMNS = ("source", "path", "latitude", "longitude", "ts", "label", "cell")
+LOCATION_DB_NAMES = ("consolidated.db", "Cache.sqlite", "cache_encryptedA.db", "cache_encryptedB.db")
+
+_LATITUDE = re.compile(r"(.*?)(latitude|lat)")
+_LONGITUDE = ("longitude", "long", "lon", "lng")
+_TIME = re.compile(r".*(timestamp|date|time)")
+
+def _spread(v):
+    """Spread the low 32 bits of ``v`` to the even bit positions"""
+    v = v & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def mercator_cells(latitude, longitude, bits=CELL_BITS):
+    """Morton codes of the Web Mercator cells (2**bits per axis) holding each point"""
+    lat = np.radians(np.clip(np.asarray(latitude, dtype="float64"), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(longitude, dtype="float64") + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    size = 1 << bits
+    cx = np.clip((x * size).astype("int64"), 0, size - 1).astype("uint64")
+    cy = np.clip((y * size).astype("int64"), 0, size - 1).astype("uint64")
+    return (_spread(cx) | (_spread(cy) << np.uint64(1))).astype("int64")
+
+
+def _with_cells(rows, chunk=CHUNK_ROWS):
+    """Append the cell to (source, path, lat, lon, ts, label) rows, a chunk at a time"""
+    buf = []
+
+    def flush():
+        cells = mercator_cells([r[2] for r in buf], [r[3] for r in buf]).tolist()
+        yield from (row + (cell,) for row, cell in zip(buf, cells))
+        buf.clear()
+
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= chunk:
+            yield from flush()
+    if buf:
+        yield from flush()
+
+
+def _seconds(value):
+    """Unix seconds from a Unix or Cocoa timestamp; None if neither"""
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return None
+    if COCOA_MIN <= value <= UNIX_MIN:
+        return float(value + COCOA_EPOCH)
+    if UNIX_MIN < value < UNIX_MAX:
+        return float(value)
+    return None
+
+
+def _iso_seconds(value):
+    """Unix seconds from an ISO-8601 date (naive ones as UTC); None if unparsable"""
+    try:
+        stamp = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+def coordinate_columns(conn, table):
+    """[(latitude, longitude, timestamp or None)] column names of ``table``"""
+    columns = table_columns(conn, table)
+    by_name = {c.lower(): c for c in columns}
+    ts = next((c for c in columns if _TIME.fullmatch(c.lower())), None)
+    pairs = []
+    for col in columns:
+        m = _LATITUDE.fullmatch(col.lower())
+        if not m:
+            continue
+        lon = next((by_name[m.group(1) + s] for s in _LONGITUDE if m.group(1) + s in by_name), None)
+        if lon:
+            pairs.append((col, lon, ts))
+    return pairs
+
+
+def sqlite_points(path, label):
+    """(source, path, lat, lon, ts, label) rows from every latitude/longitude column pair of a database"""
+    try:
+        conn = open_readonly(path)
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    except sqlite3.Error:
+        return
+    try:
+        for table in tables:
+            try:
+                pairs = coordinate_columns(conn, table)
+            except sqlite3.Error:
+                continue
+            for lat, lon, ts in pairs:
+                lat, lon = quote_ident(lat), quote_ident(lon)
+                sql = (f"SELECT {lat}, {lon}, {quote_ident(ts) if ts else 'NULL'} FROM {quote_ident(table)} "
+                       f"WHERE typeof({lat}) IN ('real', 'integer') AND typeof({lon}) IN ('real', 'integer') "
+                       f"AND {lat} BETWEEN -90 AND 90 AND {lon} BETWEEN -180 AND 180 "
+                       f"AND NOT ({lat} = 0 AND {lon} = 0)")
+                try:
+                    cur = conn.execute(sql)
+                    while True:
+                        batch = cur.fetchmany(CHUNK_ROWS)
+                        if not batch:
+                            break
+                        for la, lo, t in batch:
+                            yield "sqlite", label, la, lo, _seconds(t), table
+                except sqlite3.Error:
+                    continue
+    finally:
+        conn.close()
+
+
+def media_points(conn):
+    """Rows from media_metadata GPS columns (filled by media_metadata)"""
+    sql = ("SELECT path, latitude, longitude, created, kind FROM media_metadata "
+           "WHERE latitude BETWEEN -90 AND 90 AND longitude BETWEEN -180 AND 180 "
+           "AND NOT (latitude = 0 AND longitude = 0)")
+    for path, lat, lon, created, kind in conn.execute(sql):
+        yield "media", path, lat, lon, _iso_seconds(created) if created else None, kind
+
+
+def exif_points(conn):
+    """Rows from the exif table (exif_audit) for files media_metadata has no GPS for"""
+    sql = ("SELECT path, latitude, longitude, COALESCE(date_original, create_date), file_type FROM exif "
+           "WHERE latitude BETWEEN -90 AND 90 AND longitude BETWEEN -180 AND 180 "
+           "AND NOT (latitude = 0 AND longitude = 0) "
+           "AND path NOT IN (SELECT path FROM media_metadata WHERE latitude IS NOT NULL)")
+    for path, lat, lon, created, file_type in conn.execute(sql):
+        yield "exif", path, lat, lon, _iso_seconds(created) if created else None, file_type
+
+
+def open_store(path):
+    """Standalone geo database (the dashboard's per-backup copy of the session tables)"""
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.executescript(GEO_SCHEMA)
+    build_indexes(conn, "geo_points")
+    return conn
+
+
+def store_ready(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0] == GEO_VERSION
+
+
+def load_points(conn, rows):
+    """Replace geo_points with ``rows``, committing per chunk while the sources are read; returns the count
+
+    The cell/source indexes are dropped for the load and rebuilt at the end.
+    """
+    with conn:
+        drop_indexes(conn, "geo_points")
+        conn.execute("DELETE FROM geo_points")
+    try:
+        return write_chunks(conn, "geo_points", POINT_COLUMNS, _with_cells(rows))
+    finally:
+        with conn:
+            build_indexes(conn, "geo_points")
+
+
+def _roll_up(keys, n, lat_sum, lon_sum):
+    """Merge runs of equal ``keys`` (sorted) into one cluster each"""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return (keys[starts], np.add.reduceat(n, starts), np.add.reduceat(lat_sum, starts),
+            np.add.reduceat(lon_sum, starts))
+
+
+def build_clusters(conn):
+    """Rebuild geo_clusters from geo_points, finest zoom first
+
+    Points are sorted once by cell; a Morton code's parent is ``cell >> 2``,
+    so every coarser level is a run-length merge of the one below. Levels
+    are stored from zoom 0 up to the first one where clusters exceed
+    CLUSTER_RATIO of the points; finer detail stays in geo_points,
+    indexed by cell.
+    """
+    total = conn.execute("SELECT COUNT(*) FROM geo_points").fetchone()[0]
+    points = np.fromiter(conn.execute("SELECT cell, latitude, longitude FROM geo_points"),
+                         dtype=[("cell", "<i8"), ("latitude", "<f8"), ("longitude", "<f8")], count=total)
+    points = points[np.argsort(points["cell"], kind="stable")]
+    level = (points["cell"], np.ones(total, dtype="int64"), points["latitude"], points["longitude"])
+    levels = {}
+    for zoom in range(MAX_ZOOM, -1, -1):
+        level = _roll_up(*level) if total else level
+        levels[zoom] = level
+        level = (level[0] >> 2,) + level[1:]
+    with conn:
+        conn.execute("DELETE FROM geo_clusters")
+        for zoom in range(MAX_ZOOM + 1):
+            cells, n, lat_sum, lon_sum = levels[zoom]
+            conn.executemany("INSERT INTO geo_clusters (zoom, cell, n, latitude, longitude) VALUES (?, ?, ?, ?, ?)",
+                             zip([zoom] * len(n), cells.tolist(), n.tolist(), (lat_sum / n).tolist(),
+                                 (lon_sum / n).tolist()))
+            if len(n) > CLUSTER_RATIO * total:
+                break
+        conn.execute(f"PRAGMA user_version = {GEO_VERSION}")
+
+
+def level_sizes(conn):
+    """{zoom: clusters}"""
+    return dict(conn.execute("SELECT zoom, COUNT(*) FROM geo_clusters GROUP BY zoom"))
+
+
+def deepest_zoom(conn, limit=LAYER_LIMIT):
+    """Highest zoom whose level has at most ``limit`` clusters (cluster counts grow with zoom)"""
+    fitting = [z for z, n in level_sizes(conn).items() if n <= limit]
+    return max(fitting) if fitting else None
+
+
+def clusters(conn, zoom):
+    """LAYER_DTYPE array of the clusters at ``zoom``"""
+    cur = conn.execute("SELECT latitude, longitude, n FROM geo_clusters WHERE zoom = ?", (zoom,))
+    return np.fromiter(cur, dtype=LAYER_DTYPE)
+
+
+def bounds(conn):
+    """((south, west), (north, east)) of all points, or None"""
+    row = conn.execute("SELECT MIN(latitude), MIN(longitude), MAX(latitude), MAX(longitude) "
+                       "FROM geo_points").fetchone()
+    return ((row[0], row[1]), (row[2], row[3])) if row[0] is not None else None
+
+
+def write_layer(conn, path, limit=LAYER_LIMIT):
+    """Write levels 0..deepest_zoom as LAYER_MAGIC + per level <u8 zoom><u32 count><count x LAYER_DTYPE>
+
+    Returns the zoom levels written.
+    """
+    deepest = deepest_zoom(conn, limit)
+    zooms = list(range(deepest + 1)) if deepest is not None else []
+    tmp = Path(path).with_name(Path(path).name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(LAYER_MAGIC)
+        for zoom in zooms:
+            level = clusters(conn, zoom)
+            fh.write(struct.pack("<BI", zoom, len(level)))
+            fh.write(level.tobytes())
+    tmp.replace(path)
+    return zooms
+
+
+MAP_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%(title)s</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map { height: 100%%; margin: 0; }</style>
+</head><body><div id="map"></div><script>
+const bytes = Uint8Array.from(atob("%(layer)s"), c => c.charCodeAt(0));
+const view = new DataView(bytes.buffer);
+const levels = [];
+for (let off = 0; off < bytes.length;) {
+  const zoom = view.getUint8(off), count = view.getUint32(off + 1, true);
+  levels[zoom] = {off: off + 5, count: count};
+  off += 5 + count * 12;
+}
+const map = L.map("map", {preferCanvas: true});
+L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+            {maxZoom: 19, attribution: "&copy; OpenStreetMap contributors"}).addTo(map);
+map.fitBounds(%(bounds)s, {maxZoom: 16});
+const group = L.layerGroup().addTo(map);
+function draw() {
+  const level = levels[Math.min(map.getZoom(), levels.length - 1)];
+  const box = map.getBounds().pad(0.25);
+  group.clearLayers();
+  for (let i = 0; i < level.count; i++) {
+    const o = level.off + i * 12;
+    const lat = view.getFloat32(o, true), lon = view.getFloat32(o + 4, true), n = view.getUint32(o + 8, true);
+    if (!box.contains([lat, lon])) continue;
+    L.circleMarker([lat, lon], {radius: 4 + Math.min(16, 2 * Math.log2(n)), weight: 1, fillOpacity: 0.6})
+      .bindTooltip(n + (n > 1 ? " points" : " point")).addTo(group);
+  }
+}
+map.on("moveend", draw);
+draw();
+</script></body></html>
+"""
+
+
+def write_map(conn, html_path, layer_path, title="GPS map"):
+    """Write the binary layer and a Leaflet page embedding it; returns the zoom levels, [] if no points"""
+    zooms = write_layer(conn, layer_path)
+    box = bounds(conn)
+    if not zooms or box is None:
+        return []
+    layer = base64.b64encode(Path(layer_path).read_bytes()[len(LAYER_MAGIC):]).decode("ascii")
+    Path(html_path).write_text(MAP_TEMPLATE % {"title": title, "layer": layer,
+                                               "bounds": json.dumps([list(box[0]), list(box[1])])},
+                               encoding="utf-8")
+    return zooms
@@ -0,0 +1,163 @@
+"""
+Inventory Module
+Complete file/byte inventory of a backup: the hashed subdirectories are
+scanned in parallel with scandir, each file is classified through its
+Manifest.db relativePath, and the report is cached per backup
+"""
+
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from .backup_summary import backup_fingerprint, cache_file, write_json_atomic
+from .file_discovery import KIND_GROUPS, kind_from_name, manifest_paths
+
+INVENTORY_VERSION = 1
+INVENTORY_DIR = "inventory"
+WORKERS = 16  # scandir/stat wait on the filesystem, so threads overlap well
+
+# Report categories; kinds not listed here count as "other"
+CATEGORY_KINDS = {
+    "db": ("sqlite",),
+    "wal": ("sqlite-wal",),
+    "plist": ("plist",),
+    "images": KIND_GROUPS["image"],
+    "video": KIND_GROUPS["video"],
+    "audio": KIND_GROUPS["audio"],
+    "documents": ("pdf", "zip", "gzip"),
+}
+KIND_CATEGORY = {kind: cat for cat, kinds in CATEGORY_KINDS.items() for kind in kinds}
+# Files Manifest.db does not know and whose name has no extension (hashed blobs
+# of an encrypted or partial backup)
+UNMAPPED = "unmapped"
+
+
+def _bucket(table, key, size):
+    entry = table.get(key)
+    if entry is None:
+        table[key] = entry = {"files": 0, "bytes": 0}
+    entry["files"] += 1
+    entry["bytes"] += size
+
+
+def _domain_group(domain):
+    """AppDomain-com.foo -> AppDomain; HomeDomain stays as is"""
+    return domain.split("-", 1)[0] if domain else ""
+
+
+def scan_tree(top, known):
+    """Aggregate counts for one subtree: (dirs, categories, domains, matched fileIDs)"""
+    dirs = 0
+    categories, domains = {}, {}
+    matched = 0
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        try:
+            it = os.scandir(path)
+        except OSError:
+            continue
+        dirs += 1
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                hit = known.get(entry.name)
+                if hit is not None:
+                    matched += 1
+                    domain, rel = hit
+                    kind = kind_from_name(rel)
+                    _bucket(domains, _domain_group(domain), size)
+                else:
+                    kind = kind_from_name(entry.name)
+                category = KIND_CATEGORY.get(kind) or ("other" if kind or hit else UNMAPPED)
+                _bucket(categories, category, size)
+    return dirs, categories, domains, matched
+
+
+def _merge(into, part):
+    for key, entry in part.items():
+        target = into.setdefault(key, {"files": 0, "bytes": 0})
+        target["files"] += entry["files"]
+        target["bytes"] += entry["bytes"]
+
+
+def build_inventory(backup_path, progress=None, workers=WORKERS, root=None):
+    """Scan ``backup_path`` completely, store the report and return it"""
+    backup_path = Path(backup_path)
+    fingerprint = backup_fingerprint(backup_path)
+    known = {}
+    if (backup_path / "Manifest.db").exists():
+        try:
+            known = manifest_paths(backup_path / "Manifest.db")
+        except sqlite3.Error:
+            known = {}  # encrypted Manifest.db: only file names classify
+
+    report = {"files": 0, "bytes": 0, "dirs": 1, "categories": {}, "domains": {}}
+    matched = 0
+    subdirs = []
+    top_level = {}
+    with os.scandir(backup_path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    # Manifest.db, Info.plist and friends
+                    _bucket(top_level, "backup metadata", entry.stat(follow_symlinks=False).st_size)
+            except OSError:
+                continue
+    _merge(report["categories"], top_level)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(scan_tree, d, known) for d in subdirs]
+        for n, fut in enumerate(as_completed(futures), 1):
+            dirs, categories, domains, hits = fut.result()
+            report["dirs"] += dirs
+            _merge(report["categories"], categories)
+            _merge(report["domains"], domains)
+            matched += hits
+            if progress:
+                progress(n, len(futures), f"{n}/{len(futures)} directories")
+
+    for entry in report["categories"].values():
+        report["files"] += entry["files"]
+        report["bytes"] += entry["bytes"]
+    report.update({
+        "version": INVENTORY_VERSION,
+        "path": str(backup_path),
+        "fingerprint": fingerprint,
+        "computed_at": datetime.now().isoformat(timespec="seconds"),
+        "manifest_files": len(known),
+        # Files Manifest.db lists but the backup directory lacks
+        "manifest_missing": len(known) - matched,
+    })
+    write_json_atomic(cache_file(backup_path, INVENTORY_DIR, root), report)
+    return report
+
+
+def load_inventory(backup_path, root=None):
+    """Stored inventory if it is still current, else None"""
+    try:
+        with open(cache_file(backup_path, INVENTORY_DIR, root)) as fh:
+            report = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if report.get("version") != INVENTORY_VERSION or report.get("fingerprint") != backup_fingerprint(backup_path):
+        return None
+    return report
+
+
+def get_inventory(backup_path, progress=None, root=None):
+    """Stored inventory, rebuilt first if missing or stale"""
+    return load_inventory(backup_path, root) or build_inventory(backup_path, progress, root=root)
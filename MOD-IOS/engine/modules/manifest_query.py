@@ -0,0 +1,123 @@
+"""
+Manifest Query Module
+Fixed, parameterized statements over Manifest.db Files (so sqlite3's
+statement cache reuses them), streamed through cursors without row
+limits, plus a trigram FTS5 index of domain/relativePath kept in the
+per-backup cache for substring searches
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from .backup_cache import backup_cache_dir
+from .blob_decoder import iter_batches
+
+STATEMENT_CACHE = 256
+PATH_INDEX_DB = "paths_fts.sqlite"
+PATH_INDEX_SCHEMA = "paths"
+MIN_TRIGRAM = 3  # the trigram tokenizer cannot match shorter terms
+BATCH_SIZE = 10000
+
+FILE_COLUMNS = ("fileID", "domain", "relativePath", "flags")
+
+# One SQL text per query shape; only parameters change between calls
+FILES_BY_KEYWORDS_SCAN = """
+SELECT fileID, domain, relativePath, flags FROM Files
+WHERE EXISTS (SELECT 1 FROM json_each(?) k WHERE instr(lower(domain), k.value) > 0)
+"""
+FILES_MATCHING = f"""
+SELECT f.fileID, f.domain, f.relativePath, f.flags
+FROM {PATH_INDEX_SCHEMA}.paths p JOIN Files f ON f.fileID = p.fileID
+WHERE p.paths MATCH ?
+"""
+FILES_BY_CATEGORY = """
+SELECT f.fileID, f.domain, f.relativePath, f.flags
+FROM idx.file_categories c
+JOIN Files f ON f.fileID = c.fileID
+WHERE c.category = ?
+"""
+FILES_BY_PATH_SCAN = """
+SELECT fileID, domain, relativePath, flags FROM Files
+WHERE instr(lower(domain), ?1) > 0 OR instr(lower(relativePath), ?1) > 0
+"""
+
+PATH_INDEX_DDL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {PATH_INDEX_SCHEMA}.paths
+    USING fts5(fileID UNINDEXED, domain, relativePath, tokenize='trigram');
+CREATE TABLE IF NOT EXISTS {PATH_INDEX_SCHEMA}.paths_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def connect(manifest_db):
+    """Read-only Manifest.db connection with a statement cache sized for reuse"""
+    uri = f"{Path(manifest_db).resolve().as_uri()}?mode=ro"
+    return sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE, check_same_thread=False)
+
+
+def _attached(conn, schema):
+    return any(row[1] == schema for row in conn.execute("PRAGMA database_list"))
+
+
+def ensure_path_index(conn, manifest_db, rebuild=False):
+    """Attach (building on first use) the trigram index of Files domain/relativePath
+
+    Lives in the backup cache directory, which is keyed by the Manifest.db
+    hash, so a changed manifest gets a fresh index.
+    """
+    if not _attached(conn, PATH_INDEX_SCHEMA):
+        path = backup_cache_dir(manifest_db) / PATH_INDEX_DB
+        conn.execute("ATTACH DATABASE ? AS " + PATH_INDEX_SCHEMA, (str(path),))
+    conn.executescript(PATH_INDEX_DDL)
+    built = conn.execute(f"SELECT value FROM {PATH_INDEX_SCHEMA}.paths_meta WHERE key = 'built'").fetchone()
+    if built and not rebuild:
+        return False
+    with conn:
+        conn.execute(f"DELETE FROM {PATH_INDEX_SCHEMA}.paths")
+        conn.execute(f"INSERT INTO {PATH_INDEX_SCHEMA}.paths (fileID, domain, relativePath) "
+                     "SELECT fileID, domain, relativePath FROM Files")
+        conn.execute(f"INSERT INTO {PATH_INDEX_SCHEMA}.paths({PATH_INDEX_SCHEMA}) VALUES ('optimize')")
+        conn.execute(f"INSERT OR REPLACE INTO {PATH_INDEX_SCHEMA}.paths_meta (key, value) VALUES ('built', '1')")
+    return True
+
+
+def fts_phrase(text):
+    """Quote ``text`` as one FTS5 phrase (substring match under the trigram tokenizer)"""
+    return '"' + str(text).replace('"', '""') + '"'
+
+
+def _match_expr(column, terms):
+    return f"{column} : (" + " OR ".join(fts_phrase(t) for t in terms) + ")"
+
+
+def iter_rows(conn, sql, params=(), batch_size=BATCH_SIZE):
+    """Stream every row of ``sql`` through fetchmany"""
+    for rows in iter_batches(conn, sql, params, batch_size):
+        yield from rows
+
+
+def iter_files_by_domain(conn, manifest_db, keywords, batch_size=BATCH_SIZE):
+    """Files rows whose domain contains any keyword (case-insensitive), unlimited"""
+    keywords = [str(k).lower() for k in keywords if k]
+    if not keywords:
+        return iter(())
+    if all(len(k) >= MIN_TRIGRAM for k in keywords):
+        ensure_path_index(conn, manifest_db)
+        return iter_rows(conn, FILES_MATCHING, (_match_expr("domain", keywords),), batch_size)
+    return iter_rows(conn, FILES_BY_KEYWORDS_SCAN, (json.dumps(keywords),), batch_size)
+
+
+def iter_files_by_category(conn, category, batch_size=BATCH_SIZE):
+    """Files rows tagged ``category`` in the attached category index (see domain_classifier)"""
+    return iter_rows(conn, FILES_BY_CATEGORY, (category,), batch_size)
+
+
+def iter_path_search(conn, manifest_db, text, batch_size=BATCH_SIZE):
+    """Files rows whose domain or relativePath contains ``text`` (case-insensitive)"""
+    text = str(text).strip()
+    if not text:
+        return iter(())
+    if len(text) >= MIN_TRIGRAM:
+        ensure_path_index(conn, manifest_db)
+        return iter_rows(conn, FILES_MATCHING, (fts_phrase(text),), batch_size)
+    return iter_rows(conn, FILES_BY_PATH_SCAN, (text.lower(),), batch_size)
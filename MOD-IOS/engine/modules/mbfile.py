@@ -0,0 +1,224 @@
+"""
+MBFile Decoder Module
+Fast path for the NSKeyedArchiver bplists stored in Manifest.db Files.file.
+Reads the bplist offset table directly and resolves only the MBFile root
+object and the UIDs it references, producing one fixed-width record.
+"""
+
+import struct
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+
+MBFILE_COLUMNS = (
+    'Size', 'Mode', 'InodeNumber', 'UserID', 'GroupID',
+    'LastModified', 'LastStatusChange', 'Birth',
+    'ProtectionClass', 'Flags', 'RelativePath', 'Target', 'EncryptionKey',
+)
+MBFILE_TIMESTAMPS = ('LastModified', 'LastStatusChange', 'Birth')
+# Column types: integer columns, then text, then raw bytes
+MBFILE_TYPES = dict.fromkeys(MBFILE_COLUMNS[:10], int)
+MBFILE_TYPES.update(RelativePath=str, Target=str, EncryptionKey=bytes)
+
+MBFileRecord = namedtuple('MBFileRecord', MBFILE_COLUMNS)
+EMPTY_RECORD = MBFileRecord(*([None] * len(MBFILE_COLUMNS)))
+
+_TRAILER = struct.Struct('>6xBBQQQ')
+_SINT8 = struct.Struct('>q')
+_UINT_CODE = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+def _ascii_key(name):
+    """Raw bplist encoding of an ASCII string object"""
+    if len(name) < 15:
+        return bytes([0x50 | len(name)]) + name.encode('ascii')
+    return bytes([0x5F, 0x10, len(name)]) + name.encode('ascii')
+
+
+# Keys are matched on their raw encoded bytes, so no key string is ever decoded
+_COLUMN_KEYS = {_ascii_key(name): i for i, name in enumerate(MBFILE_COLUMNS)}
+_KEY_OBJECTS = _ascii_key('$objects')
+_KEY_TOP = _ascii_key('$top')
+_KEY_ROOT = _ascii_key('root')
+_KEY_NSDATA = _ascii_key('NS.data')
+_KEY_CLASS = _ascii_key('$class')
+_KEY_CLASSNAME = _ascii_key('$classname')
+_MBFILE = 'MBFile'
+_NULL = _ascii_key('$null')
+
+
+class MBFileError(ValueError):
+    """Blob is not an NSKeyedArchiver MBFile this decoder understands"""
+
+
+@lru_cache(maxsize=256)
+def _table(code, count):
+    return struct.Struct(f'>{count}{code}')
+
+
+def _header(buf, pos):
+    """Return (kind, count, payload start) for the object at ``pos``"""
+    marker = buf[pos]
+    n = marker & 0x0F
+    if n != 0x0F:
+        return marker >> 4, n, pos + 1
+    size = 1 << (buf[pos + 1] & 0x0F)
+    return marker >> 4, int.from_bytes(buf[pos + 2:pos + 2 + size], 'big'), pos + 2 + size
+
+
+def _raw_key(buf, pos):
+    """Raw bytes of the ASCII string object at ``pos`` (marker included)"""
+    marker = buf[pos]
+    if 0x50 <= marker < 0x5F:
+        return buf[pos:pos + 1 + (marker & 0x0F)]
+    if marker == 0x5F:
+        _, count, start = _header(buf, pos)
+        return buf[pos:start + count]
+    return None
+
+
+def _dict(buf, pos, ref_code):
+    """Return {raw key bytes: value ref} for the dict object at ``pos``"""
+    kind, count, start = _header(buf, pos)
+    if kind != 0xD:
+        raise MBFileError("expected dict")
+    refs = _table(ref_code, count * 2).unpack_from(buf, start)
+    return refs[:count], refs[count:]
+
+
+def _scalar(buf, pos):
+    """Decode an integer, UID, string, data or null object at ``pos``"""
+    marker = buf[pos]
+    if 0x10 <= marker <= 0x12:
+        return int.from_bytes(buf[pos + 1:pos + 1 + (1 << (marker & 0x0F))], 'big')
+    if marker == 0x13:
+        return _SINT8.unpack_from(buf, pos + 1)[0]
+    kind = marker >> 4
+    if kind == 0x8:
+        return _UID(int.from_bytes(buf[pos + 1:pos + 2 + (marker & 0x0F)], 'big'))
+    if kind in (0x4, 0x5, 0x6):
+        kind, count, start = _header(buf, pos)
+        if kind == 0x4:
+            return buf[start:start + count]
+        if kind == 0x5:
+            return buf[start:start + count].decode('ascii')
+        return buf[start:start + count * 2].decode('utf-16-be')
+    if marker == 0x23:
+        return struct.unpack_from('>d', buf, pos + 1)[0]
+    if marker in (0x00, 0x08, 0x09):
+        return None if marker == 0x00 else marker == 0x09
+    raise MBFileError(f"unsupported bplist marker 0x{marker:02x}")
+
+
+class _UID(int):
+    """NSKeyedArchiver object reference"""
+
+
+def decode_mbfile(blob):
+    """Decode one Manifest.db Files.file blob into an MBFileRecord"""
+    if not isinstance(blob, (bytes, bytearray, memoryview)):
+        raise MBFileError("not a binary plist")
+    buf = bytes(blob)
+    if buf[:8] != b'bplist00' or len(buf) < 40:
+        raise MBFileError("not a binary plist")
+    try:
+        offset_size, ref_size, num_objects, top, table = _TRAILER.unpack_from(buf, len(buf) - 32)
+        offsets = _table(_UINT_CODE[offset_size], num_objects).unpack_from(buf, table)
+        ref_code = _UINT_CODE[ref_size]
+
+        keys, vals = _dict(buf, offsets[top], ref_code)
+        objects_ref = top_ref = None
+        for k, v in zip(keys, vals):
+            raw = _raw_key(buf, offsets[k])
+            if raw == _KEY_OBJECTS:
+                objects_ref = v
+            elif raw == _KEY_TOP:
+                top_ref = v
+        kind, count, start = _header(buf, offsets[objects_ref])
+        if kind != 0xA:
+            raise MBFileError("$objects is not an array")
+        objects = _table(ref_code, count).unpack_from(buf, start)
+
+        keys, vals = _dict(buf, offsets[top_ref], ref_code)
+        root = None
+        for k, v in zip(keys, vals):
+            if _raw_key(buf, offsets[k]) == _KEY_ROOT:
+                root = _scalar(buf, offsets[v])
+        if not isinstance(root, _UID):
+            raise MBFileError("archive has no root object")
+
+        fields = [None] * len(MBFILE_COLUMNS)
+        class_ref = None
+        keys, vals = _dict(buf, offsets[objects[root]], ref_code)
+        for k, v in zip(keys, vals):
+            pos = offsets[k]
+            marker = buf[pos]
+            # Inline fast path for short keys and small integers
+            raw = buf[pos:pos + 1 + (marker & 0x0F)] if 0x50 <= marker < 0x5F else _raw_key(buf, pos)
+            i = _COLUMN_KEYS.get(raw)
+            if i is None:
+                if raw == _KEY_CLASS:
+                    class_ref = v
+                continue
+            pos = offsets[v]
+            marker = buf[pos]
+            if 0x10 <= marker <= 0x12:
+                fields[i] = int.from_bytes(buf[pos + 1:pos + 1 + (1 << (marker & 0x0F))], 'big')
+                continue
+            val = _scalar(buf, pos)
+            if isinstance(val, _UID):
+                val = _resolve(buf, offsets, objects, ref_code, objects[val])
+            fields[i] = val
+        if class_ref is None or _classname(buf, offsets, objects, ref_code, class_ref) != _MBFILE:
+            raise MBFileError("root object is not an MBFile")
+        return MBFileRecord(*fields)
+    except MBFileError:
+        raise
+    except (IndexError, KeyError, TypeError, struct.error, UnicodeDecodeError) as e:
+        raise MBFileError(f"malformed MBFile archive: {e}") from e
+
+
+def _classname(buf, offsets, objects, ref_code, class_ref):
+    """Return the $classname of the class dict referenced by UID ``class_ref``"""
+    uid = _scalar(buf, offsets[class_ref])
+    if not isinstance(uid, _UID):
+        return None
+    keys, vals = _dict(buf, offsets[objects[uid]], ref_code)
+    for k, v in zip(keys, vals):
+        if _raw_key(buf, offsets[k]) == _KEY_CLASSNAME:
+            return _scalar(buf, offsets[v])
+    return None
+
+
+def _resolve(buf, offsets, objects, ref_code, ref):
+    """Resolve a UID target: '$null', a string, or NSData/NSMutableData"""
+    pos = offsets[ref]
+    if buf[pos] >> 4 != 0xD:
+        if _raw_key(buf, pos) == _NULL:
+            return None
+        return _scalar(buf, pos)
+    keys, vals = _dict(buf, pos, ref_code)
+    for k, v in zip(keys, vals):
+        if _raw_key(buf, offsets[k]) == _KEY_NSDATA:
+            data = _scalar(buf, offsets[v])
+            if isinstance(data, _UID):
+                data = _scalar(buf, offsets[objects[data]])
+            return data
+    return None
+
+
+def mbfile_to_dict(record):
+    """JSON-safe dict of a record: timestamps as ISO-8601 (raw if out of range), bytes as hex"""
+    out = {}
+    for name, val in zip(MBFILE_COLUMNS, record):
+        if val is None:
+            continue
+        if name in MBFILE_TIMESTAMPS:
+            try:
+                val = datetime.fromtimestamp(val, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            except (OverflowError, OSError, ValueError, TypeError):
+                pass  # corrupt or out-of-range time: keep the raw value
+        elif isinstance(val, bytes):
+            val = val.hex()
+        out[name] = val
+    return out
@@ -0,0 +1,479 @@
+"""
+Media Metadata Module
+Reads EXIF (JPEG/PNG) and QuickTime atoms (MP4/MOV) natively and hands
+everything else to a pool of long-lived ``exiftool -stay_open`` workers fed
+in batches, storing one row per file in the session SQLite
+"""
+
+import json
+import queue
+import re
+import shutil
+import struct
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from .session_db import connect, write_chunks
+
+BATCH_SIZE = 200
+
+# Column order of the media_metadata table (see session_db)
+MEDIA_COLUMNS = ("path", "kind", "source", "width", "height", "created", "make", "model",
+                 "software", "latitude", "longitude", "duration", "quality", "tags", "error")
+
+# --- EXIF / TIFF ---------------------------------------------------------
+
+_TIFF_TYPES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+IFD0_TAGS = {0x010F: "Make", 0x0110: "Model", 0x0112: "Orientation", 0x0131: "Software",
+             0x0132: "ModifyDate", 0x013B: "Artist"}
+EXIF_TAGS = {0x9003: "DateTimeOriginal", 0x9004: "CreateDate", 0x9010: "OffsetTime",
+             0x9011: "OffsetTimeOriginal", 0xA002: "ExifImageWidth", 0xA003: "ExifImageHeight",
+             0xA420: "ImageUniqueID", 0xA433: "LensMake", 0xA434: "LensModel"}
+GPS_TAGS = {0x0001: "GPSLatitudeRef", 0x0002: "GPSLatitude", 0x0003: "GPSLongitudeRef",
+            0x0004: "GPSLongitude", 0x0006: "GPSAltitude", 0x0007: "GPSTimeStamp",
+            0x001D: "GPSDateStamp"}
+
+
+def _tiff_value(data, bo, typ, count, raw, base):
+    size = _TIFF_TYPES.get(typ)
+    if size is None:
+        return None
+    total = size * count
+    if total > 4:
+        off = base + struct.unpack(bo + "I", raw)[0]
+        raw = data[off:off + total]
+        if len(raw) < total:
+            return None
+    if typ == 2:
+        return raw[:total].split(b"\x00", 1)[0].decode("utf-8", "replace").strip()
+    if typ in (1, 7):
+        return raw[:total]
+    if typ in (5, 10):
+        fmt = bo + ("II" if typ == 5 else "ii") * count
+        nums = struct.unpack(fmt, raw[:total])
+        vals = [n / d if d else None for n, d in zip(nums[::2], nums[1::2])]
+    else:
+        fmt = bo + {3: "H", 4: "I", 9: "i"}[typ] * count
+        vals = list(struct.unpack(fmt, raw[:total]))
+    return vals[0] if count == 1 else vals
+
+
+def _read_ifd(data, bo, offset, base, names, tags, pointers=()):
+    """Collect named tags from one IFD into ``tags``; returns {pointer tag: offset}"""
+    found = {}
+    start = base + offset
+    if start + 2 > len(data):
+        return found
+    (n,) = struct.unpack(bo + "H", data[start:start + 2])
+    for i in range(n):
+        entry = data[start + 2 + 12 * i:start + 14 + 12 * i]
+        if len(entry) < 12:
+            break
+        tag, typ, count = struct.unpack(bo + "HHI", entry[:8])
+        if tag in pointers:
+            found[tag] = struct.unpack(bo + "I", entry[8:])[0]
+        elif tag in names:
+            value = _tiff_value(data, bo, typ, count, entry[8:], base)
+            if value is not None and not isinstance(value, bytes):
+                tags[names[tag]] = value
+    return found
+
+
+def parse_tiff(data, base=0):
+    """Named IFD0/Exif/GPS tags from a TIFF structure (the payload of an Exif APP1)"""
+    tags = {}
+    if data[base:base + 2] == b"II":
+        bo = "<"
+    elif data[base:base + 2] == b"MM":
+        bo = ">"
+    else:
+        return tags
+    (ifd0,) = struct.unpack(bo + "I", data[base + 4:base + 8])
+    ptrs = _read_ifd(data, bo, ifd0, base, IFD0_TAGS, tags, pointers=(0x8769, 0x8825))
+    if 0x8769 in ptrs:
+        _read_ifd(data, bo, ptrs[0x8769], base, EXIF_TAGS, tags)
+    if 0x8825 in ptrs:
+        _read_ifd(data, bo, ptrs[0x8825], base, GPS_TAGS, tags)
+    return tags
+
+
+def _dms(value, ref):
+    if not isinstance(value, list) or len(value) != 3 or None in value:
+        return None
+    dec = value[0] + value[1] / 60 + value[2] / 3600
+    return -dec if ref in ("S", "W") else dec
+
+
+def _exif_datetime(value):
+    try:
+        return datetime.strptime(value, "%Y:%m:%d %H:%M:%S").isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+# Standard IJG luminance quantisation table (quality 50)
+_STD_LUMA = (16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+             14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+             18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+             49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99)
+
+
+def _jpeg_quality(table):
+    """IJG quality estimate from a luminance quantisation table, as identify reports it"""
+    scale = sum(table) * 100 / sum(_STD_LUMA)
+    quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return max(1, min(100, round(quality)))
+
+
+def jpeg_info(fh):
+    info, tags = {}, {}
+    if fh.read(2) != b"\xff\xd8":
+        raise ValueError("not a JPEG")
+    while True:
+        marker = fh.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            break
+        code = marker[1]
+        if code in (0xD9, 0xDA):
+            break
+        if 0xD0 <= code <= 0xD7 or code == 0x01:
+            continue
+        (length,) = struct.unpack(">H", fh.read(2))
+        seg = fh.read(length - 2)
+        if code == 0xE1 and seg.startswith(b"Exif\x00\x00"):
+            tags.update(parse_tiff(seg, 6))
+        elif code == 0xDB and "quality" not in info:
+            # First table of the segment; 8-bit precision, id 0 = luminance
+            if seg and seg[0] == 0 and len(seg) >= 65:
+                info["quality"] = _jpeg_quality(seg[1:65])
+        elif code in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+            if len(seg) >= 5:
+                info["height"], info["width"] = struct.unpack(">HH", seg[1:5])
+    return info, tags
+
+
+def png_info(fh):
+    info, tags = {}, {}
+    if fh.read(8) != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("not a PNG")
+    while True:
+        head = fh.read(8)
+        if len(head) < 8:
+            break
+        length, ctype = struct.unpack(">I4s", head)
+        if ctype == b"IDAT" or ctype == b"IEND":
+            break
+        data = fh.read(length)
+        fh.seek(4, 1)
+        if ctype == b"IHDR":
+            info["width"], info["height"] = struct.unpack(">II", data[:8])
+        elif ctype == b"eXIf":
+            tags.update(parse_tiff(data))
+        elif ctype == b"tEXt" and b"\x00" in data:
+            key, value = data.split(b"\x00", 1)
+            tags[key.decode("latin-1")] = value.decode("latin-1")
+    return info, tags
+
+
+# --- QuickTime / ISO BMFF ------------------------------------------------
+
+_QT_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+_QT_CONTAINERS = {b"moov", b"trak", b"mdia", b"udta", b"meta"}
+_ISO6709 = re.compile(r"([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)")
+
+QT_KEY_TAGS = {"com.apple.quicktime.location.ISO6709": "GPSCoordinates",
+               "com.apple.quicktime.creationdate": "CreationDate",
+               "com.apple.quicktime.make": "Make", "com.apple.quicktime.model": "Model",
+               "com.apple.quicktime.software": "Software"}
+
+
+def _atoms(fh, end):
+    """Yield (type, payload start, payload end) for the atoms between here and ``end``"""
+    while fh.tell() + 8 <= end:
+        start = fh.tell()
+        size, typ = struct.unpack(">I4s", fh.read(8))
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", fh.read(8))
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return
+        yield typ, start + header, min(start + size, end)
+        fh.seek(start + size)
+
+
+def _qt_meta(fh, start, end, tags):
+    """Apple 'mdta' keys/ilst pairs inside a meta atom"""
+    fh.seek(start)
+    # ISO meta is a full box (4 bytes version/flags); QuickTime meta is not
+    if fh.read(8)[4:8] != b"hdlr":
+        start += 4
+    keys, items = [], {}
+    fh.seek(start)
+    for typ, s, e in list(_atoms(fh, end)):
+        fh.seek(s)
+        if typ == b"keys":
+            _, count = struct.unpack(">II", fh.read(8))
+            for _ in range(count):
+                size, _ns = struct.unpack(">I4s", fh.read(8))
+                keys.append(fh.read(size - 8).decode("utf-8", "replace"))
+        elif typ == b"ilst":
+            for idx, s2, e2 in list(_atoms(fh, e)):
+                fh.seek(s2)
+                for dtyp, s3, e3 in list(_atoms(fh, e2)):
+                    if dtyp == b"data":
+                        fh.seek(s3 + 8)
+                        items[struct.unpack(">I", idx)[0]] = fh.read(e3 - s3 - 8)
+    for i, key in enumerate(keys, 1):
+        if key in QT_KEY_TAGS and i in items:
+            tags[QT_KEY_TAGS[key]] = items[i].decode("utf-8", "replace")
+
+
+def _qt_walk(fh, end, info, tags):
+    for typ, s, e in list(_atoms(fh, end)):
+        fh.seek(s)
+        if typ == b"ftyp":
+            tags["MajorBrand"] = fh.read(4).decode("latin-1").strip()
+        elif typ == b"mvhd":
+            (version,) = struct.unpack(">B3x", fh.read(4))
+            if version == 1:
+                created, _, scale, duration = struct.unpack(">QQIQ", fh.read(28))
+            else:
+                created, _, scale, duration = struct.unpack(">IIII", fh.read(16))
+            if created:
+                tags["CreateDate"] = (_QT_EPOCH + timedelta(seconds=created)).isoformat()
+            if scale:
+                info["duration"] = duration / scale
+        elif typ == b"tkhd":
+            (version,) = struct.unpack(">B3x", fh.read(4))
+            fh.seek(s + (88 if version == 1 else 76))
+            w, h = struct.unpack(">II", fh.read(8))
+            if w and h and "width" not in info:
+                info["width"], info["height"] = w >> 16, h >> 16
+        elif typ == b"\xa9xyz":
+            length = struct.unpack(">H", fh.read(2))[0]
+            fh.read(2)
+            tags.setdefault("GPSCoordinates", fh.read(length).decode("utf-8", "replace"))
+        elif typ == b"meta":
+            _qt_meta(fh, s, e, tags)
+        elif typ in _QT_CONTAINERS:
+            _qt_walk(fh, e, info, tags)
+
+
+def quicktime_info(fh):
+    info, tags = {}, {}
+    fh.seek(0, 2)
+    end = fh.tell()
+    fh.seek(0)
+    if fh.read(8)[4:8] not in (b"ftyp", b"moov", b"mdat", b"wide", b"free", b"skip"):
+        raise ValueError("not a QuickTime/MP4 file")
+    fh.seek(0)
+    _qt_walk(fh, end, info, tags)
+    return info, tags
+
+
+# Kinds parsed in-process; anything else goes to exiftool
+_NATIVE = {"jpeg": jpeg_info, "png": png_info, "mp4": quicktime_info,
+           "mov": quicktime_info, "m4a": quicktime_info}
+
+
+def _coords(value):
+    """(lat, lon) from ISO 6709 ('+37.3318-122.0312/') or exiftool -n ('37.3318 -122.0312 10')"""
+    m = _ISO6709.match(value.strip())
+    if m:
+        return float(m.group(1)), float(m.group(2))
+    try:
+        lat, lon = value.split()[:2]
+        return float(lat), float(lon)
+    except ValueError:
+        return None, None
+
+
+def _row(path, kind, source, info, tags, error=None):
+    """One MEDIA_COLUMNS tuple from parser/exiftool output"""
+    lat = lon = None
+    if isinstance(tags.get("GPSCoordinates"), str):
+        lat, lon = _coords(tags["GPSCoordinates"])
+    else:
+        lat = _dms(tags.get("GPSLatitude"), tags.get("GPSLatitudeRef"))
+        lon = _dms(tags.get("GPSLongitude"), tags.get("GPSLongitudeRef"))
+        if isinstance(tags.get("GPSLatitude"), float):
+            lat, lon = tags["GPSLatitude"], tags.get("GPSLongitude")
+    created = tags.get("DateTimeOriginal") or tags.get("CreationDate") or tags.get("CreateDate")
+    created = _exif_datetime(created) or created
+    return (path, kind, source,
+            info.get("width", tags.get("ExifImageWidth", tags.get("ImageWidth"))),
+            info.get("height", tags.get("ExifImageHeight", tags.get("ImageHeight"))),
+            str(created) if created is not None else None,
+            tags.get("Make"), tags.get("Model"), tags.get("Software"), lat, lon,
+            info.get("duration", tags.get("Duration")), info.get("quality"),
+            json.dumps(tags, default=str), error)
+
+
+def native_metadata(path, kind):
+    """MEDIA_COLUMNS tuple for one file, or None if it has to go to exiftool"""
+    parser = _NATIVE.get(kind)
+    if parser is None:
+        return None
+    try:
+        with open(path, "rb") as fh:
+            info, tags = parser(fh)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None  # unreadable or damaged: exiftool gets a try
+    return _row(path, kind, "native", info, tags)
+
+
+# --- exiftool -stay_open -------------------------------------------------
+
+class ExifTool:
+    """One ``exiftool -stay_open`` process; each ``execute`` is one batch of files"""
+
+    def __init__(self, executable="exiftool"):
+        self.proc = subprocess.Popen(
+            [executable, "-stay_open", "True", "-@", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+    def execute(self, *args):
+        self.proc.stdin.write(("\n".join(args) + "\n-execute\n").encode())
+        self.proc.stdin.flush()
+        out = bytearray()
+        while not out.rstrip().endswith(b"{ready}"):
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError("exiftool exited")
+            out += line
+        return bytes(out.rstrip()[:-len(b"{ready}")])
+
+    def metadata(self, paths):
+        """Parsed ``exiftool -j -n`` output for a batch of paths"""
+        out = self.execute("-j", "-n", "-q", "-q", "-charset", "filename=utf8", *paths)
+        return json.loads(out) if out.strip() else []
+
+    def close(self):
+        try:
+            self.proc.stdin.write(b"-stay_open\nFalse\n")
+            self.proc.stdin.flush()
+            self.proc.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+class ExifToolPool:
+    """``size`` exiftool processes shared by a thread pool, one batch per call"""
+
+    def __init__(self, size=4, executable="exiftool"):
+        self.size = max(1, size)
+        self.executable = executable
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if len(self._all) < self.size:  # also respawns after _release dropped a dead tool
+                    tool = ExifTool(self.executable)
+                    self._all.append(tool)
+                    return tool
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _release(self, tool, failed=False):
+        """Back to the pool, or dropped (and respawned on demand) if it died or failed mid-batch"""
+        if not failed and tool.proc.poll() is None:
+            self._idle.put(tool)
+            return
+        with self._lock:
+            self._all.remove(tool)
+        tool.close()
+
+    def metadata(self, paths):
+        tool = self._acquire()
+        try:
+            records = tool.metadata(paths)
+        except (RuntimeError, OSError):
+            self._release(tool, failed=True)
+            raise
+        self._release(tool)
+        return records
+
+    def close(self):
+        for tool in self._all:
+            tool.close()
+        self._all.clear()
+
+
+def exiftool_rows(pool, batch):
+    """MEDIA_COLUMNS tuples for a batch of (path, kind) via exiftool"""
+    kinds = dict(batch)
+    try:
+        records = pool.metadata([p for p, _ in batch])
+    except (RuntimeError, ValueError, OSError) as e:
+        return [_row(p, k, "exiftool", {}, {}, error=str(e)) for p, k in batch]
+    rows = []
+    for rec in records:
+        path = rec.pop("SourceFile", None)
+        if path in kinds:
+            rows.append(_row(path, kinds.pop(path), "exiftool", {}, rec))
+    rows.extend(_row(p, k, "exiftool", {}, {}, error="no output") for p, k in kinds.items())
+    return rows
+
+
+def extract(files, workers=4, batch_size=BATCH_SIZE, exiftool="exiftool", full=False):
+    """Yield MEDIA_COLUMNS tuples for (path, kind) pairs
+
+    Native parsing is tried first (unless ``full``); files it cannot handle
+    are sent to a pool of ``workers`` exiftool processes in batches. Without
+    exiftool those rows are kept with an error."""
+    executable = shutil.which(exiftool) if exiftool else None
+    pending = []
+    for path, kind in files:
+        row = None if full else native_metadata(path, kind)
+        if row is None:
+            pending.append((path, kind))
+        else:
+            yield row
+    if not pending:
+        return
+    if executable is None:
+        for path, kind in pending:
+            yield _row(path, kind, None, {}, {}, error="unsupported without exiftool")
+        return
+    pool = ExifToolPool(workers, executable)
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as ex:
+            # At most workers * 2 batches in flight, results in batch order
+            futures = deque()
+            for i in range(0, len(pending), batch_size):
+                futures.append(ex.submit(exiftool_rows, pool, pending[i:i + batch_size]))
+                if len(futures) >= pool.size * 2:
+                    yield from futures.popleft().result()
+            while futures:
+                yield from futures.popleft().result()
+    finally:
+        pool.close()
+
+
+def write_media(rows, session, batch_size=BATCH_SIZE):
+    """Upsert rows into the session's media_metadata table; returns the row count
+
+    Each batch is collected before its own short transaction, so exiftool
+    runs without the session's write lock held.
+    """
+    conn = connect(session)
+    count = write_chunks(conn, "media_metadata", MEDIA_COLUMNS, rows, batch_size, verb="INSERT OR REPLACE")
+    conn.close()
+    return count
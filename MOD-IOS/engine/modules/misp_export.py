@@ -0,0 +1,261 @@
+"""
+MISP Export Module
+Deduplicated indicators from the session database (bulk_extractor
+features) posted to MISP in bulk: attributes go in batches to
+/attributes/add/<event> over one aiohttp session with a bounded connection
+pool, a request rate limit and retries with backoff. Accepted values are
+recorded in misp_exported (and a created event in misp_events), so a rerun
+only sends what is still missing.
+"""
+
+import asyncio
+import json
+import random
+import time
+from itertools import islice
+
+from .session_db import CHUNK_ROWS, insert_rows
+
+BATCH_SIZE = 500
+CONCURRENCY = 4         # connections in the pool, and batches in flight
+RATE = 10.0             # requests per second
+RETRIES = 5
+TIMEOUT = 120
+PLACEHOLDER_KEY = "YOUR_API_KEY"
+
+# bulk_extractor feature -> (MISP type, category, to_ids)
+FEATURE_TYPES = {
+    "email": ("email", "Social network", False),
+    "url": ("url", "Network activity", True),
+    "domain": ("domain", "Network activity", True),
+    "ip": ("ip-dst", "Network activity", True),
+    "telephone": ("phone-number", "Person", False),
+    "ether": ("mac-address", "Network activity", False),
+}
+_CASE_INSENSITIVE = {"email", "domain", "mac-address"}
+EXPORTED_COLUMNS = ("type", "value", "event_id")
+
+
+class MispError(RuntimeError):
+    pass
+
+
+def settings(cfg, **overrides):
+    """Exporter settings from the ``misp`` config section; ``overrides`` that are not None win"""
+    misp = dict(cfg.get("misp", {}) or {})
+    misp.update({k: v for k, v in overrides.items() if v is not None})
+    return {
+        "url": str(misp.get("url") or "").rstrip("/"),
+        "apikey": misp.get("apikey"),
+        "event_id": misp.get("event_id"),
+        "verify_ssl": bool(misp.get("verify_ssl", True)),
+        "batch_size": int(misp.get("batch_size", BATCH_SIZE)),
+        "concurrency": int(misp.get("concurrency", CONCURRENCY)),
+        "rate": float(misp.get("rate", RATE)),
+        "retries": int(misp.get("retries", RETRIES)),
+    }
+
+
+def configured(opts):
+    return bool(opts["url"]) and bool(opts["apikey"]) and opts["apikey"] != PLACEHOLDER_KEY
+
+
+def normalize(misp_type, value):
+    value = value.strip()
+    return value.lower() if misp_type in _CASE_INSENSITIVE else value
+
+
+def iter_indicators(conn, chunk_rows=CHUNK_ROWS):
+    """Unique (type, category, to_ids, value) from carved_features, in first-seen order"""
+    features = list(FEATURE_TYPES)
+    sql = (f"SELECT feature, value FROM carved_features WHERE tool = 'bulk_extractor' "
+           f"AND feature IN ({', '.join('?' * len(features))}) AND value IS NOT NULL")
+    reader = conn.cursor()
+    reader.execute(sql, features)
+    seen = set()
+    while True:
+        rows = reader.fetchmany(chunk_rows)
+        if not rows:
+            break
+        for feature, value in rows:
+            misp_type, category, to_ids = FEATURE_TYPES[feature]
+            value = normalize(misp_type, value)
+            if value and (misp_type, value) not in seen:
+                seen.add((misp_type, value))
+                yield misp_type, category, to_ids, value
+
+
+def pending_indicators(conn, event_id):
+    """Indicators not yet accepted by ``event_id``, streamed"""
+    done = set(conn.execute("SELECT type, value FROM misp_exported WHERE event_id = ?", (str(event_id),)))
+    return (ind for ind in iter_indicators(conn) if (ind[0], ind[3]) not in done)
+
+
+def batched(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stored_event(conn, url, info):
+    row = conn.execute("SELECT event_id FROM misp_events WHERE url = ? AND info = ?", (url, info)).fetchone()
+    return row[0] if row else None
+
+
+def store_event(conn, url, info, event_id):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO misp_events (url, info, event_id) VALUES (?, ?, ?)",
+                     (url, info, str(event_id)))
+
+
+def attribute(indicator, comment=None):
+    misp_type, category, to_ids, value = indicator
+    attr = {"type": misp_type, "category": category, "value": value, "to_ids": to_ids, "distribution": 5}
+    if comment:
+        attr["comment"] = comment
+    return attr
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/``rate`` seconds apart"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _retry_after(headers, attempt):
+    try:
+        return max(0.0, float(headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+
+
+class MispClient:
+    """Async MISP REST client: one pooled aiohttp session, rate limited, with retries"""
+
+    def __init__(self, url, apikey, verify_ssl=True, concurrency=CONCURRENCY, rate=RATE, retries=RETRIES):
+        self.url = url.rstrip("/")
+        self.apikey = apikey
+        self.verify_ssl = verify_ssl
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.limiter = RateLimiter(rate)
+        self.session = None
+
+    async def __aenter__(self):
+        try:
+            import aiohttp
+        except ImportError:
+            raise MispError("aiohttp is not installed. Install with: pip install aiohttp")
+        self._aiohttp = aiohttp
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ssl=None if self.verify_ssl else False)
+        self.session = aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+            headers={"Authorization": self.apikey, "Accept": "application/json",
+                     "Content-Type": "application/json"})
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def post(self, path, payload):
+        """POST JSON; retries 429/5xx and connection errors, raises MispError otherwise"""
+        body = json.dumps(payload)
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait()
+            try:
+                async with self.session.post(self.url + path, data=body) as resp:
+                    text = await resp.text()
+                    if resp.status < 300:
+                        return json.loads(text) if text.strip() else {}
+                    if resp.status != 429 and resp.status < 500:
+                        raise MispError(f"{path}: HTTP {resp.status}: {text[:200]}")
+                    error, delay = f"HTTP {resp.status}", _retry_after(resp.headers, attempt)
+            except (self._aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error, delay = f"{type(e).__name__}: {e}", _retry_after({}, attempt)
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+        raise MispError(f"{path}: gave up after {self.retries + 1} attempts ({error})")
+
+    async def create_event(self, info):
+        data = await self.post("/events/add", {"Event": {"info": info, "distribution": 0,
+                                                         "threat_level_id": 4, "analysis": 0}})
+        try:
+            return str(data["Event"]["id"])
+        except (KeyError, TypeError):
+            raise MispError(f"/events/add: unexpected response {str(data)[:200]}")
+
+    async def add_attributes(self, event_id, attributes):
+        return await self.post(f"/attributes/add/{event_id}", attributes)
+
+
+async def export(conn, opts, info, comment=None, progress=None):
+    """Post pending indicators to ``opts['event_id']``, or to the session's event named ``info``
+
+    Without a configured event_id, the event created for ``info`` on this
+    server is kept in misp_events, so reruns and retries after a partial
+    failure add to it instead of opening a new one. Batches are filled
+    from the database as they are sent, ``concurrency`` in flight at a time;
+    each accepted batch is recorded in misp_exported as it completes and
+    ``progress(done)`` is told the running count. Returns {event_id, sent,
+    failed, errors}.
+    """
+    stats = {"event_id": None, "sent": 0, "failed": 0, "errors": []}
+    async with MispClient(opts["url"], opts["apikey"], opts["verify_ssl"], opts["concurrency"],
+                          opts["rate"], opts["retries"]) as client:
+        event_id = str(opts["event_id"]) if opts["event_id"] else stored_event(conn, opts["url"], info)
+        if event_id is None:
+            event_id = await client.create_event(info)
+            store_event(conn, opts["url"], info, event_id)
+        stats["event_id"] = event_id
+        in_flight = set()
+
+        async def send(batch):
+            try:
+                await client.add_attributes(event_id, [attribute(ind, comment) for ind in batch])
+            except MispError as e:
+                stats["failed"] += len(batch)
+                stats["errors"].append(str(e))
+                return
+            with conn:
+                insert_rows(conn, "misp_exported", EXPORTED_COLUMNS,
+                            ((ind[0], ind[3], event_id) for ind in batch), verb="INSERT OR IGNORE")
+            stats["sent"] += len(batch)
+            if progress:
+                progress(stats["sent"] + stats["failed"])
+
+        async def drain(limit):
+            nonlocal in_flight
+            while len(in_flight) > limit:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()  # anything but a rejected batch aborts the export
+
+        try:
+            for batch in batched(pending_indicators(conn, event_id), max(1, opts["batch_size"])):
+                await drain(client.concurrency - 1)
+                in_flight.add(asyncio.ensure_future(send(batch)))
+            await drain(0)
+        finally:
+            for task in in_flight:
+                task.cancel()
+    return stats
+
+
+def run_export(conn, opts, info, comment=None, progress=None):
+    return asyncio.run(export(conn, opts, info, comment, progress))
@@ -1,54 +1,61 @@
-u""
+"""
 Parse_Decode Integration Module
 Provides iOS backup parsing and decoding functionality
 """
 
-import sqlite3
 import pandas as pd
 import plistlib
-import json
-from datetime import datetime
 from pathlib import Path
-import hashlib
+from itertools import chain
+
+from .backup_cache import backup_cache_dir
+from .backup_summary import get_summary
+from .blob_decoder import decode_record_batch, iter_decoded
+from .config import get_categories
+from .domain_classifier import build_category_index
+from .geo import (GEO_DB, LOCATION_DB_NAMES, build_clusters, load_points, open_store, sqlite_points,
+                  store_ready)
+from .manifest_query import (FILE_COLUMNS, connect as connect_manifest, iter_files_by_category,
+                             iter_files_by_domain, iter_path_search)
+from .mbfile import MBFileError, decode_mbfile, mbfile_to_dict
+from .search_index import build_index, index_ready, open_index, search as search_index
+from .sqlite_browser import is_sqlite
+from .timestamps import normalize_timestamps
 
 class IOSBackupParser:
     """Enhanced iOS backup parser with Streamlit integration"""
     
-    def __init__(self, backup_path):
+    def __init__(self, backup_path, categories=None):
         self.backup_path = Path(backup_path)
         self.manifest_db = self.backup_path / "Manifest.db"
         self.conn = None
+        self.categories = categories
+        self._index_ready = False
+        self._search = None
+        self._geo = None
         
     def connect(self):
         """Connect to Manifest.db"""
         if self.manifest_db.exists():
-            self.conn = sqlite3.connect(str(self.manifest_db))
+            self.conn = connect_manifest(self.manifest_db)
             return True
         return False
     
     def get_backup_info(self):
-        """Get basic backup information"""
+        """Get basic backup information (from the stored backup summary)"""
+        summary = get_summary(self.backup_path)
         info = {
             'path': str(self.backup_path),
-            'manifest_exists': self.manifest_db.exists(),
-            'size_mb': sum(f.stat().st_size for f in self.backup_path.rglob('*') if f.is_file()) / (1024*1024)
+            'manifest_exists': summary['manifest_exists'],
+            'size_mb': summary['total_bytes'] / (1024*1024)
         }
-        
-        # Try to get device info from Info.plist
-        info_plist = self.backup_path / "Info.plist"
-        if info_plist.exists():
-            try:
-                with open(info_plist, 'rb') as f:
-                    plist_data = plistlib.load(f)
-                    info.update({
-                        'device_name': plist_data.get('Device Name', 'Unknown'),
-                        'ios_version': plist_data.get('Product Version', 'Unknown'),
-                        'serial_number': plist_data.get('Serial Number', 'Unknown'),
-                        'backup_date': plist_data.get('Last Backup Date', 'Unknown')
-                    })
-            except:
-                pass
-                
+        if (self.backup_path / "Info.plist").exists():
+            info.update({
+                'device_name': summary['device_name'] or 'Unknown',
+                'ios_version': summary['ios_version'] or 'Unknown',
+                'serial_number': summary['serial_number'] or 'Unknown',
+                'backup_date': summary['backup_date'] or 'Unknown'
+            })
         return info
     
     def list_tables(self):
@@ -60,70 +67,148 @@ class IOSBackupParser:
         df = pd.read_sql_query(query, self.conn)
         return df['name'].tolist()
     
+    def iter_files_by_domain(self, domain_keywords):
+        """Stream (fileID, domain, relativePath, flags) for domains containing any keyword"""
+        if not self.conn:
+            return iter(())
+        return iter_files_by_domain(self.conn, self.manifest_db, domain_keywords)
+    
     def get_files_by_domain(self, domain_keywords):
-        """Get files filtered by domain keywords"""
+        """Get files filtered by domain keywords (all matches)"""
+        return pd.DataFrame.from_records(self.iter_files_by_domain(domain_keywords), columns=FILE_COLUMNS)
+    
+    def search_paths(self, text):
+        """Files whose domain or relativePath contains ``text`` (trigram index)"""
         if not self.conn:
-            return pd.DataFrame()
+            return pd.DataFrame(columns=FILE_COLUMNS)
+        return pd.DataFrame.from_records(iter_path_search(self.conn, self.manifest_db, text), columns=FILE_COLUMNS)
+    
+    def build_search_index(self, strings=False, rebuild=False, workers=None, progress=None):
+        """Build the persistent full-text index (paths, plist keys/values, optional strings) once per backup"""
+        if not self.conn:
+            return False
+        if self._search is None:
+            self._search = open_index(self.manifest_db)
+        if rebuild or not self.has_search_index(strings):
+            build_index(self._search, self.conn, self.backup_path, strings=strings, workers=workers,
+                        progress=progress)
+        return True
+    
+    def has_search_index(self, strings=False):
+        """True if a complete search index (with strings, if asked) is already stored"""
+        if not self.conn:
+            return False
+        if self._search is None:
+            self._search = open_index(self.manifest_db)
+        return index_ready(self._search, strings)
+    
+    def search(self, query, limit=100, offset=0):
+        """Files matching a search query: substrings, ``word*`` prefixes, AND/OR/NOT, ``path:``-style columns"""
+        if not self.build_search_index():
+            return pd.DataFrame(columns=['fileID', 'domain', 'relativePath', 'snippet'])
+        return pd.DataFrame(search_index(self._search, query, limit, offset),
+                            columns=['fileID', 'domain', 'relativePath', 'snippet'])
+    
+    def build_category_index(self, rebuild=False):
+        """Classify every Files row once into the per-backup category index"""
+        if not self.conn:
+            return False
+        if self._index_ready and not rebuild:
+            return True
+        if self.categories is None:
+            self.categories = get_categories()
+        index_db = backup_cache_dir(self.manifest_db) / "categories.sqlite"
+        if not any(row[1] == "idx" for row in self.conn.execute("PRAGMA database_list")):
+            self.conn.execute("ATTACH DATABASE ? AS idx", (str(index_db),))
+        build_category_index(self.conn, self.categories, schema="idx", rebuild=rebuild)
+        self._index_ready = True
+        return True
+    
+    def iter_files_by_category(self, category):
+        """Stream files tagged with a configured category (indexed lookup)"""
+        if not self.build_category_index():
+            return iter(())
+        return iter_files_by_category(self.conn, category)
+    
+    def get_files_by_category(self, category):
+        """Get files tagged with a configured category (all matches)"""
+        return pd.DataFrame.from_records(self.iter_files_by_category(category), columns=FILE_COLUMNS)
+    
+    def iter_location_databases(self):
+        """(path, domain/relativePath) of SQLite files in the locations category or named like location caches"""
+        if not self.conn:
+            return
+        seen = set()
+        rows = chain(self.iter_files_by_category('locations'),
+                     *(iter_path_search(self.conn, self.manifest_db, name) for name in LOCATION_DB_NAMES))
+        for file_id, domain, rel, flags in rows:
+            if flags != 1 or file_id in seen:
+                continue
+            seen.add(file_id)
+            path = self.backup_path / file_id[:2] / file_id
+            if is_sqlite(path):
+                yield path, f"{domain}/{rel}"
+    
+    def geo_store(self):
+        """Per-backup geo points/clusters database in the backup cache"""
+        if self._geo is None:
+            self._geo = open_store(backup_cache_dir(self.manifest_db) / GEO_DB)
+        return self._geo
+    
+    def build_geo_index(self, rebuild=False, progress=None):
+        """Load coordinates from the backup's location databases and cluster them, once per backup"""
+        if not self.conn:
+            return False
+        store = self.geo_store()
+        if store_ready(store) and not rebuild:
+            return True
+        databases = list(self.iter_location_databases())
         
-        domain_filters = " OR ".join([f"LOWER(domain) LIKE '%{kw}%'" for kw in domain_keywords])
-        query = f"""
-        SELECT fileID, domain, relativePath, flags
-        FROM Files
-        WHERE {domain_filters}
-        LIMIT 1000
-        """
-        return pd.read_sql_query(query, self.conn)
+        def rows():
+            for i, (path, label) in enumerate(databases):
+                if progress:
+                    progress(i, len(databases), label)
+                yield from sqlite_points(path, label)
+        
+        load_points(store, rows())
+        build_clusters(store)
+        return True
     
     def decode_plist_blob(self, blob_data):
         """Decode plist blob data"""
+        try:
+            return mbfile_to_dict(decode_mbfile(blob_data))
+        except MBFileError:
+            pass
         try:
             plist_data = plistlib.loads(blob_data)
-            return self._convert_plist_timestamps(plist_data)
+            return normalize_timestamps(plist_data)
         except Exception as e:
             return {"error": str(e)}
     
-    def _convert_plist_timestamps(self, data):
-        """Convert plist timestamps to readable format"""
-        if isinstance(data, dict):
-            return {k: self._convert_plist_timestamps(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._convert_plist_timestamps(v) for v in data]
-        elif isinstance(data, (int, float)) and 946684800 < data < 4102444800:
-            try:
-                return datetime.utcfromtimestamp(data).isoformat() + "Z"
-            except:
-                return data
-        return data
-    
     def get_messages(self):
         """Extract message-related files"""
-        keywords = ['message', 'sms', 'imessage', 'chat']
-        return self.get_files_by_domain(keywords)
+        return self.get_files_by_category('messages')
     
     def get_photos(self):
         """Extract photo-related files"""
-        keywords = ['photo', 'image', 'camera', 'media']
-        return self.get_files_by_domain(keywords)
+        return self.get_files_by_category('photos')
     
     def get_locations(self):
         """Extract location-related files"""
-        keywords = ['location', 'gps', 'maps', 'position', 'corelocation']
-        return self.get_files_by_domain(keywords)
+        return self.get_files_by_category('locations')
     
     def get_contacts(self):
         """Extract contact-related files"""
-        keywords = ['contact', 'addressbook']
-        return self.get_files_by_domain(keywords)
+        return self.get_files_by_category('contacts')
     
     def get_crash_reports(self):
         """Extract crash report files"""
-        keywords = ['crash', 'crashreport', 'diagnostic', 'panic']
-        return self.get_files_by_domain(keywords)
+        return self.get_files_by_category('crash_reports')
     
     def get_app_activity(self):
         """Extract app activity files"""
-        keywords = ['app', 'install', 'uninstall', 'download', 'store']
-        return self.get_files_by_domain(keywords)
+        return self.get_files_by_category('app_activity')
     
     def get_file_inventory(self):
         """Get complete file inventory"""
@@ -137,7 +222,42 @@ class IOSBackupParser:
         """
         return pd.read_sql_query(query, self.conn)
     
+    def iter_decoded_inventory(self, batch_size=500, workers=None):
+        """Stream the complete inventory as flat MANIFEST_COLUMNS tuples, in order"""
+        if not self.conn:
+            return iter(())
+        
+        query = """
+        SELECT fileID, domain, relativePath, flags, file
+        FROM Files
+        ORDER BY domain, relativePath
+        """
+        return iter_decoded(self.conn, query, batch_size=batch_size, workers=workers,
+                            decoder=decode_record_batch)
+    
+    def get_file_records(self, columns=None, category=None, workers=None):
+        """Decoded Manifest records from the per-backup Parquet cache"""
+        if not self.conn:
+            return pd.DataFrame()
+        from .record_cache import ensure_manifest_cache, read_records
+        
+        path = ensure_manifest_cache(self, workers=workers)
+        file_ids = None
+        if category is not None:
+            self.build_category_index()
+            file_ids = [r[0] for r in self.conn.execute(
+                "SELECT fileID FROM idx.file_categories WHERE category = ?", (category,))]
+        return read_records(path, columns=columns, file_ids=file_ids).to_pandas()
+    
     def close(self):
         """Close database connection"""
+        if self._search is not None:
+            self._search.close()
+            self._search = None
+        if self._geo is not None:
+            self._geo.close()
+            self._geo = None
         if self.conn:
             self.conn.close()
+            self.conn = None
+            self._index_ready = False
@@ -0,0 +1,297 @@
+"""
+Plist View Module
+Lazy access to large plists for the dashboard: binary plists are read
+object by object through their offset table, containers are listed a page
+of children at a time, and a trigram index answers key/value searches
+"""
+
+import plistlib
+import sqlite3
+import struct
+from datetime import datetime, timedelta
+
+from .blob_decoder import safe_serialize
+
+BPLIST_MAGIC = b"bplist00"
+APPLE_EPOCH = datetime(2001, 1, 1)
+PREVIEW_CHARS = 200
+MAX_INDEX_NODES = 2_000_000
+MAX_DEPTH = 512
+
+
+class PlistFormatError(ValueError):
+    pass
+
+
+def is_plist(path):
+    """Binary or XML plist by content (covers .mapsdata and other suffixes)"""
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(64)
+    except OSError:
+        return False
+    return head.startswith(BPLIST_MAGIC) or (head.lstrip().startswith(b"<?xml") and b"plist" in head.lower()) \
+        or head.lstrip().startswith(b"<plist")
+
+
+class BinaryPlist:
+    """bplist00 reader that decodes only the objects asked for
+
+    Refs are object numbers from the offset table; containers are never
+    decoded past the child refs needed for the requested slice.
+    """
+
+    def __init__(self, data):
+        if not data.startswith(BPLIST_MAGIC) or len(data) < 40:
+            raise PlistFormatError("not a binary plist")
+        self.data = data
+        (self._offset_size, self._ref_size, self._count,
+         self.root, table) = struct.unpack(">6xBBQQQ", data[-32:])
+        if not (self._offset_size and self._ref_size) or self.root >= self._count \
+                or table + self._count * self._offset_size > len(data) - 32:
+            raise PlistFormatError("bad trailer")
+        self._table = table
+
+    def _offset(self, ref):
+        if not 0 <= ref < self._count:
+            raise PlistFormatError(f"object ref out of range: {ref}")
+        start = self._table + ref * self._offset_size
+        return int.from_bytes(self.data[start:start + self._offset_size], "big")
+
+    def _header(self, ref):
+        """(type nibble, length, start of payload)"""
+        off = self._offset(ref)
+        token = self.data[off]
+        kind, n = token & 0xF0, token & 0x0F
+        start = off + 1
+        if kind in (0x40, 0x50, 0x60, 0xA0, 0xC0, 0xD0) and n == 0xF:
+            size = 1 << (self.data[start] & 0x3)
+            n = int.from_bytes(self.data[start + 1:start + 1 + size], "big")
+            start += 1 + size
+        return kind, token, n, start
+
+    def _refs(self, start, count):
+        rs = self._ref_size
+        d = self.data
+        return [int.from_bytes(d[start + i * rs:start + (i + 1) * rs], "big") for i in range(count)]
+
+    def kind(self, ref):
+        """('dict' | 'array' | 'set', length) for containers, ('scalar', None) otherwise"""
+        kind, _, n, _ = self._header(ref)
+        name = {0xA0: "array", 0xC0: "set", 0xD0: "dict"}.get(kind)
+        return (name, n) if name else ("scalar", None)
+
+    def children(self, ref, start=0, stop=None):
+        """[(label, child ref)] for children ``start:stop`` of a container"""
+        kind, _, n, payload = self._header(ref)
+        stop = n if stop is None else min(stop, n)
+        start = max(0, min(start, stop))
+        if kind == 0xD0:
+            keys = self._refs(payload + start * self._ref_size, stop - start)
+            values = self._refs(payload + (n + start) * self._ref_size, stop - start)
+            return [(str(self.value(k)), v) for k, v in zip(keys, values)]
+        if kind in (0xA0, 0xC0):
+            refs = self._refs(payload + start * self._ref_size, stop - start)
+            return list(zip(range(start, stop), refs))
+        return []
+
+    def value(self, ref):
+        """Decoded scalar; containers come back as None (use children/to_python)"""
+        kind, token, n, start = self._header(ref)
+        d = self.data
+        if token == 0x00:
+            return None
+        if token == 0x08:
+            return False
+        if token == 0x09:
+            return True
+        if kind == 0x10:
+            size = 1 << n
+            return int.from_bytes(d[start:start + size], "big", signed=size >= 8)
+        if token == 0x22:
+            return struct.unpack(">f", d[start:start + 4])[0]
+        if token == 0x23:
+            return struct.unpack(">d", d[start:start + 8])[0]
+        if token == 0x33:
+            return APPLE_EPOCH + timedelta(seconds=struct.unpack(">d", d[start:start + 8])[0])
+        if kind == 0x40:
+            return bytes(d[start:start + n])
+        if kind == 0x50:
+            return d[start:start + n].decode("ascii", errors="replace")
+        if kind == 0x60:
+            return d[start:start + 2 * n].decode("utf-16-be", errors="replace")
+        if kind == 0x80:
+            return plistlib.UID(int.from_bytes(d[start:start + n + 1], "big"))
+        if kind in (0xA0, 0xC0, 0xD0):
+            return None
+        raise PlistFormatError(f"unknown object marker 0x{token:02x}")
+
+
+class TreePlist:
+    """Same interface over an already-loaded plist (XML, or binary plists the lazy reader rejects)"""
+
+    def __init__(self, obj):
+        self._objects = [obj]
+        self._refs = {}
+        self.root = 0
+
+    def _ref(self, parent, label, obj):
+        # Keyed by position, so paging back and forth hands out the same refs
+        key = (parent, label)
+        if key not in self._refs:
+            self._objects.append(obj)
+            self._refs[key] = len(self._objects) - 1
+        return self._refs[key]
+
+    def kind(self, ref):
+        obj = self._objects[ref]
+        if isinstance(obj, dict):
+            return "dict", len(obj)
+        if isinstance(obj, list):
+            return "array", len(obj)
+        return "scalar", None
+
+    def children(self, ref, start=0, stop=None):
+        obj = self._objects[ref]
+        if isinstance(obj, dict):
+            items = list(obj.items())[start:stop]
+            return [(str(k), self._ref(ref, k, v)) for k, v in items]
+        if isinstance(obj, list):
+            stop = len(obj) if stop is None else min(stop, len(obj))
+            return [(i, self._ref(ref, i, obj[i])) for i in range(start, stop)]
+        return []
+
+    def value(self, ref):
+        obj = self._objects[ref]
+        return None if isinstance(obj, (dict, list)) else obj
+
+
+def open_plist(path):
+    """BinaryPlist for bplist00 files, TreePlist otherwise; None if unparseable"""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if data.startswith(BPLIST_MAGIC):
+        try:
+            doc = BinaryPlist(data)
+            doc.kind(doc.root)
+            return doc
+        except (PlistFormatError, IndexError, struct.error):
+            pass
+    try:
+        return TreePlist(plistlib.loads(data))
+    except Exception:
+        return None
+
+
+def preview(doc, ref, chars=PREVIEW_CHARS):
+    """(type, display text) for one node without expanding it"""
+    kind, n = doc.kind(ref)
+    if kind != "scalar":
+        return kind, f"{n:,} item{'s' if n != 1 else ''}"
+    value = doc.value(ref)
+    # Hex of a large data blob is only needed up to the preview width
+    text = safe_serialize(value[:chars] if isinstance(value, bytes) else value)
+    text = "" if text is None else str(text)
+    if len(text) > chars:
+        text = text[:chars] + "…"
+    return type(value).__name__, text
+
+
+def to_python(doc, ref, max_nodes=10_000):
+    """JSON-safe subtree (via safe_serialize); raises ValueError past ``max_nodes``"""
+    budget = [max_nodes]
+
+    def build(r, ancestors):
+        budget[0] -= 1
+        if budget[0] < 0:
+            raise ValueError(f"subtree has more than {max_nodes} nodes")
+        kind, _ = doc.kind(r)
+        if kind == "scalar":
+            return safe_serialize(doc.value(r))
+        if r in ancestors:
+            return f"<cycle to object {r}>"
+        inner = ancestors | {r}
+        if kind == "dict":
+            return {k: build(c, inner) for k, c in doc.children(r)}
+        return [build(c, inner) for _, c in doc.children(r)]
+
+    return build(ref, frozenset())
+
+
+def _join(path, label):
+    return f"{path}/{label}" if path else str(label)
+
+
+class PlistIndex:
+    """In-memory trigram index of every key and scalar value in a plist
+
+    Each node is indexed once with its path and parent; a container reached
+    through several refs is only walked the first time.
+    """
+
+    def __init__(self, doc, progress=None, max_nodes=MAX_INDEX_NODES):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.execute("CREATE TABLE nodes (ref INTEGER, parent INTEGER, path TEXT, key TEXT, value TEXT)")
+        self.truncated = False
+        self.count = 0
+        rows = []
+        seen = set()
+        stack = [(doc.root, None, "", "", 0)]
+        while stack:
+            ref, parent, path, key, depth = stack.pop()
+            kind, n = doc.kind(ref)
+            value = None if kind != "scalar" else preview(doc, ref)[1]
+            rows.append((ref, parent, path, key, value))
+            self.count += 1
+            if len(rows) >= 50_000:
+                self._flush(rows)
+                if progress:
+                    progress(self.count, None, f"{self.count:,} nodes")
+            if self.count >= max_nodes:
+                self.truncated = True
+                break
+            if kind == "scalar" or ref in seen or depth >= MAX_DEPTH:
+                continue
+            seen.add(ref)
+            for label, child in reversed(doc.children(ref)):
+                stack.append((child, ref, _join(path, label), str(label), depth + 1))
+        self._flush(rows)
+        self.conn.execute("CREATE INDEX nodes_ref ON nodes (ref)")
+        self.conn.execute("CREATE VIRTUAL TABLE nodes_fts USING fts5(key, value, content='nodes', "
+                          "content_rowid='rowid', tokenize='trigram')")
+        self.conn.execute("INSERT INTO nodes_fts (nodes_fts) VALUES ('rebuild')")
+        self.conn.commit()
+
+    def _flush(self, rows):
+        self.conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?)", rows)
+        rows.clear()
+
+    def search(self, text, limit=200):
+        """[(ref, parent, path, key, value)] whose key or value contains ``text``
+
+        Trigram matching needs three characters; shorter terms fall back to a
+        scan of the node table.
+        """
+        text = text.strip()
+        if not text:
+            return []
+        if len(text) >= 3:
+            query = '"' + text.replace('"', '""') + '"'
+            sql = ("SELECT n.ref, n.parent, n.path, n.key, n.value FROM nodes_fts "
+                   "JOIN nodes n ON n.rowid = nodes_fts.rowid WHERE nodes_fts MATCH ? LIMIT ?")
+            return self.conn.execute(sql, (query, limit)).fetchall()
+        like = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self.conn.execute(
+            "SELECT ref, parent, path, key, value FROM nodes WHERE key LIKE ? ESCAPE '\\' "
+            "OR value LIKE ? ESCAPE '\\' LIMIT ?", (like, like, limit)).fetchall()
+
+    def lineage(self, ref):
+        """[(key, ref)] from the root down to container ``ref``, along the path it was indexed under"""
+        chain = []
+        while ref is not None and len(chain) <= MAX_DEPTH:
+            row = self.conn.execute("SELECT parent, key FROM nodes WHERE ref = ? LIMIT 1", (ref,)).fetchone()
+            if row is None:
+                break
+            chain.append((row[1], ref))
+            ref = row[0]
+        return chain[::-1]
@@ -0,0 +1,118 @@
+"""
+Record Cache Module
+Persists decoded Manifest.db records once per backup as compressed Parquet
+(keyed by the Manifest.db hash) and reads back only the columns asked for
+"""
+
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .backup_cache import backup_cache_dir
+from .blob_decoder import MANIFEST_COLUMNS, RECORD_FIELDS
+from .mbfile import MBFILE_TIMESTAMPS, MBFILE_TYPES
+
+CACHE_FILE = "manifest_records.v1.parquet"
+ROWS_PER_GROUP = 50000
+COMPRESSION = "zstd"
+
+_ARROW_TYPES = {int: pa.int64(), str: pa.string(), bytes: pa.binary()}
+
+MANIFEST_SCHEMA = pa.schema(
+    [
+        ("fileID", pa.string()),
+        ("domain", pa.string()),
+        ("relativePath", pa.string()),
+        ("flags", pa.int64()),
+    ]
+    + [
+        (name, pa.timestamp("s", tz="UTC") if name in MBFILE_TIMESTAMPS else _ARROW_TYPES[MBFILE_TYPES[name]])
+        for name in MANIFEST_COLUMNS[len(RECORD_FIELDS):]
+    ]
+)
+
+
+def cache_path(manifest_db):
+    """Location of the decoded-records cache for a Manifest.db"""
+    return backup_cache_dir(manifest_db) / CACHE_FILE
+
+
+def _to_batch(rows, schema):
+    """Transpose a list of row tuples into an Arrow record batch"""
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_timestamp(field.type):
+            arrays.append(pa.array(values, type=pa.int64()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(rows, path, schema, rows_per_group=ROWS_PER_GROUP):
+    """Stream row tuples into a compressed Parquet file (atomic replace); returns the row count"""
+    # A private temp name per writer, so concurrent rebuilds never share one
+    fd, tmp = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    count = 0
+    chunk = []
+    try:
+        with pq.ParquetWriter(tmp, schema, compression=COMPRESSION) as writer:
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= rows_per_group:
+                    writer.write_batch(_to_batch(chunk, schema))
+                    count += len(chunk)
+                    chunk = []
+            if chunk:
+                writer.write_batch(_to_batch(chunk, schema))
+                count += len(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return count
+
+
+def ensure_manifest_cache(parser, workers=None, rebuild=False):
+    """Decode the parser's Manifest.db into the cache unless already present"""
+    path = cache_path(parser.manifest_db)
+    if path.exists() and not rebuild:
+        return path
+    write_parquet(parser.iter_decoded_inventory(workers=workers), path, MANIFEST_SCHEMA)
+    return path
+
+
+def read_records(path, columns=None, file_ids=None, filters=None):
+    """
+    Memory-map a records file and return an Arrow table with only ``columns``.
+    ``file_ids`` restricts rows to those fileIDs; ``filters`` is passed to
+    pyarrow for row-group pruning.
+    """
+    wanted = None
+    if columns is not None:
+        wanted = list(columns)
+        if file_ids is not None and "fileID" not in wanted:
+            wanted.append("fileID")
+    table = pq.read_table(path, columns=wanted, filters=filters, memory_map=True)
+    if file_ids is not None:
+        table = table.filter(pc.is_in(table["fileID"], value_set=pa.array(list(file_ids), pa.string())))
+        if columns is not None and "fileID" not in columns:
+            table = table.drop(["fileID"])
+    return table
+
+
+def domain_summary(path):
+    """Files and bytes per domain, reading only the domain/Size columns"""
+    table = read_records(path, columns=["domain", "Size"])
+    grouped = table.group_by("domain").aggregate([("domain", "count"), ("Size", "sum")])
+    return pa.table({
+        "domain": grouped["domain"],
+        "files": grouped["domain_count"],
+        "bytes": grouped["Size_sum"],
+    })
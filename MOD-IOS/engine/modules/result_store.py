@@ -0,0 +1,125 @@
+"""
+Result Store Module
+Content-addressed store of per-file module outputs, so a new session only
+processes files whose content changed since an earlier run
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    module      TEXT NOT NULL,
+    sha1        TEXT NOT NULL,
+    session     TEXT,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (module, sha1)
+) WITHOUT ROWID;
+"""
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9._-]')
+
+
+def output_names(template_list, path):
+    """Expand registry output templates ({name}, {stem}, {safe}) for one input file"""
+    name = Path(path).name
+    fields = {'name': name, 'stem': Path(name).stem, 'safe': _UNSAFE.sub('_', name)}
+    return [t.format(**fields) for t in template_list]
+
+
+class ResultStore:
+    """SQLite index plus an objects/<module>/<sha1>/ tree of stored outputs"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.root / "results.sqlite"))
+        self.conn.executescript(STORE_SCHEMA)
+
+    def content_hash(self, path):
+        """SHA-1 of a file's content; unchanged (size, mtime) files are not re-read"""
+        path = Path(path)
+        st = path.stat()
+        key = str(path.resolve())
+        row = self.conn.execute(
+            "SELECT sha1 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (key, st.st_size, st.st_mtime_ns),
+        ).fetchone()
+        if row:
+            return row[0]
+        h = hashlib.sha1()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)",
+            (key, st.st_size, st.st_mtime_ns, digest),
+        )
+        return digest
+
+    def _object_dir(self, module, sha1):
+        return self.objects / module / sha1[:2] / sha1
+
+    def has(self, module, sha1):
+        return self.conn.execute(
+            "SELECT 1 FROM results WHERE module = ? AND sha1 = ?", (module, sha1)
+        ).fetchone() is not None
+
+    def restore(self, module, sha1, templates, path, out_dir):
+        """Copy stored outputs for ``sha1`` into ``out_dir`` under this file's names"""
+        src_dir = self._object_dir(module, sha1)
+        for i, dest_name in enumerate(output_names(templates, path)):
+            src = src_dir / str(i)
+            if not src.exists():
+                continue
+            dest = Path(out_dir) / dest_name
+            if src.is_dir():
+                shutil.copytree(src, dest, dirs_exist_ok=True)
+            else:
+                shutil.copy2(src, dest)
+
+    def record(self, module, sha1, templates, path, out_dir, session=None):
+        """Store whatever outputs the module produced for ``path`` (possibly none)"""
+        dest_dir = self._object_dir(module, sha1)
+        if dest_dir.exists():
+            shutil.rmtree(dest_dir)
+        dest_dir.mkdir(parents=True)
+        for i, name in enumerate(output_names(templates, path)):
+            src = Path(out_dir) / name
+            if src.is_dir():
+                shutil.copytree(src, dest_dir / str(i))
+            elif src.exists():
+                shutil.copy2(src, dest_dir / str(i))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (module, sha1, session, recorded_at) VALUES (?, ?, ?, ?)",
+            (module, sha1, session, time.time()),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def iter_files(root):
+    """Yield every regular file under ``root``"""
+    for dirpath, _, filenames in os.walk(root):
+        for fn in filenames:
+            p = os.path.join(dirpath, fn)
+            if os.path.isfile(p):
+                yield p
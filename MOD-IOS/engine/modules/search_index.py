@@ -0,0 +1,193 @@
+"""
+Search Index Module
+Persistent per-backup full-text index: one FTS5 trigram row per file with
+its domain, relativePath, plist keys and values and (optionally) printable
+strings, built once in the backup cache and queried with substring,
+prefix and boolean expressions
+"""
+
+import json
+import os
+import plistlib
+import re
+import sqlite3
+from functools import partial
+
+from .backup_cache import backup_cache_dir
+from .blob_decoder import iter_decoded
+from .file_discovery import KIND_GROUPS, kind_from_name, sniff_file
+from .manifest_query import MIN_TRIGRAM, fts_phrase
+
+SEARCH_DB = "search.sqlite"
+INDEX_VERSION = 1
+BATCH_SIZE = 500
+PLIST_MAX_BYTES = 8 << 20
+STRINGS_READ_BYTES = 4 << 20
+TEXT_MAX_CHARS = 64 << 10  # per column per file
+MIN_STRING = 6
+RESULT_LIMIT = 100
+
+SEARCH_COLUMNS = ("domain", "path", "key", "value", "text")
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    fileID UNINDEXED, domain, path, key, value, text, tokenize='trigram');
+CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+SEARCH_QUERY = """
+SELECT fileID, domain, path, snippet(search, -1, '[', ']', '…', 32)
+FROM search WHERE search MATCH ? LIMIT ? OFFSET ?
+"""
+
+# Media payloads hold no useful text for strings extraction
+_NO_STRINGS = frozenset(k for kinds in KIND_GROUPS.values() for k in kinds)
+_ASCII = re.compile(rb"[\x20-\x7e]{%d,}" % MIN_STRING)
+_UTF16 = re.compile(rb"(?:[\x20-\x7e]\x00){%d,}" % MIN_STRING)
+_TOKEN = re.compile(r'(?:\w+:)?"[^"]*"\*?|\(|\)|[^\s()]+')
+_OPERATORS = {"AND", "OR", "NOT"}
+
+
+def search_db(manifest_db):
+    return backup_cache_dir(manifest_db) / SEARCH_DB
+
+
+def _cap(parts):
+    text = "\n".join(parts)
+    return text[:TEXT_MAX_CHARS]
+
+
+def plist_text(path):
+    """(keys, scalar values) of a plist as newline-joined text; ("", "") if unreadable"""
+    keys, values = [], []
+    try:
+        if os.path.getsize(path) > PLIST_MAX_BYTES:
+            return "", ""
+        with open(path, "rb") as fh:
+            stack = [plistlib.load(fh)]
+    except Exception:
+        return "", ""
+    seen = set()
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            for k, v in obj.items():
+                k = str(k)
+                if k not in seen:
+                    seen.add(k)
+                    keys.append(k)
+                stack.append(v)
+        elif isinstance(obj, list):
+            stack.extend(obj)
+        elif isinstance(obj, (str, int, float)) and not isinstance(obj, bool):
+            values.append(str(obj))
+    return _cap(keys), _cap(values)
+
+
+def strings_text(path):
+    """Printable ASCII and UTF-16LE runs from the head of a file, like strings(1)"""
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read(STRINGS_READ_BYTES)
+    except OSError:
+        return ""
+    found = [m.decode("ascii") for m in _ASCII.findall(data)]
+    found += [m.decode("utf-16-le") for m in _UTF16.findall(data)]
+    return _cap(found)
+
+
+def extract_batch(root, strings, rows):
+    """Index rows for a batch of (fileID, domain, relativePath); runs in worker processes"""
+    out = []
+    for fid, domain, rel in rows:
+        path = os.path.join(root, fid[:2], fid)
+        keys = values = text = ""
+        kind = kind_from_name(rel or "")
+        if kind is None and os.path.exists(path):
+            kind = sniff_file(path)
+        if kind == "plist":
+            keys, values = plist_text(path)
+        if strings and kind not in _NO_STRINGS and os.path.exists(path):
+            text = strings_text(path)
+        out.append((fid, domain, rel, keys, values, text))
+    return out
+
+
+def _options(strings):
+    return json.dumps({"version": INDEX_VERSION, "strings": bool(strings)})
+
+
+def open_index(manifest_db):
+    conn = sqlite3.connect(str(search_db(manifest_db)), check_same_thread=False)
+    conn.executescript(SEARCH_SCHEMA)
+    return conn
+
+
+def index_ready(conn, strings=False):
+    """True if the stored index is complete and covers ``strings`` (a strings index also serves plain searches)"""
+    row = conn.execute("SELECT value FROM search_meta WHERE key = 'options'").fetchone()
+    if not row:
+        return False
+    stored = json.loads(row[0])
+    return stored.get("version") == INDEX_VERSION and (stored.get("strings") or not strings)
+
+
+def build_index(conn, manifest_conn, root, strings=False, workers=None, progress=None):
+    """(Re)build the index from Manifest.db Files rows; returns the number of files indexed"""
+    total = manifest_conn.execute("SELECT COUNT(*) FROM Files WHERE flags = 1").fetchone()[0]
+    query = "SELECT fileID, domain, relativePath FROM Files WHERE flags = 1"
+    decoder = partial(extract_batch, str(root), strings)
+    done = 0
+    with conn:
+        conn.execute("DELETE FROM search_meta")
+        conn.execute("DELETE FROM search")
+        batch = []
+        for row in iter_decoded(manifest_conn, query, batch_size=BATCH_SIZE, workers=workers, decoder=decoder):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                conn.executemany("INSERT INTO search (fileID, domain, path, key, value, text) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", batch)
+                done += len(batch)
+                batch.clear()
+                if progress:
+                    progress(done, total, f"{done:,}/{total:,} files")
+        conn.executemany("INSERT INTO search (fileID, domain, path, key, value, text) VALUES (?, ?, ?, ?, ?, ?)",
+                         batch)
+        done += len(batch)
+        conn.execute("INSERT INTO search(search) VALUES ('optimize')")
+        conn.execute("INSERT INTO search_meta (key, value) VALUES ('options', ?)", (_options(strings),))
+    return done
+
+
+def to_match(query):
+    """Translate a user query into an FTS5 MATCH expression
+
+    - words and "quoted phrases" match as substrings (at least 3 characters)
+    - ``word*`` matches a column that starts with ``word``
+    - ``AND``/``OR``/``NOT`` and parentheses combine terms; juxtaposition is AND
+    - ``domain:``, ``path:``, ``key:``, ``value:``, ``text:`` restrict a term to one column
+    Raises ValueError for terms the trigram index cannot answer.
+    """
+    parts = []
+    for token in _TOKEN.findall(query):
+        if token in ("(", ")") or token in _OPERATORS:
+            parts.append(token)
+            continue
+        column = None
+        head, sep, rest = token.partition(":")
+        if sep and head.lower() in SEARCH_COLUMNS and rest:
+            column, token = head.lower(), rest
+        prefix = token.endswith("*")
+        term = token.rstrip("*")
+        if term.startswith('"') and term.endswith('"') and len(term) >= 2:
+            term = term[1:-1]
+        if len(term) < MIN_TRIGRAM:
+            raise ValueError(f"Search terms need at least {MIN_TRIGRAM} characters: {term!r}")
+        expr = ("^ " if prefix else "") + fts_phrase(term)
+        parts.append(f"{column} : {expr}" if column else expr)
+    if not parts:
+        raise ValueError("Empty query")
+    return " ".join(parts)
+
+
+def search(conn, query, limit=RESULT_LIMIT, offset=0):
+    """[(fileID, domain, relativePath, snippet)] for files matching ``query`` (see to_match)"""
+    return conn.execute(SEARCH_QUERY, (to_match(query), limit, offset)).fetchall()
@@ -0,0 +1,314 @@
+"""
+Session Database Module
+The one schema for a session's session.sqlite (files, timeline, metadata,
+media, EXIF, carved artifacts, anomalies, geo points, MISP exports) plus
+bulk-load helpers: WAL journal, large executemany transactions and secondary indexes built after the load
+"""
+
+import re
+import sqlite3
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+SESSION_DB = "session.sqlite"
+CHUNK_ROWS = 50_000
+
+# Also used on its own for the per-backup geo store in the dashboard cache
+GEO_SCHEMA = """
+-- Coordinates from every source; cell is the Morton code (binary geohash)
+-- of the point's Web Mercator cell at the finest cluster zoom
+CREATE TABLE IF NOT EXISTS geo_points (
+    source    TEXT,
+    path      TEXT,
+    latitude  REAL NOT NULL,
+    longitude REAL NOT NULL,
+    ts        REAL,
+    label     TEXT,
+    cell      INTEGER NOT NULL
+);
+
+-- Pre-aggregated clusters per zoom level (cell >> 2 per level up)
+CREATE TABLE IF NOT EXISTS geo_clusters (
+    zoom      INTEGER NOT NULL,
+    cell      INTEGER NOT NULL,
+    n         INTEGER NOT NULL,
+    latitude  REAL NOT NULL,
+    longitude REAL NOT NULL,
+    PRIMARY KEY (zoom, cell)
+) WITHOUT ROWID;
+"""
+
+SESSION_SCHEMA = """
+-- Every file seen by discovery
+CREATE TABLE IF NOT EXISTS files (
+    path         TEXT NOT NULL,
+    size         INTEGER,
+    kind         TEXT,
+    domain       TEXT,
+    relativePath TEXT
+);
+
+-- One row per file; timestamps are Unix seconds, NULL/0 when unknown
+CREATE TABLE IF NOT EXISTS fs_timeline (
+    path    TEXT,
+    inode   TEXT,
+    mode    TEXT,
+    uid     INTEGER,
+    gid     INTEGER,
+    size    INTEGER,
+    atime   REAL,
+    mtime   REAL,
+    ctime   REAL,
+    crtime  REAL,
+    source  TEXT
+);
+
+-- Event view of fs_timeline (m/a/c/b, as mactime prints it)
+CREATE VIEW IF NOT EXISTS timeline AS
+    SELECT mtime AS ts, 'm' AS type, path, size, source FROM fs_timeline WHERE mtime > 0
+    UNION ALL SELECT atime, 'a', path, size, source FROM fs_timeline WHERE atime > 0
+    UNION ALL SELECT ctime, 'c', path, size, source FROM fs_timeline WHERE ctime > 0
+    UNION ALL SELECT crtime, 'b', path, size, source FROM fs_timeline WHERE crtime > 0;
+
+-- (file, field, value) triples from exiftool, ffprobe and media_metadata
+CREATE TABLE IF NOT EXISTS metadata (
+    filename TEXT NOT NULL,
+    field    TEXT NOT NULL,
+    value    TEXT,
+    source   TEXT
+);
+
+CREATE TABLE IF NOT EXISTS media_metadata (
+    path      TEXT PRIMARY KEY,
+    kind      TEXT,
+    source    TEXT,
+    width     INTEGER,
+    height    INTEGER,
+    created   TEXT,
+    make      TEXT,
+    model     TEXT,
+    software  TEXT,
+    latitude  REAL,
+    longitude REAL,
+    duration  REAL,
+    quality   INTEGER,
+    tags      TEXT,
+    error     TEXT
+);
+
+-- One row per file from exif_audit; dates are ISO-8601 as recorded (local
+-- time plus time_offset when the camera wrote one), tags is the full JSON
+CREATE TABLE IF NOT EXISTS exif (
+    path          TEXT PRIMARY KEY,
+    directory     TEXT,
+    file_type     TEXT,
+    mime_type     TEXT,
+    make          TEXT,
+    model         TEXT,
+    lens          TEXT,
+    software      TEXT,
+    date_original TEXT,
+    create_date   TEXT,
+    modify_date   TEXT,
+    time_offset   TEXT,
+    latitude      REAL,
+    longitude     REAL,
+    altitude      REAL,
+    width         INTEGER,
+    height        INTEGER,
+    orientation   INTEGER,
+    duration      REAL,
+    tags          TEXT,
+    error         TEXT
+);
+
+CREATE TABLE IF NOT EXISTS carve_sources (
+    sha1 TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (sha1, path)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS carve_map (
+    shard  TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    sha1   TEXT NOT NULL,
+    PRIMARY KEY (shard, offset)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS carved_features (
+    tool         TEXT NOT NULL,
+    feature      TEXT NOT NULL,
+    value        TEXT,
+    context      TEXT,
+    sha1         TEXT,
+    offset       INTEGER,
+    shard        TEXT,
+    shard_offset INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS anomalies (
+    rule     TEXT NOT NULL,
+    row_id   INTEGER NOT NULL,
+    path     TEXT,
+    "column" TEXT,
+    ts       REAL,
+    detail   TEXT
+);
+
+-- MISP event created per server and event info (backup ID), reused on reruns
+CREATE TABLE IF NOT EXISTS misp_events (
+    url      TEXT NOT NULL,
+    info     TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (url, info)
+) WITHOUT ROWID;
+
+-- Indicators accepted by a MISP event (misp_export resumes from here)
+CREATE TABLE IF NOT EXISTS misp_exported (
+    type     TEXT NOT NULL,
+    value    TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (event_id, type, value)
+) WITHOUT ROWID;
+""" + GEO_SCHEMA
+
+# Secondary indexes per table; dropped before and rebuilt after a bulk load
+SESSION_INDEXES = {
+    "files": [
+        "CREATE INDEX IF NOT EXISTS files_path ON files (path)",
+        "CREATE INDEX IF NOT EXISTS files_kind ON files (kind)",
+        "CREATE INDEX IF NOT EXISTS files_domain ON files (domain)",
+    ],
+    "fs_timeline": [
+        "CREATE INDEX IF NOT EXISTS fs_timeline_path ON fs_timeline (path)",
+        "CREATE INDEX IF NOT EXISTS fs_timeline_mtime ON fs_timeline (mtime)",
+    ],
+    "metadata": [
+        "CREATE INDEX IF NOT EXISTS metadata_field_filename ON metadata (field, filename)",
+        "CREATE INDEX IF NOT EXISTS metadata_field_value ON metadata (field, value)",
+    ],
+    "media_metadata": [
+        "CREATE INDEX IF NOT EXISTS media_metadata_kind ON media_metadata (kind)",
+        "CREATE INDEX IF NOT EXISTS media_metadata_gps ON media_metadata (latitude, longitude)",
+    ],
+    "exif": [
+        "CREATE INDEX IF NOT EXISTS exif_directory ON exif (directory)",
+        "CREATE INDEX IF NOT EXISTS exif_camera ON exif (make, model)",
+        "CREATE INDEX IF NOT EXISTS exif_software ON exif (software)",
+        "CREATE INDEX IF NOT EXISTS exif_date ON exif (date_original)",
+        "CREATE INDEX IF NOT EXISTS exif_gps ON exif (latitude, longitude)",
+    ],
+    "carved_features": [
+        "CREATE INDEX IF NOT EXISTS carved_features_value ON carved_features (feature, value)",
+        "CREATE INDEX IF NOT EXISTS carved_features_sha1 ON carved_features (sha1)",
+    ],
+    "geo_points": [
+        "CREATE INDEX IF NOT EXISTS geo_points_cell ON geo_points (cell)",
+        "CREATE INDEX IF NOT EXISTS geo_points_source ON geo_points (source)",
+    ],
+    "anomalies": [
+        "CREATE INDEX IF NOT EXISTS anomalies_rule ON anomalies (rule, ts)",
+        "CREATE INDEX IF NOT EXISTS anomalies_row ON anomalies (row_id)",
+        "CREATE INDEX IF NOT EXISTS anomalies_path ON anomalies (path)",
+    ],
+}
+
+
+# executescript() would commit the BEGIN IMMEDIATE, so the schema runs statement by statement
+_SCHEMA_STATEMENTS = [sql.strip() for sql in re.sub(r"--[^\n]*", "", SESSION_SCHEMA).split(";") if sql.strip()]
+_SCHEMA_OBJECTS = set(re.findall(r"CREATE (?:TABLE|VIEW) IF NOT EXISTS (\w+)", SESSION_SCHEMA))
+
+
+def session_db(session):
+    return Path(session) / SESSION_DB
+
+
+def connect(session):
+    """Open a session's database in WAL mode, creating the schema if any of it is missing
+
+    Tables and their indexes are only created here when absent, so opening
+    a session never needs the write lock another module may be holding.
+    """
+    conn = sqlite3.connect(str(session_db(session)), timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if _missing(conn):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            missing = _missing(conn)  # re-checked under the lock
+            for sql in _SCHEMA_STATEMENTS:
+                conn.execute(sql)
+            for table in missing:
+                build_indexes(conn, table)
+    return conn
+
+
+def _missing(conn):
+    present = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    return _SCHEMA_OBJECTS - present
+
+
+def _index_name(sql):
+    return sql.split(" ON ")[0].split()[-1]
+
+
+def drop_indexes(conn, table):
+    for sql in SESSION_INDEXES.get(table, ()):
+        conn.execute(f"DROP INDEX IF EXISTS {_index_name(sql)}")
+
+
+def build_indexes(conn, table):
+    for sql in SESSION_INDEXES.get(table, ()):
+        conn.execute(sql)
+
+
+def insert_rows(conn, table, columns, rows, chunk=CHUNK_ROWS, verb="INSERT"):
+    """executemany ``rows`` into ``table`` ``chunk`` rows at a time; returns the count"""
+    cols = ", ".join(f'"{c}"' for c in columns)
+    sql = f'{verb} INTO {table} ({cols}) VALUES ({", ".join("?" * len(columns))})'
+    count = 0
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= chunk:
+            conn.executemany(sql, buf)
+            count += len(buf)
+            buf.clear()
+    if buf:
+        conn.executemany(sql, buf)
+        count += len(buf)
+    return count
+
+
+def write_chunks(conn, table, columns, rows, chunk=CHUNK_ROWS, verb="INSERT"):
+    """insert_rows with a commit every ``chunk`` rows; returns the count
+
+    Each chunk is pulled from ``rows`` before its transaction starts, so a
+    slow producer (external tools, decoding) never runs while this
+    connection holds the session's write lock.
+    """
+    rows = iter(rows)
+    count = 0
+    while True:
+        batch = list(islice(rows, chunk))
+        if not batch:
+            return count
+        with conn:
+            count += insert_rows(conn, table, columns, batch, chunk, verb)
+
+
+@contextmanager
+def bulk_load(conn, *tables):
+    """One write transaction with ``tables``' secondary indexes dropped, rebuilt on success
+
+    The drops are part of the transaction (other connections keep seeing
+    the indexes), but the write lock is held throughout: only insert rows
+    that are already extracted, and use write_chunks for slow producers.
+    """
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for table in tables:
+            drop_indexes(conn, table)
+        yield conn
+        for table in tables:
+            build_indexes(conn, table)
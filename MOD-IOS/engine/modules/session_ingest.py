@@ -0,0 +1,109 @@
+"""
+Session Ingest Module
+Loads module outputs left in a session directory (discovery list, fls
+bodyfile, ffprobe NDJSON, exif and media_metadata tags) into the
+session database so consumers query one store instead of text files
+"""
+
+import csv
+import json
+from pathlib import Path
+
+from .file_discovery import DISCOVERY_DIR, MANIFEST_FILE
+from .session_db import write_chunks
+from .video_probe import iter_ndjson
+
+FILES_COLUMNS = ("path", "size", "kind", "domain", "relativePath")
+TIMELINE_COLUMNS = ("path", "inode", "mode", "uid", "gid", "size", "atime", "mtime", "ctime", "crtime", "source")
+METADATA_COLUMNS = ("filename", "field", "value", "source")
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def discovery_rows(session):
+    path = Path(session) / DISCOVERY_DIR / MANIFEST_FILE
+    if not path.exists():
+        return
+    with open(path, newline="") as fh:
+        reader = csv.reader(fh, delimiter="\t")
+        next(reader, None)
+        for p, size, kind, domain, rel in reader:
+            yield p, _int(size), kind, domain or None, rel or None
+
+
+def bodyfile_rows(path, source="fls"):
+    """fs_timeline rows from a TSK bodyfile (MD5|name|inode|mode|UID|GID|size|atime|mtime|ctime|crtime)"""
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            parts = line.rstrip("\n").split("|")
+            if len(parts) < 11:
+                continue
+            # Names may contain '|'; the other fields never do
+            name = "|".join(parts[1:len(parts) - 9])
+            inode, mode, uid, gid, size, atime, mtime, ctime, crtime = parts[-9:]
+            yield (name, inode, mode, _int(uid), _int(gid), _int(size),
+                   _int(atime), _int(mtime), _int(ctime), _int(crtime), source)
+
+
+def _flatten(value, prefix=""):
+    """Yield (dotted key, scalar) pairs from nested dicts/lists"""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from _flatten(v, f"{prefix}{k}.")
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from _flatten(v, f"{prefix}{i}.")
+    else:
+        yield prefix[:-1], value
+
+
+def ffprobe_rows(path, source="ffprobe"):
+    for rec in iter_ndjson(path):
+        name = rec.pop("path", None)
+        for field, value in _flatten(rec):
+            yield name, field, None if value is None else str(value), source
+
+
+def media_tag_rows(conn, source="media_metadata"):
+    for path, tags in conn.execute("SELECT path, tags FROM media_metadata WHERE tags IS NOT NULL"):
+        for field, value in _flatten(json.loads(tags)):
+            yield path, field, None if value is None else str(value), source
+
+
+def exif_tag_rows(conn, source="exiftool"):
+    for path, tags in conn.execute("SELECT path, tags FROM exif WHERE tags IS NOT NULL"):
+        for field, value in _flatten(json.loads(tags)):
+            yield path, field, None if value is None else str(value), source
+
+
+def _replace(conn, table, columns, rows, source=None):
+    """Delete ``table``'s rows (of ``source``), then stream ``rows`` in with a commit per chunk"""
+    with conn:
+        if source is None:
+            conn.execute(f"DELETE FROM {table}")
+        else:
+            conn.execute(f"DELETE FROM {table} WHERE source = ?", (source,))
+    return write_chunks(conn, table, columns, rows)
+
+
+def ingest_session(conn, session, backid):
+    """Load whatever outputs exist in ``session``, streamed per source in short transactions; returns {what: rows}"""
+    session = Path(session)
+    counts = {}
+    if (session / DISCOVERY_DIR / MANIFEST_FILE).exists():
+        counts["files"] = _replace(conn, "files", FILES_COLUMNS, discovery_rows(session))
+    body = session / "fs_timeline" / f"{backid}.body"
+    if body.exists():
+        counts["fs_timeline"] = _replace(conn, "fs_timeline", TIMELINE_COLUMNS, bodyfile_rows(body), "fls")
+    counts["metadata:exiftool"] = _replace(conn, "metadata", METADATA_COLUMNS, exif_tag_rows(conn), "exiftool")
+    probe = session / "ffprobe" / f"{backid}_ffprobe.ndjson"
+    if probe.exists():
+        counts["metadata:ffprobe"] = _replace(conn, "metadata", METADATA_COLUMNS, ffprobe_rows(probe), "ffprobe")
+    counts["metadata:media_metadata"] = _replace(conn, "metadata", METADATA_COLUMNS,
+                                                 media_tag_rows(conn), "media_metadata")
+    return counts
@@ -0,0 +1,218 @@
+"""
+SQLite Browser Module
+Read-only, paged access to evidence databases (sms.db, healthdb.sqlite, ...):
+databases are opened through a mode=ro/immutable URI, filters and sorting
+run in SQL and pages are fetched by keyset, so no table is loaded whole
+"""
+
+import sqlite3
+from pathlib import Path
+from urllib.parse import quote
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+PAGE_SIZE = 100
+CELL_PREVIEW = 64  # bytes of a BLOB shown as hex
+
+# Filter operators: (SQL template, value transform); LIKE patterns escape % and _
+OPERATORS = {
+    "contains": ("{col} LIKE ? ESCAPE '\\'", lambda v: f"%{_like_escape(v)}%"),
+    "starts with": ("{col} LIKE ? ESCAPE '\\'", lambda v: f"{_like_escape(v)}%"),
+    "=": ("{col} = ?", None),
+    "!=": ("{col} != ?", None),
+    ">": ("{col} > ?", None),
+    "<": ("{col} < ?", None),
+    "is null": ("{col} IS NULL", None),
+    "is not null": ("{col} IS NOT NULL", None),
+}
+
+
+def _like_escape(value):
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def quote_ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def is_sqlite(path):
+    """True if the file starts with the SQLite header (covers .storedata and other suffixes)"""
+    try:
+        with open(path, "rb") as fh:
+            return fh.read(16) == SQLITE_MAGIC
+    except OSError:
+        return False
+
+
+def open_readonly(path):
+    """Read-only connection that never writes next to the evidence
+
+    immutable=1 skips locking and journal files entirely; it is only used when
+    no -wal sidecar exists, since immutable readers ignore the WAL.
+    """
+    path = Path(path).resolve()
+    params = "mode=ro"
+    if not Path(f"{path}-wal").exists():
+        params += "&immutable=1"
+    conn = sqlite3.connect(f"file:{quote(path.as_posix())}?{params}", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def list_tables(conn):
+    """[(name, type)] for user tables and views"""
+    return conn.execute(
+        "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY name").fetchall()
+
+
+def table_columns(conn, table):
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({quote_ident(table)})")]
+
+
+def indexed_columns(conn, table):
+    """Columns that lead an index (cheap to sort/filter on)"""
+    cols = set()
+    for idx in conn.execute(f"PRAGMA index_list({quote_ident(table)})").fetchall():
+        info = conn.execute(f"PRAGMA index_info({quote_ident(idx[1])})").fetchone()
+        if info and info[2]:
+            cols.add(info[2])
+    return cols
+
+
+def page_key(conn, table):
+    """Columns that identify a row for keyset paging
+
+    ``["rowid"]`` for ordinary tables, the primary key for WITHOUT ROWID
+    tables, None for views (those fall back to OFFSET paging).
+    """
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (table,)).fetchone()
+    if not row or row[0] != "table":
+        return None
+    try:
+        conn.execute(f"SELECT rowid FROM {quote_ident(table)} LIMIT 0")
+        return ["rowid"]
+    except sqlite3.OperationalError:
+        pk = sorted((r[5], r[1]) for r in conn.execute(f"PRAGMA table_info({quote_ident(table)})") if r[5])
+        return [name for _, name in pk] or None
+
+
+def estimate_rows(conn, table):
+    """(rows, exact) without scanning: sqlite_stat1 if ANALYZE ran, else MAX(rowid)"""
+    try:
+        row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row and row[0]:
+        return int(str(row[0]).split()[0]), False
+    if page_key(conn, table) == ["rowid"]:
+        # Walks down the rowid b-tree only; exact unless rows were deleted
+        n = conn.execute(f"SELECT MAX(rowid) FROM {quote_ident(table)}").fetchone()[0]
+        return n or 0, False
+    return None, False
+
+
+def _where(columns, filters):
+    """SQL and params for [(column, operator, value)]; columns must exist in the table"""
+    clauses, params = [], []
+    for col, op, value in filters or []:
+        if col not in columns:
+            raise ValueError(f"Unknown column: {col}")
+        template, transform = OPERATORS[op]
+        clauses.append(template.format(col=quote_ident(col)))
+        if "?" in template:
+            params.append(transform(value) if transform else value)
+    return clauses, params
+
+
+def count_rows(conn, table, filters=None):
+    """Exact COUNT(*), with filters applied"""
+    clauses, params = _where(table_columns(conn, table), filters)
+    sql = f"SELECT COUNT(*) FROM {quote_ident(table)}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def _after(sort, descending, key, cursor):
+    """Keyset predicate for rows after ``cursor`` = (sort value, *key values)
+
+    Rows are ordered by (sort, key...) ascending or descending; SQLite puts
+    NULLs first ascending and last descending, so NULL sort values need their
+    own branch.
+    """
+    gt = "<" if descending else ">"
+    key_sql = ", ".join(key)
+    key_marks = ", ".join("?" * len(key))
+    tail = f"({key_sql}) {gt} ({key_marks})" if len(key) > 1 else f"{key[0]} {gt} ?"
+    key_vals = list(cursor[1:])
+    if sort is None:
+        return tail, key_vals
+    s = quote_ident(sort)
+    value = cursor[0]
+    if value is None:
+        sql = f"({s} IS NULL AND {tail})"
+        if not descending:
+            sql = f"({sql} OR {s} IS NOT NULL)"
+        return sql, key_vals
+    sql = f"({s} {gt} ? OR ({s} = ? AND {tail})"
+    if descending:
+        sql += f" OR {s} IS NULL"
+    return sql + ")", [value, value] + key_vals
+
+
+def fetch_page(conn, table, sort=None, descending=False, filters=None, cursor=None,
+               offset=0, limit=PAGE_SIZE):
+    """One page of ``table``: returns (columns, rows, next_cursor)
+
+    ``next_cursor`` is passed back as ``cursor`` for the following page (None
+    when the table is exhausted). Views have no row key and page by ``offset``
+    instead; their next_cursor is the next offset.
+    """
+    columns = table_columns(conn, table)
+    if sort is not None and sort not in columns:
+        raise ValueError(f"Unknown column: {sort}")
+    clauses, params = _where(columns, filters)
+    key = page_key(conn, table)
+    direction = " DESC" if descending else ""
+    order = ([quote_ident(sort) + direction] if sort else [])
+    if key:
+        key_sql = [k if k == "rowid" else quote_ident(k) for k in key]
+        select = ", ".join(f"{k} AS __key{i}" for i, k in enumerate(key_sql))
+        order += [k + direction for k in key_sql]
+        if cursor is not None:
+            after, extra = _after(sort, descending, key_sql, cursor)
+            clauses.append(after)
+            params += extra
+        sql = f"SELECT {select}, * FROM {quote_ident(table)}"
+    else:
+        sql = f"SELECT * FROM {quote_ident(table)}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    if order:
+        sql += " ORDER BY " + ", ".join(order)
+    sql += " LIMIT ?"
+    params.append(limit + 1)  # one extra row tells whether another page exists
+    if not key:
+        sql += " OFFSET ?"
+        params.append(int(cursor or offset))
+    rows = conn.execute(sql, params).fetchmany(limit + 1)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not key:
+        return columns, rows, (int(cursor or offset) + limit if more else None)
+    nk = len(key)
+    next_cursor = None
+    if more and rows:
+        last = rows[-1]
+        sort_value = last[nk + columns.index(sort)] if sort else None
+        next_cursor = (sort_value, *last[:nk])
+    return columns, [r[nk:] for r in rows], next_cursor
+
+
+def display_cell(value, preview=CELL_PREVIEW):
+    """BLOBs as a size + hex prefix so pages stay printable"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        b = bytes(value)
+        suffix = "…" if len(b) > preview else ""
+        return f"<{len(b)} bytes> {b[:preview].hex()}{suffix}"
+    return value
@@ -0,0 +1,102 @@
+"""
+Timestamps Module
+Normalizes timestamps in decoded plists: one walk collects datetime leaves
+and numbers in a plausible date range, NumPy converts them in chunks (Unix and Cocoa epochs) to
+ISO-8601 UTC strings, and the strings are written back into the original
+dicts and lists instead of rebuilding the structure
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+UNIX_MIN = 946684800     # 2000-01-01
+UNIX_MAX = 4102444800    # 2100-01-01
+COCOA_EPOCH = 978307200  # 2001-01-01, zero of CFAbsoluteTime/NSDate
+COCOA_MIN = 157766400    # 2006-01-01 in Cocoa seconds
+CHUNK = 1 << 16
+
+
+def _iso(us):
+    """ISO-8601 UTC strings for int64 microseconds; whole seconds drop the fraction"""
+    stamps = us.astype("datetime64[us]")
+    out = np.datetime_as_string(stamps, unit="s", timezone="UTC")
+    frac = us % 1_000_000 != 0
+    if frac.any():
+        out = out.astype(object)
+        out[frac] = np.datetime_as_string(stamps[frac], unit="us", timezone="UTC")
+    return out.tolist()
+
+
+def _write(leaves, strings):
+    for (node, key, _), text in zip(leaves, strings):
+        node[key] = text
+
+
+def _flush_ints(leaves):
+    secs = np.array([leaf[2] for leaf in leaves], dtype="int64")
+    _write(leaves, _iso(secs * 1_000_000))
+
+
+def _flush_floats(leaves):
+    secs = np.array([leaf[2] for leaf in leaves], dtype="float64")
+    # CFAbsoluteTime is a double, so only floats are read as Cocoa seconds
+    secs = np.where(secs <= UNIX_MIN, secs + COCOA_EPOCH, secs)
+    whole = np.floor(secs)
+    us = whole.astype("int64") * 1_000_000 + np.round((secs - whole) * 1e6).astype("int64")
+    _write(leaves, _iso(us))
+
+
+def _flush_dates(leaves):
+    us = np.array([leaf[2] for leaf in leaves], dtype="datetime64[us]").astype("int64")
+    _write(leaves, _iso(us))
+
+
+def _flush(*buckets):
+    for flush, leaves in buckets:
+        if leaves:
+            flush(leaves)
+            leaves.clear()
+
+
+def normalize_timestamps(data, chunk=CHUNK):
+    """Replace timestamp leaves of a decoded plist in place; returns ``data``
+
+    - ints and floats in (2000, 2100) as Unix seconds
+    - floats in [2006, 2031] as Cocoa seconds (seconds since 2001-01-01)
+    - datetime objects (naive ones are UTC, as plistlib returns them)
+    all become ISO-8601 strings ending in "Z". The walk only range-checks
+    and collects (container, key, value) leaves; conversion runs on NumPy
+    arrays of up to ``chunk`` leaves. A scalar ``data`` is returned converted.
+    """
+    if not isinstance(data, (dict, list)):
+        box = [data]
+        normalize_timestamps(box, chunk)
+        return box[0]
+    ints, floats, dates = (_flush_ints, []), (_flush_floats, []), (_flush_dates, [])
+    add_int, add_float, add_date = ints[1].append, floats[1].append, dates[1].append
+    stack = [data]
+    push = stack.append
+    while stack:
+        node = stack.pop()
+        for key, value in (node.items() if isinstance(node, dict) else enumerate(node)):
+            kind = type(value)
+            if kind is int:  # the exact type check leaves bools alone
+                if UNIX_MIN < value < UNIX_MAX:
+                    add_int((node, key, value))
+            elif kind is float:
+                if COCOA_MIN <= value < UNIX_MAX:
+                    add_float((node, key, value))
+            elif kind is str:
+                continue
+            elif isinstance(value, (dict, list)):
+                push(value)
+            elif isinstance(value, datetime):
+                if value.tzinfo is not None:
+                    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+                add_date((node, key, value))
+        # Checked per container, so a chunk may overshoot by one node's leaves
+        if len(ints[1]) + len(floats[1]) + len(dates[1]) >= chunk:
+            _flush(ints, floats, dates)
+    _flush(ints, floats, dates)
+    return data
@@ -0,0 +1,84 @@
+"""
+Video Probe Module
+Runs ffprobe over many files from a worker pool and appends one JSON
+record per file (newline-delimited) so output can be streamed and an
+interrupted run resumed
+"""
+
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+FFPROBE_ARGS = ("-v", "quiet", "-print_format", "json", "-show_format", "-show_streams")
+
+
+def probe(path, ffprobe="ffprobe"):
+    """One record for ``path``: {"path", "format", "streams"} or {"path", "error"}"""
+    try:
+        proc = subprocess.run([ffprobe, *FFPROBE_ARGS, path],
+                              capture_output=True, timeout=300)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return {"path": path, "error": str(e)}
+    if proc.returncode != 0:
+        return {"path": path, "error": f"ffprobe exit {proc.returncode}"}
+    try:
+        data = json.loads(proc.stdout or b"{}")
+    except ValueError as e:
+        return {"path": path, "error": f"bad ffprobe output: {e}"}
+    return {"path": path, **data}
+
+
+def iter_ndjson(path):
+    """Yield records from an NDJSON file, one at a time; a torn last line is ignored"""
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with fh:
+        for line in fh:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def resume_point(path):
+    """Paths already recorded in ``path``; truncates a partially written last line
+
+    Damaged lines further up are skipped, not cut off: their paths are
+    probed again and everything recorded after them is kept.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    end = 0
+    with open(path, "rb") as fh:
+        for line in fh:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    if end != os.path.getsize(path):
+        os.truncate(path, end)
+    return done
+
+
+def probe_all(paths, out_path, workers=None, ffprobe="ffprobe"):
+    """Append a record per not-yet-probed path to ``out_path``; returns (new, skipped)"""
+    done = resume_point(out_path)
+    todo = [p for p in dict.fromkeys(paths) if p not in done]
+    workers = max(1, workers or os.cpu_count() or 1)
+    with open(out_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(probe, p, ffprobe) for p in todo]
+        for fut in as_completed(futures):
+            # Whole lines, flushed as they complete, so a crash loses at most one record
+            out.write(json.dumps(fut.result(), separators=(",", ":")) + "\n")
+            out.flush()
+    return len(todo), len(done)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+import argparse, os, subprocess, sys, threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from incremental import STORE_DIR, plan, record
+from modules.config import load_config, load_registry
+from modules.result_store import ResultStore
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES_DIR = ROOT / 'modules'
+
+def select_modules(cfg: dict, only: str = None) -> list:
+    """Modules to run, in config order; every modules/*.sh if config lists none"""
+    available = sorted(p.stem for p in MODULES_DIR.glob('*.sh'))
+    if only:
+        only = only.removesuffix('.sh')
+        if only not in available:
+            raise SystemExit(f'Unknown module: {only}')
+        return [only]
+    names = cfg.get('modules') or available
+    missing = [n for n in names if n not in available]
+    if missing:
+        print(f"[!] Not found in modules/: {', '.join(missing)}", file=sys.stderr)
+    return [n for n in names if n in available]
+
+def with_dependencies(names: list, registry: dict) -> list:
+    """Add (transitive) dependencies of the selected modules, dependencies first"""
+    out = []
+    def visit(n, seen=()):
+        if n in out or n in seen:
+            return
+        for d in registry.get(n, {}).get('depends_on', []):
+            visit(d, seen + (n,))
+        out.append(n)
+    for n in names:
+        visit(n)
+    return out
+
+def build_dag(names: list, registry: dict) -> dict:
+    """{module: set(dependencies)} among the selected modules; raises ValueError on a cycle
+
+    Both ``depends_on`` and ordering-only ``after`` entries count here"""
+    deps = {n: {d for key in ('depends_on', 'after') for d in registry.get(n, {}).get(key, []) if d in names}
+            for n in names}
+    remaining = {n: set(d) for n, d in deps.items()}
+    while remaining:
+        ready = [n for n, d in remaining.items() if not d]
+        if not ready:
+            raise ValueError(f"Dependency cycle among: {', '.join(sorted(remaining))}")
+        for n in ready:
+            del remaining[n]
+        for d in remaining.values():
+            d.difference_update(ready)
+    return deps
+
+class Scheduler:
+    """Runs module scripts in dependency order, up to ``jobs`` at a time"""
+
+    def __init__(self, input_dir: Path, session: Path, backid: str, jobs: int,
+                 registry: dict, incremental: bool = False):
+        self.input_dir, self.session, self.backid = input_dir, session, backid
+        self.jobs = max(1, jobs)
+        self.registry = registry
+        self.incremental = incremental
+        self.logs = session / 'logs'
+        self.logs.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # The result store is one SQLite file; plan/record steps take turns
+        self._store_lock = threading.Lock()
+
+    def log(self, msg: str):
+        with self._lock:
+            print(msg, flush=True)
+            with open(self.session / 'audit.log', 'a') as fh:
+                fh.write(msg + '\n')
+
+    def _append(self, src: Path, dest: Path, name: str):
+        """Copy a module's own log into the session-wide log"""
+        if src.exists() and src.stat().st_size:
+            with self._lock, open(dest, 'a') as out, open(src) as fh:
+                out.write(f'--- {name} ---\n')
+                out.writelines(fh)
+
+    def run_one(self, name: str) -> bool:
+        self.log(f'[{datetime.now():%c}] START {name}')
+        audit = self.logs / f'{name}.audit.log'
+        errors = self.logs / f'{name}.errors.log'
+        env = None
+        entry = self.registry.get(name, {}) if self.incremental else {}
+        # Incremental: restore stored outputs for unchanged files, process the rest
+        if 'outputs' in entry:
+            with self._store_lock:
+                store = ResultStore(STORE_DIR)
+                worklist = plan(store, entry, self.input_dir, self.session)
+                store.close()
+            env = {**os.environ, 'MODIOS_WORKLIST': str(worklist)}
+        with open(audit, 'w') as out, open(errors, 'w') as err:
+            rc = subprocess.call(
+                ['bash', str(MODULES_DIR / f'{name}.sh'), str(self.input_dir), str(self.session), self.backid],
+                stdout=out, stderr=err, env=env,
+            )
+        ok = rc == 0
+        if ok and env:
+            with self._store_lock:
+                store = ResultStore(STORE_DIR)
+                record(store, entry, self.session)
+                store.close()
+        self._append(audit, self.session / 'audit.log', name)
+        self._append(errors, self.session / 'errors.log', name)
+        if not ok:
+            self.log(f'[!] {name} failed (exit {rc})')
+        self.log(f'[{datetime.now():%c}] END {name}')
+        return ok
+
+    def run(self, names: list, deps: dict) -> dict:
+        """Run every module once its dependencies succeeded (``after`` ones only
+        need to have finished); returns {module: status}"""
+        status = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while len(status) < len(names):
+                for n in names:
+                    if n in status or n in running.values() or len(running) >= self.jobs:
+                        continue
+                    hard = set(self.registry.get(n, {}).get('depends_on', []))
+                    if any(status.get(d) in ('failed', 'skipped') for d in deps[n] & hard):
+                        status[n] = 'skipped'
+                        self.log(f'[!] {n} skipped (dependency failed)')
+                    elif all(d in status for d in deps[n]) and \
+                            all(status[d] == 'ok' for d in deps[n] & hard):
+                        running[pool.submit(self.run_one, n)] = n
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    n = running.pop(fut)
+                    try:
+                        status[n] = 'ok' if fut.result() else 'failed'
+                    except Exception as e:
+                        self.log(f'[!] {n} crashed: {e}')
+                        status[n] = 'failed'
+        return status
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--input', required=True)
+    p.add_argument('--session', required=True)
+    p.add_argument('--backid', required=True)
+    p.add_argument('--module', help='Run a single module')
+    p.add_argument('--jobs', type=int, help='Parallel modules (default: config.yaml concurrency)')
+    p.add_argument('--incremental', action='store_true')
+    args = p.parse_args()
+    cfg = load_config()
+    registry = load_registry()
+    selected = select_modules(cfg, args.module)
+    names = with_dependencies(selected, registry)
+    if len(names) > len(selected):
+        added = [n for n in names if n not in selected]
+        print(f"[*] Adding dependencies: {', '.join(added)}", file=sys.stderr)
+    deps = build_dag(names, registry)
+    sched = Scheduler(Path(args.input), Path(args.session), args.backid,
+                      args.jobs or int(cfg.get('concurrency', 1)), registry, args.incremental)
+    status = sched.run(names, deps)
+    failed = sorted(n for n, s in status.items() if s != 'ok')
+    sched.log(f"[*] {len(names) - len(failed)}/{len(names)} modules ok"
+              + (f"; not ok: {', '.join(failed)}" if failed else ''))
+if __name__ == '__main__':
+    main()
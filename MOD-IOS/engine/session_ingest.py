@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import argparse
+from pathlib import Path
+from modules.session_db import connect, session_db
+from modules.session_ingest import ingest_session
+
+def main():
+    p = argparse.ArgumentParser(description='Load module outputs of a session into session.sqlite')
+    p.add_argument('--session', required=True)
+    p.add_argument('--backid', required=True)
+    args = p.parse_args()
+    conn = connect(Path(args.session))
+    counts = ingest_session(conn, Path(args.session), args.backid)
+    conn.execute("ANALYZE")
+    conn.close()
+    print(f"[*] session_db: {session_db(args.session)}")
+    for what, n in counts.items():
+        print(f"    {what}: {n}")
+if __name__ == '__main__':
+    main()
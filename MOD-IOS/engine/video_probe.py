@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+import argparse, sys
+from modules.video_probe import probe_all
+
+def main():
+    p = argparse.ArgumentParser(description='ffprobe a NUL-separated file list (stdin) into NDJSON')
+    p.add_argument('--out', required=True, help='NDJSON file; appended to, already-probed paths are skipped')
+    p.add_argument('--workers', type=int, default=None, help='Concurrent ffprobe processes (default: all cores)')
+    args = p.parse_args()
+    paths = [x for x in sys.stdin.buffer.read().decode('utf-8', 'surrogateescape').split('\0') if x]
+    new, skipped = probe_all(paths, args.out, args.workers)
+    print(f"[*] ffprobe: {new} probed, {skipped} already in {args.out}")
+if __name__ == '__main__':
+    main()
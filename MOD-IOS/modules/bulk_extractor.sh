@@ -4,21 +4,18 @@ set -euo pipefail
 INPUT=$1
 SESSION=$2
 BACKID=$3
+source "$(dirname "${BASH_SOURCE[0]}")/lib/common.sh"
 OUT=$SESSION/bulk_extractor
 mkdir -p "$OUT"
 
-# Run BE on each file individually
-find "$INPUT" -type f | while read -r FILE; do
-  FNAME=$(basename "$FILE")
-  FOUT="$OUT/${FNAME}_bx"
-  mkdir -p "$FOUT"
-
-  echo "[*] Running bulk_extractor on $FILE" >> "$SESSION/audit.log"
-  if bulk_extractor -o "$FOUT" "$FILE" >> "$SESSION/audit.log" 2>> "$SESSION/errors.log"; then
-    echo "[+] bulk_extractor success: $FILE" >> "$SESSION/audit.log"
-  else
-    echo "[!] bulk_extractor failed: $FILE" >> "$SESSION/audit.log"
-  fi
-done
+# Unique blobs are packed into a few images and scanned in parallel;
+# per-shard output in $OUT/<shard>/, features in session.sqlite (carved_features)
+echo "[*] Running bulk_extractor on $INPUT" >> "$SESSION/audit.log"
+if inputs | python3 "$MODIOS_ENGINE/carve.py" --tool bulk_extractor --out "$OUT" --session "$SESSION" \
+     >> "$SESSION/audit.log" 2>> "$SESSION/errors.log"; then
+  echo "[+] bulk_extractor success" >> "$SESSION/audit.log"
+else
+  echo "[!] bulk_extractor failed" >> "$SESSION/audit.log"
+fi
 
 echo "[*] Finished bulk_extractor module." >> "$SESSION/audit.log"
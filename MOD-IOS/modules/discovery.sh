@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+set -euo pipefail
+INPUT=$1 ; SESSION=$2 ; BACKID=$3
+ROOT=$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)
+# One walk of the backup; writes $SESSION/discovery/{files.tsv,<kind>.list}
+python3 "$ROOT/engine/discovery.py" --input "$INPUT" --session "$SESSION"
@@ -1,7 +1,12 @@
 #!/usr/bin/env bash
 set -euo pipefail
 INPUT=$1 ; SESSION=$2 ; BACKID=$3
+source "$(dirname "${BASH_SOURCE[0]}")/lib/common.sh"
 OUT=$SESSION/exif_audit
 mkdir -p "$OUT"
-JSON=$OUT/${BACKID}_exif.json
-exiftool -j -r "$INPUT" > "$JSON"
+# Images/videos classified by discovery (backup blobs have no extensions,
+# so exiftool -r would skip them); exif_audit.py shards them by directory
+# over a pool of exiftool processes into $SESSION/session.sqlite (table exif)
+LIST=$OUT/${BACKID}_exif_inputs.list
+inputs image video > "$LIST"
+python3 "$MODIOS_ENGINE/exif_audit.py" --list "$LIST" --session "$SESSION"
@@ -1,10 +1,10 @@
 #!/usr/bin/env bash
 set -euo pipefail
 INPUT=$1 ; SESSION=$2 ; BACKID=$3
+source "$(dirname "${BASH_SOURCE[0]}")/lib/common.sh"
 OUT=$SESSION/file_carve
 mkdir -p "$OUT"
 
-# Foremost can't take a directory, so run it on each file individually
-find "$INPUT" -type f | while read -r file; do
-  foremost -i "$file" -o "$OUT/$(basename "$file")_carve" || echo "[!] Skipped: $file" >> "$SESSION/errors.log"
-done
+# Unique blobs are packed into a few images and carved in parallel;
+# per-shard output in $OUT/<shard>/, findings in session.sqlite (carved_features)
+inputs | python3 "$MODIOS_ENGINE/carve.py" --tool foremost --out "$OUT" --session "$SESSION"
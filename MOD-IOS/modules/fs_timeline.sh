@@ -1,9 +1,17 @@
 #!/usr/bin/env bash
 set -euo pipefail
 INPUT=$1 ; SESSION=$2 ; BACKID=$3
+ROOT=$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)
 OUT=$SESSION/fs_timeline
 mkdir -p "$OUT"
-BODY=$OUT/${BACKID}.body
-CSV=$OUT/${BACKID}_timeline.csv
-fls -r -m / "$INPUT" > "$BODY"
-mactime -b "$BODY" -d > "$CSV"
+if [ -d "$INPUT" ]; then
+  # Backup directory: Manifest.db MBFile times + stat, straight into session.sqlite
+  python3 "$ROOT/engine/fs_timeline.py" --input "$INPUT" --session "$SESSION"
+else
+  # Disk image: TSK bodyfile + mactime CSV (session_db loads the bodyfile)
+  command -v fls >/dev/null || { echo "[!] fs_timeline: fls (The Sleuth Kit) not found" >&2; exit 1; }
+  BODY=$OUT/${BACKID}.body
+  CSV=$OUT/${BACKID}_timeline.csv
+  fls -r -m / "$INPUT" > "$BODY"
+  mactime -b "$BODY" -d > "$CSV"
+fi
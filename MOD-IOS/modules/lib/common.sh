@@ -0,0 +1,25 @@
+#!/usr/bin/env bash
+# Shared helpers for modules/*.sh (sourced, not run as a module)
+MODIOS_ENGINE=$(cd "$(dirname "${BASH_SOURCE[0]}")/../../engine" && pwd)
+
+# inputs [kind ...]
+#   NUL-separated list of input files of the given kinds or groups
+#   (jpeg, png, mp4, mov, plist, sqlite, image, video, ... see
+#   engine/modules/file_discovery.py); no kinds means every file.
+#   Files are classified once per session by the discovery module, which
+#   is run here on demand if it has not run yet. Incremental runs set
+#   MODIOS_WORKLIST to a NUL-separated file of the new/changed files only.
+inputs(){
+  if [[ -n ${MODIOS_WORKLIST:-} ]]; then
+    cat "$MODIOS_WORKLIST"
+    return
+  fi
+  local dir=$SESSION/discovery kind
+  if [[ ! -f $dir/files.tsv ]]; then
+    python3 "$MODIOS_ENGINE/discovery.py" --input "$INPUT" --session "$SESSION" >&2
+  fi
+  (( $# )) || set -- all
+  for kind in "$@"; do
+    if [[ -f $dir/$kind.list ]]; then cat "$dir/$kind.list"; fi
+  done
+}
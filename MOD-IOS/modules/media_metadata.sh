@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+set -euo pipefail
+INPUT=$1 ; SESSION=$2 ; BACKID=$3
+ROOT=$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)
+# EXIF/QuickTime metadata for every discovered image/video into
+# $SESSION/session.sqlite (table media_metadata); exiftool runs as a few
+# -stay_open processes fed in batches, not once per file
+python3 "$ROOT/engine/media_metadata.py" --input "$INPUT" --session "$SESSION"
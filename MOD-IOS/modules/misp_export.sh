@@ -1,12 +1,10 @@
 #!/usr/bin/env bash
 set -euo pipefail
-# Usage: misp_export.sh <csv_dir> <misp_url> <api_key>
-CSV_DIR=$1; URL=$2; KEY=$3
-for csv in "$CSV_DIR"/*.csv; do
-  while IFS=, read -r type value _; do
-    curl -X POST "$URL/attributes" \
-      -H "Authorization: $KEY" \
-      -H "Content-Type: application/json" \
-      -d '{ "Event": { "id": 1 }, "Attribute": { "type": "'"$type"'", "value": "'"$value"'", "to_ids": true } }'
-  done < <(tail -n +2 "$csv")
-done
+INPUT=$1 ; SESSION=$2 ; BACKID=$3
+source "$(dirname "${BASH_SOURCE[0]}")/lib/common.sh"
+# Unique bulk_extractor indicators (carved_features) go to MISP in batched,
+# rate-limited requests over a pooled connection; url/apikey come from
+# config.yaml (misp) and the module is a no-op while they are unset
+echo "[*] Running misp_export on $INPUT" >> "$SESSION/audit.log"
+python3 "$MODIOS_ENGINE/misp_export.py" --session "$SESSION" --backid "$BACKID" \
+  >> "$SESSION/audit.log" 2>> "$SESSION/errors.log"
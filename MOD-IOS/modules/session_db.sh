@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+set -euo pipefail
+INPUT=$1 ; SESSION=$2 ; BACKID=$3
+ROOT=$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)
+# Bulk-load the outputs of earlier modules (discovery, fs_timeline bodyfile,
+# exif_audit, ffprobe, media_metadata) into $SESSION/session.sqlite
+python3 "$ROOT/engine/session_ingest.py" --session "$SESSION" --backid "$BACKID"
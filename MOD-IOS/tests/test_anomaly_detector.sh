@@ -1,6 +1,6 @@
 #!/usr/bin/env bash
 set -euo pipefail
-SESSION=$(bash cli/meta-ios.sh --input tests/test_media_case)
+SESSION=$(bash cli/meta-ios.sh --input tests/test_media_case | awk -F' at ' '/^Output at /{print $2}')
 BACKID=$(basename tests/test_media_case)
 if [[ -f "$SESSION/anomalies/${BACKID}_time_anomalies.csv" ]]; then
   echo "PASS: anomaly_detector"
@@ -1,6 +1,6 @@
 #!/usr/bin/env bash
 set -euo pipefail
-SESSION=$(bash cli/meta-ios.sh --input tests/test_media_case)
+SESSION=$(bash cli/meta-ios.sh --input tests/test_media_case --module image_tamper | awk -F' at ' '/^Output at /{print $2}')
 if [[ -d "$SESSION/tamper" && -f "$SESSION/tamper/sample.jpg.exif.json" ]]; then
   echo "PASS: image_tamper"
 else
@@ -7,7 +7,7 @@ DATA="$ROOT/tests/test_media_case"
 
 printf "Running smoke test …\n"
 OUTPUT=$("$CLI" --input "$DATA")
-SESSION=$(echo "$OUTPUT" | awk -F' at ' '{print $2}')
+SESSION=$(echo "$OUTPUT" | awk -F' at ' '/^Output at /{print $2}')
 
 fail(){ echo "❌  $1"; exit 1; }
 pass(){ echo "✅  $1"; }
@@ -15,17 +15,24 @@ pass(){ echo "✅  $1"; }
 check(){ local glob="$1" desc="$2"
   if compgen -G "$SESSION/$glob" >/dev/null; then pass "$desc"; else fail "$desc missing"; fi; }
 
+check_rows(){ local table="$1" desc="$2"
+  if python3 - "$SESSION/session.sqlite" "$table" <<'PY'
+import sqlite3, sys
+con = sqlite3.connect(sys.argv[1])
+sys.exit(0 if con.execute(f'SELECT 1 FROM "{sys.argv[2]}" LIMIT 1').fetchone() else 1)
+PY
+  then pass "$desc"; else fail "$desc missing"; fi; }
+
 check "audit.log"                            "audit log"
 check "errors.log"                           "error log"
-check "exif_audit/*_exif.json"               "EXIF output"
-check "ffprobe/*_ffprobe.json"               "FFprobe output"
-check "mediainfo/*_mediainfo.json"           "MediaInfo output"
-check "mp4dump/*_mp4dump.txt"                "MP4dump output"
-check "timeline/*_timeline.csv"              "timeline CSV"
-check "identity_fingerprint/*_identity_fingerprint_accounts.csv" "identity CSV"
+check "ffprobe/*_ffprobe.ndjson"             "FFprobe output"
+check "identity_fingerprint/*_accounts.csv"   "identity CSV"
 check "bulk_extractor/*/email.txt"           "bulk_extractor artefacts"
-check "carving/*"                            "Foremost carving output"
+check "file_carve/*"                         "Foremost carving output"
 check "gps_map/*_gps_map.html"               "GPS map"
 check "session.sqlite"                       "SQLite DB"
+check_rows "fs_timeline"                     "timeline rows"
+check_rows "media_metadata"                  "media metadata rows"
+check_rows "exif"                            "EXIF rows"
 
 echo -e "\n🎉  All checks passed!"
@@ -0,0 +1,105 @@
+#!/usr/bin/env bash
+set -euo pipefail
+# misp_export against a local stand-in MISP server: the first request is
+# rate limited (429) and the first attribute batch rejected; reruns reuse
+# the session's event and only send what is missing, duplicates once
+
+ROOT=$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)
+WORK=$(mktemp -d)
+trap 'kill "$SERVER" 2>/dev/null || true; rm -rf "$WORK"' EXIT
+
+fail(){ echo "❌  $1"; exit 1; }
+pass(){ echo "✅  $1"; }
+
+python3 - "$WORK/port" "$WORK/received.jsonl" "$WORK/events" <<'PY' &
+import json, sys, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+state = {"requests": 0, "events": 0, "batches": 0}
+lock = threading.Lock()
+
+class Misp(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with lock:
+            state["requests"] += 1
+            first = state["requests"] == 1
+        if self.headers.get("Authorization") != "test-key":
+            return self.reply(403, {"message": "Authentication failed"})
+        if first:
+            return self.reply(429, {"message": "Too many requests"}, [("Retry-After", "0")])
+        if self.path == "/events/add":
+            with lock, open(sys.argv[3], "a") as fh:
+                state["events"] += 1
+                event_id = str(state["events"])
+                fh.write(event_id + "\n")
+            return self.reply(200, {"Event": {"id": event_id, "info": body["Event"]["info"]}})
+        event_id = self.path.rsplit("/", 1)[-1]
+        if self.path.startswith("/attributes/add/") and event_id.isdigit() and int(event_id) <= state["events"]:
+            with lock:
+                state["batches"] += 1
+                if state["batches"] == 1:
+                    return self.reply(400, {"message": "Could not add attributes"})
+                with open(sys.argv[2], "a") as fh:
+                    for attr in body:
+                        fh.write(json.dumps(dict(attr, event_id=event_id)) + "\n")
+            return self.reply(200, [{"Attribute": a} for a in body])
+        self.reply(404, {"message": "Not found"})
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), Misp)
+with open(sys.argv[1], "w") as fh:
+    fh.write(str(server.server_address[1]))
+server.serve_forever()
+PY
+SERVER=$!
+for _ in $(seq 50); do [[ -s "$WORK/port" ]] && break; sleep 0.1; done
+[[ -s "$WORK/port" ]] || fail "stand-in MISP server did not start"
+URL="http://127.0.0.1:$(cat "$WORK/port")"
+
+SESSION=$WORK/session
+mkdir -p "$SESSION"
+python3 - "$SESSION" <<'PY'
+import sqlite3, sys
+con = sqlite3.connect(f"{sys.argv[1]}/session.sqlite")
+con.execute("CREATE TABLE carved_features (tool TEXT NOT NULL, feature TEXT NOT NULL, value TEXT, context TEXT,"
+            " sha1 TEXT, offset INTEGER, shard TEXT, shard_offset INTEGER)")
+rows = [("email", f"user{i}@example.com") for i in range(250)]
+rows += [("email", "User1@Example.com "), ("domain", "Example.com"), ("domain", "example.com"),
+         ("url", "https://example.com/a"), ("ip", "10.0.0.1"), ("ip", "10.0.0.1"), ("ccn", "4111111111111111")]
+con.executemany("INSERT INTO carved_features (tool, feature, value) VALUES ('bulk_extractor', ?, ?)", rows)
+con.commit()
+PY
+
+run(){ python3 "$ROOT/engine/misp_export.py" --session "$SESSION" --backid test \
+         --url "$URL" --apikey test-key --batch-size 40 --concurrency 3 --rate 50; }
+
+# "<attributes> <unique attributes> <events they went to>"
+received(){ python3 -c '
+import json, sys
+attrs = [json.loads(line) for line in open(sys.argv[1])]
+print(len(attrs), len({(a["type"], a["value"]) for a in attrs}), len({a["event_id"] for a in attrs}))
+' "$WORK/received.jsonl"; }
+
+run >/dev/null 2>&1 && fail "rejected batch not reported" || pass "rejected batch reported"
+run >/dev/null || fail "misp_export retry failed"
+[[ $(received) == "253 253 1" ]] && pass "unique indicators exported once, to one event" \
+  || fail "expected 253 unique attributes in one event, got: $(received)"
+run >/dev/null || fail "misp_export rerun failed"
+[[ $(received) == "253 253 1" ]] && pass "rerun skips exported indicators" || fail "rerun sent attributes again"
+[[ $(wc -l < "$WORK/events") -eq 1 ]] && pass "reruns reuse the session's event" \
+  || fail "$(wc -l < "$WORK/events") events created"
+python3 "$ROOT/engine/misp_export.py" --session "$SESSION" --url "$URL" --apikey wrong --event-id 9 \
+  >/dev/null 2>&1 && fail "bad API key not reported" || pass "bad API key reported"
@@ -0,0 +1,71 @@
+#!/usr/bin/env bash
+set -euo pipefail
+# Full-text search index of a small synthetic backup: rebuild on a fresh
+# parser, substring, prefix, column and boolean queries, rejected queries
+
+ROOT=$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+
+python3 - "$ROOT/engine" "$WORK/backup" <<'PY'
+import plistlib, sqlite3, sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from modules.parse_decode_module import IOSBackupParser
+from modules.search_index import search_db, to_match
+
+backup = Path(sys.argv[2])
+backup.mkdir()
+files = [("HomeDomain", "Library/Preferences/com.apple.locationd.plist", {"LastFix": "Zurich Hauptbahnhof"}),
+         ("HomeDomain", "Library/SMS/sms.db", None),
+         ("AppDomain-net.whatsapp.WhatsApp", "Documents/ChatStorage.sqlite", None),
+         ("CameraRollDomain", "Media/DCIM/100APPLE/IMG_0001.HEIC", None)]
+con = sqlite3.connect(backup / "Manifest.db")
+con.execute("CREATE TABLE Files (fileID TEXT PRIMARY KEY, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)")
+for i, (domain, rel, plist) in enumerate(files):
+    fid = f"{i:02x}" + "0" * 38
+    (backup / fid[:2]).mkdir(exist_ok=True)
+    (backup / fid[:2] / fid).write_bytes(plistlib.dumps(plist) if plist else b"\0" * 16)
+    con.execute("INSERT INTO Files VALUES (?, ?, ?, 1, NULL)", (fid, domain, rel))
+con.commit()
+con.close()
+
+failures = []
+def check(desc, ok):
+    print(("✅  " if ok else "❌  ") + desc)
+    if not ok:
+        failures.append(desc)
+
+parser = IOSBackupParser(backup)
+parser.connect()
+try:
+    check("rebuild on a parser without an open index", parser.build_search_index(rebuild=True))
+    def paths(query):
+        return set(parser.search(query)["relativePath"])
+    check("substring", paths("ChatStor") == {"Documents/ChatStorage.sqlite"})
+    check("plist value", paths("Hauptbahnhof") == {"Library/Preferences/com.apple.locationd.plist"})
+    check("prefix", paths("domain:Camera*") == {"Media/DCIM/100APPLE/IMG_0001.HEIC"})
+    check("column", paths("key:LastFix") == {"Library/Preferences/com.apple.locationd.plist"})
+    check("column excludes others", paths("path:HomeDomain") == set())
+    check("AND / OR", paths("HomeDomain AND (sms OR locationd)") ==
+          {"Library/SMS/sms.db", "Library/Preferences/com.apple.locationd.plist"})
+    check("NOT", paths("HomeDomain NOT sms") == {"Library/Preferences/com.apple.locationd.plist"})
+    for query in ("ab", "", "path:x"):
+        try:
+            to_match(query)
+            check(f"rejects {query!r}", False)
+        except ValueError:
+            check(f"rejects {query!r}", True)
+    try:
+        parser.search("NOT sms")
+        check("leading NOT is an FTS5 error", False)
+    except sqlite3.OperationalError:
+        check("leading NOT is an FTS5 error", True)
+    check("rebuild reuses the open index", parser.build_search_index(rebuild=True) and len(paths("sms.db")) == 1)
+finally:
+    parser.close()
+    for p in search_db(backup / "Manifest.db").parent.glob("*"):
+        p.unlink()
+    search_db(backup / "Manifest.db").parent.rmdir()
+sys.exit(1 if failures else 0)
+PY